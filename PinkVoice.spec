@@ -28,7 +28,6 @@ a = Analysis(
         'pynput',
         'sounddevice',
         'numpy',
-        'scipy',
         'objc',
         'HIServices',
         'Quartz',
@@ -37,7 +36,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['scipy'],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
@@ -6,7 +6,7 @@ a = Analysis(
     ['src/pink_voice/__main__.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('src/pink_voice/core/wsl_relay.py', 'pink_voice/core')],  # piped into WSL python3
     hiddenimports=[
         'pink_voice',
         'pink_voice.main',
@@ -18,16 +18,37 @@ a = Analysis(
         'pink_voice.platform.clipboard',
         'pink_voice.platform.sounds',
         'pink_voice.platform.notifications',
+        'pink_voice.commands',
+        'pink_voice.commands.history',
+        'pink_voice.commands.loadtest',
+        'pink_voice.commands.memory',
+        'pink_voice.commands.replay',
+        'pink_voice.commands.rules',
+        'pink_voice.commands.ctl',
+        'pink_voice.commands.gateway',
         'pink_voice.core',
+        'pink_voice.core.archive',
+        'pink_voice.core.diagnostics',
+        'pink_voice.core.gateway',
+        'pink_voice.core.idle',
+        'pink_voice.core.jobqueue',
+        'pink_voice.core.metrics',
+        'pink_voice.core.postprocess',
         'pink_voice.core.recorder',
+        'pink_voice.core.results',
+        'pink_voice.core.routing',
+        'pink_voice.core.trace',
         'pink_voice.core.transcribe',
+        'pink_voice.core.transports',
+        'pink_voice.core.wav',
+        'pink_voice.core.wsl_relay',
         'pink_voice.daemon',
         'pink_voice.daemon.singleton',
         'pink_voice.daemon.hotkeys',
+        'pink_voice.daemon.control',
         'pynput',
         'sounddevice',
         'numpy',
-        'scipy',
         'pyperclip',
         'plyer',
         'winsound',
@@ -37,7 +58,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=['rumps', 'objc', 'HIServices', 'Quartz', 'CoreFoundation'],
+    excludes=['rumps', 'objc', 'HIServices', 'Quartz', 'CoreFoundation', 'scipy'],
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
@@ -0,0 +1,37 @@
+"""Command-line subcommands (pink-voice <command> ...)."""
+
+import importlib
+import sys
+from typing import List
+
+# Command name -> module implementing run(argv) -> int
+COMMANDS = {
+    'ctl': 'pink_voice.commands.ctl',
+    'gateway': 'pink_voice.commands.gateway',
+    'history': 'pink_voice.commands.history',
+    'loadtest': 'pink_voice.commands.loadtest',
+    'memory': 'pink_voice.commands.memory',
+    'replay': 'pink_voice.commands.replay',
+    'rules': 'pink_voice.commands.rules',
+}
+
+
+def run_command(name: str, argv: List[str]) -> int:
+    """
+    Run a subcommand.
+
+    Args:
+        name: Command name
+        argv: Remaining command-line arguments
+
+    Returns:
+        Process exit code
+    """
+    module_name = COMMANDS.get(name)
+    if module_name is None:
+        print(f"Unknown command: {name}", file=sys.stderr)
+        print(f"Available commands: {', '.join(sorted(COMMANDS))}", file=sys.stderr)
+        return 2
+
+    module = importlib.import_module(module_name)
+    return module.run(argv)
@@ -0,0 +1,62 @@
+"""pink-voice ctl: control the running instance over the local control API."""
+
+import argparse
+import json
+import sys
+from typing import List
+
+from pink_voice.core.diagnostics import ACTIONS
+from pink_voice.daemon.control import send_command
+
+
+def run(argv: List[str]) -> int:
+    """
+    Run the ctl command.
+
+    Args:
+        argv: Command-line arguments
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(prog='pink-voice ctl', description='Control the running Pink Voice instance')
+    parser.add_argument('action', choices=['start', 'stop', 'status', 'last', 'subscribe', 'diag'])
+    parser.add_argument('diag_action', nargs='?', choices=ACTIONS, metavar='{' + ','.join(ACTIONS) + '}',
+                        help='diag: what to collect (written to <data dir>/diagnostics)')
+    parser.add_argument('--wait', action='store_true', help='stop: wait for the transcript and print it')
+    parser.add_argument('--seconds', type=float, help='diag profile: seconds to sample (default 30)')
+    parser.add_argument('--json', action='store_true', help='Print raw JSON responses')
+    args = parser.parse_args(argv)
+
+    request = {'cmd': args.action}
+    if args.wait:
+        request['wait'] = True
+    if args.action == 'diag':
+        if not args.diag_action:
+            parser.error(f"diag needs one of: {', '.join(ACTIONS)}")
+        request['action'] = args.diag_action
+        if args.seconds:
+            request['seconds'] = args.seconds
+
+    try:
+        for response in send_command(request):
+            if args.json or args.action in ('status', 'subscribe'):
+                print(json.dumps(response, ensure_ascii=False), flush=True)
+            elif 'text' in response and response['text'] is not None:
+                print(response['text'], flush=True)
+            elif 'message' in response:
+                print(response['message'], flush=True)
+                if not response.get('recorder'):
+                    print("(no recorder process to ask)", flush=True)
+
+            if not response.get('ok', True):
+                if not args.json:
+                    print(response.get('error', 'Request rejected'), file=sys.stderr)
+                return 1
+    except (OSError, ValueError) as e:
+        print(f"Pink Voice is not reachable (is PINK_VOICE_CONTROL=1 set?): {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+
+    return 0
@@ -0,0 +1,89 @@
+"""
+pink-voice gateway: serve remote Pink Voice clients from this machine's transcriber.
+
+Clients add `relay://<this host>:47823` to their endpoints and set
+PINK_VOICE_GATEWAY_TOKEN to the gateway's token. Requests are
+micro-batched and scheduled round-robin across clients (see
+core/gateway.py); per-client queue and latency metrics are exported like
+a desktop instance's (PINK_VOICE_METRICS_PORT, PINK_VOICE_STATSD).
+"""
+
+import argparse
+import secrets
+import sys
+from typing import List
+
+from pink_voice.config import config
+from pink_voice.core.gateway import DEFAULT_PORT, GatewayServer, MicroBatcher
+from pink_voice.core.transcribe import TranscribeService, reset_transport, result_format
+
+
+def run(argv: List[str]) -> int:
+    """
+    Run the gateway until interrupted.
+
+    Args:
+        argv: Command-line arguments
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(prog='pink-voice gateway',
+                                     description='Serve remote clients with micro-batched transcription')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind (0.0.0.0 for the local network)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to bind')
+    parser.add_argument('--window', type=float, default=0.05, help='Seconds a request waits for others to batch with')
+    parser.add_argument('--max-batch', type=int, default=8, help='Maximum requests per transcriber call')
+    parser.add_argument('--max-seconds', type=float, default=30.0, help='Maximum joined audio per call')
+    parser.add_argument('--workers', type=int, default=1, help='Concurrent transcriber calls')
+    parser.add_argument('--timeout', type=float, default=config.transcribe_timeout,
+                        help='Seconds a request may wait for its transcript, queue included (0 = no limit)')
+    parser.add_argument('--token', default=config.gateway_token,
+                        help='Shared secret clients must send (default: PINK_VOICE_GATEWAY_TOKEN, else a random one)')
+    stub = parser.add_argument_group('stub transcriber (offline)')
+    stub.add_argument('--stub', action='store_true', help='Use the built-in stub instead of pink-transcriber')
+    stub.add_argument('--stub-latency', type=float, default=0.2, help='Stub seconds per call')
+    stub.add_argument('--stub-rtf', type=float, default=0.05, help='Stub seconds per second of audio')
+    stub.add_argument('--stub-workers', type=int, default=1, help='Stub concurrent capacity (0 = unlimited)')
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        config.transcribe_command = [
+            sys.executable, '-m', 'pink_voice.core.stub_transcriber',
+            '--latency', str(args.stub_latency),
+            '--rtf', str(args.stub_rtf),
+            '--workers', str(args.stub_workers),
+        ]
+        config.transport = 'command'
+        config.endpoints = []
+        reset_transport()
+
+    if not TranscribeService.wait_for_service():
+        print("✗ transcriber is not available", file=sys.stderr)
+        return 1
+
+    from pink_voice.core.metrics import start_exporters
+    start_exporters()
+
+    token = args.token
+    if not token:
+        token = secrets.token_hex(16)
+        print(f"🔑 No token configured, clients need PINK_VOICE_GATEWAY_TOKEN={token}", flush=True)
+
+    batching = result_format() == "jsonl"
+    try:
+        server = GatewayServer(args.host, args.port,
+                               MicroBatcher(args.window, args.max_batch, args.max_seconds, args.workers,
+                                            args.timeout), token)
+    except OSError as e:
+        print(f"✗ Gateway not started: {e}", file=sys.stderr)
+        return 1
+
+    print(f"✓ Gateway listening on {args.host}:{args.port} "
+          f"({'batching' if batching else 'no batching: transcriber returns plain text'})", flush=True)
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
@@ -0,0 +1,99 @@
+"""pink-voice history: search and re-transcribe archived recordings."""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+from pink_voice.config import config
+from pink_voice.core.archive import open_archive
+
+
+def run(argv: List[str]) -> int:
+    """
+    Run the history command.
+
+    Args:
+        argv: Command-line arguments
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(prog='pink-voice history', description='Search archived dictations')
+    parser.add_argument('query', nargs='*', help='Words to search for (empty lists recent entries)')
+    parser.add_argument('-n', '--limit', type=int, default=20, help='Maximum number of results')
+    parser.add_argument('--retranscribe', type=int, metavar='ID', help='Re-transcribe entry from stored audio')
+    parser.add_argument('--export', nargs=2, metavar=('ID', 'PATH'), help='Export entry audio as WAV')
+    args = parser.parse_args(argv)
+
+    archive = open_archive()
+    if archive is None:
+        print("Archive is disabled (set PINK_VOICE_ARCHIVE=1)", file=sys.stderr)
+        return 1
+
+    try:
+        if args.retranscribe is not None:
+            return _retranscribe(archive, args.retranscribe)
+
+        if args.export:
+            entry = archive.get(int(args.export[0]))
+            if entry is None:
+                print(f"No entry #{args.export[0]}", file=sys.stderr)
+                return 1
+            try:
+                archive.export_wav(entry, args.export[1])
+            except (OSError, ValueError) as e:
+                print(f"✗ Audio of entry #{entry.id} is not available: {e}", file=sys.stderr)
+                return 1
+            print(f"✓ Exported #{entry.id} to {args.export[1]}")
+            return 0
+
+        started = time.perf_counter()
+        entries = archive.search(' '.join(args.query), limit=args.limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        for entry in entries:
+            created = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.created_at))
+            print(f"#{entry.id:<6} {created}  {entry.duration:6.1f}s  {entry.text}")
+
+        if config.verbose:
+            print(f"{len(entries)} result(s) in {elapsed_ms:.1f} ms", file=sys.stderr)
+        return 0
+    finally:
+        archive.close()
+
+
+def _retranscribe(archive, entry_id: int) -> int:
+    """Re-transcribe an archived entry and store the new text."""
+    from pink_voice.core.transcribe import TranscribeService
+
+    entry = archive.get(entry_id)
+    if entry is None:
+        print(f"No entry #{entry_id}", file=sys.stderr)
+        return 1
+
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
+        tmp_path: str = tmp.name
+
+    try:
+        try:
+            archive.export_wav(entry, tmp_path)
+        except (OSError, ValueError) as e:
+            # Segment file missing (evicted) or empty (mmap refuses zero-length files)
+            print(f"✗ Audio of entry #{entry_id} is not available: {e}", file=sys.stderr)
+            return 1
+        text = TranscribeService.transcribe(tmp_path)
+    except RuntimeError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+    archive.update_text(entry.id, text)
+    print(text)
+    return 0
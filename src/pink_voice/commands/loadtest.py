@@ -0,0 +1,306 @@
+"""
+pink-voice loadtest: drive the transcriber with many concurrent synthetic clients.
+
+Requests arrive as a Poisson process at the given rate (open loop, latency
+includes time spent queued behind busy clients) or back to back (closed
+loop, --rate 0). With several rates, or --sweep, each rate is a step and
+the first step the backend can't keep up with is the saturation point.
+
+With --gateway, requests go straight to a `pink-voice gateway` from
+--clients simulated clients (each with its own name), and every step
+reports per-client latency and Jain's fairness index across clients.
+"""
+
+import argparse
+import array
+import glob
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pink_voice.config import config
+from pink_voice.core.gateway import jain_index
+from pink_voice.core.transcribe import TranscribeService, reset_transport
+from pink_voice.core.transports import RelayTransport
+
+# A step is saturated when it completes less than this share of the arrival rate,
+# fails too often, or its p95 latency grows this many times over the first step's median
+SATURATION_THROUGHPUT = 0.9
+SATURATION_ERROR_RATE = 0.05
+SATURATION_LATENCY_GROWTH = 4.0
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def _collect_corpus(paths: List[str]) -> List[str]:
+    """WAV files from files and directories."""
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '**', '*.wav'), recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def _synthetic_wav(directory: str, seconds: float = 3.0) -> str:
+    """Write a WAV with a quiet tone when no corpus is given (silence may come back as no segments)."""
+    path = os.path.join(directory, 'synthetic.wav')
+    tone = array.array('h', (int(1000 * math.sin(2 * math.pi * 220 * i / config.sample_rate))
+                             for i in range(int(config.sample_rate * seconds))))
+    if sys.byteorder == 'big':
+        tone.byteswap()
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(config.sample_rate)
+        wav.writeframes(tone.tobytes())
+    return path
+
+
+def _latency_summary(latencies: List[float]) -> Dict:
+    """Mean, percentiles and max of sorted latencies."""
+    return {
+        "mean": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+        "p50": round(_percentile(latencies, 0.50), 4),
+        "p90": round(_percentile(latencies, 0.90), 4),
+        "p95": round(_percentile(latencies, 0.95), 4),
+        "p99": round(_percentile(latencies, 0.99), 4),
+        "max": round(latencies[-1], 4) if latencies else 0.0,
+    }
+
+
+def _run_step(files: List[str], rate: float, concurrency: int, requests: int, rng: random.Random,
+              send: Callable[[int, str], None], clients: int = 1) -> Dict:
+    """
+    Send one batch of requests.
+
+    Args:
+        files: Corpus
+        rate: Arrival rate in requests per second (0 = closed loop)
+        concurrency: Number of concurrent clients
+        requests: Number of requests
+        rng: Random source for arrival times
+        send: Transcribes a file on behalf of a simulated client
+        clients: Number of simulated clients (requests are dealt out in turn)
+
+    Returns:
+        Step report
+    """
+    results: List[Tuple[int, float, bool]] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def one(client: int, path: str, scheduled: Optional[float]) -> None:
+        started = time.monotonic()
+        try:
+            send(client, path)
+            ok = True
+        except Exception as e:
+            ok = False
+            message = str(e).strip().splitlines()[-1][:200] if str(e).strip() else type(e).__name__
+            with lock:
+                errors[message] = errors.get(message, 0) + 1
+        finished = time.monotonic()
+        with lock:
+            results.append((client, finished - (scheduled if scheduled is not None else started), ok))
+
+    began = time.monotonic()
+    last_arrival = began
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        next_at = began
+        for i in range(requests):
+            scheduled = None
+            if rate > 0:
+                next_at += rng.expovariate(rate)
+                delay = next_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                scheduled = next_at
+            executor.submit(one, i % clients, files[i % len(files)], scheduled)
+            last_arrival = time.monotonic()
+    elapsed = time.monotonic() - began
+
+    latencies = sorted(latency for _, latency, ok in results if ok)
+    failed = sum(1 for _, _, ok in results if not ok)
+    throughput = len(latencies) / elapsed if elapsed > 0 else 0.0
+    # Random arrivals rarely hit the nominal rate exactly; compare against what was sent
+    arrival_rate = (requests - 1) / (last_arrival - began) if rate > 0 and last_arrival > began else 0.0
+
+    step = {
+        "offered_rate": rate,
+        "arrival_rate": round(arrival_rate, 3),
+        "concurrency": concurrency,
+        "requests": len(results),
+        "completed": len(latencies),
+        "errors": failed,
+        "error_rate": round(failed / len(results), 4) if results else 0.0,
+        "error_messages": errors,
+        "duration_seconds": round(elapsed, 3),
+        "throughput": round(throughput, 3),
+        "latency_seconds": _latency_summary(latencies),
+    }
+
+    if clients > 1:
+        per_client = {
+            client: sorted(latency for who, latency, ok in results if ok and who == client)
+            for client in range(clients)
+        }
+        step["clients"] = {
+            f"client-{client}": {"completed": len(values), **_latency_summary(values)}
+            for client, values in per_client.items()
+        }
+        step["fairness"] = round(jain_index([
+            sum(values) / len(values) for values in per_client.values() if values
+        ]), 4)
+    return step
+
+
+def _saturated(step: Dict, baseline: Dict) -> Optional[str]:
+    """
+    Reason a step counts as saturated.
+
+    Args:
+        step: Step report
+        baseline: First step report (reference latency)
+
+    Returns:
+        Reason, or None if the backend kept up
+    """
+    if step["error_rate"] > SATURATION_ERROR_RATE:
+        return f"error rate {step['error_rate']:.0%}"
+
+    # The last requests' latency stretches the step past the last arrival
+    expected = step["completed"] / (step["completed"] / step["arrival_rate"] + step["latency_seconds"]["p50"]) \
+        if step["arrival_rate"] > 0 and step["completed"] else 0.0
+    if expected and step["throughput"] < SATURATION_THROUGHPUT * expected:
+        return f"throughput {step['throughput']:.2f}/s below arrival rate {step['arrival_rate']:.2f}/s"
+
+    reference = baseline["latency_seconds"]["p50"]
+    if step is not baseline and reference and step["latency_seconds"]["p95"] > SATURATION_LATENCY_GROWTH * reference:
+        return f"p95 latency {step['latency_seconds']['p95']:.2f}s over {SATURATION_LATENCY_GROWTH:g}x baseline median"
+    return None
+
+
+def run(argv: List[str]) -> int:
+    """
+    Run the load test.
+
+    Args:
+        argv: Command-line arguments
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(prog='pink-voice loadtest', description='Load-test the transcriber')
+    parser.add_argument('corpus', nargs='*', help='WAV files or directories (default: synthetic tone)')
+    parser.add_argument('--rate', default='1', help='Arrival rate(s) in requests/s, comma-separated (0 = closed loop)')
+    parser.add_argument('--sweep', action='store_true', help='Double the rate each step until saturation')
+    parser.add_argument('--max-steps', type=int, default=8, help='Maximum sweep steps')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('-n', '--requests', type=int, default=50, help='Requests per step')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for arrival times')
+    parser.add_argument('-o', '--output', help='Write the JSON report to this file')
+    parser.add_argument('--gateway', metavar='HOST:PORT', help='Send requests to a pink-voice gateway')
+    parser.add_argument('--clients', type=int, default=4, help='Simulated gateway clients')
+    stub = parser.add_argument_group('stub transcriber (offline)')
+    stub.add_argument('--stub', action='store_true', help='Use the built-in stub instead of pink-transcriber')
+    stub.add_argument('--stub-latency', type=float, default=0.2, help='Stub seconds per request')
+    stub.add_argument('--stub-workers', type=int, default=2, help='Stub concurrent capacity (0 = unlimited)')
+    stub.add_argument('--stub-error-rate', type=float, default=0.0, help='Stub failure fraction')
+    args = parser.parse_args(argv)
+
+    try:
+        rates = [float(rate) for rate in args.rate.split(',')]
+    except ValueError:
+        parser.error(f"invalid --rate: {args.rate}")
+
+    if args.stub:
+        config.transcribe_command = [
+            sys.executable, '-m', 'pink_voice.core.stub_transcriber',
+            '--latency', str(args.stub_latency),
+            '--workers', str(args.stub_workers),
+            '--error-rate', str(args.stub_error_rate),
+        ]
+        # Offline means offline: no relay, other endpoints, or route profiles the stub doesn't know
+        config.transport = 'command'
+        config.endpoints = []
+        config.routes = []
+        reset_transport()
+
+    clients = 1
+    if args.gateway:
+        host, _, port = args.gateway.rpartition(':')
+        clients = max(args.clients, 1)
+        gateway = [RelayTransport(host or '127.0.0.1', int(port), client=f"loadtest-{i}",
+                                  token=config.gateway_token) for i in range(clients)]
+
+        def send(client: int, path: str) -> None:
+            gateway[client].transcribe(path)
+
+        healthy = gateway[0].health_check(config.health_check_timeout)
+    else:
+        def send(client: int, path: str) -> None:
+            TranscribeService.transcribe(path)
+
+        healthy = TranscribeService.health_check()
+
+    if not healthy:
+        print("✗ transcriber is not available", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory(prefix='pink-voice-loadtest-') as scratch:
+        files = _collect_corpus(args.corpus) or [_synthetic_wav(scratch)]
+        missing = [path for path in files if not os.path.isfile(path)]
+        if missing:
+            print(f"Not found: {', '.join(missing)}", file=sys.stderr)
+            return 1
+
+        rng = random.Random(args.seed)
+        steps: List[Dict] = []
+        saturation: Optional[Dict] = None
+
+        while rates:
+            rate = rates.pop(0)
+            step = _run_step(files, rate, args.concurrency, args.requests, rng, send, clients)
+            steps.append(step)
+            print(f"rate {rate:g}/s: {step['throughput']:.2f}/s, p95 {step['latency_seconds']['p95']:.3f}s, "
+                  f"errors {step['errors']}", file=sys.stderr, flush=True)
+
+            reason = _saturated(step, steps[0])
+            if reason:
+                saturation = {"offered_rate": rate, "reason": reason}
+                break
+            if args.sweep and not rates and rate > 0 and len(steps) < args.max_steps:
+                rates.append(rate * 2)
+
+    sustainable = [step for step in steps if not _saturated(step, steps[0])]
+    report = {
+        "transport": f"gateway {args.gateway}" if args.gateway else config.transport,
+        "transcribe_command": config.transcribe_command,
+        "corpus_files": len(files),
+        "steps": steps,
+        "max_sustained_throughput": max((step["throughput"] for step in sustainable), default=0.0),
+        "saturation": saturation,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+    return 0
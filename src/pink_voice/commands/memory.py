@@ -0,0 +1,80 @@
+"""pink-voice memory: measure memory with a warm standby recorder, while idle, and warm-up time."""
+
+import argparse
+import json
+import time
+from typing import List
+
+from pink_voice.core.idle import memory_footprint, trim_memory
+from pink_voice.core.recorder import AudioRecorder
+
+
+def _wait_ready(recorder: AudioRecorder, timeout: float) -> float:
+    """Seconds until the standby recorder is ready (-1 on timeout)."""
+    started = time.perf_counter()
+    while not recorder.standby_ready():
+        if time.perf_counter() - started > timeout:
+            return -1.0
+        time.sleep(0.005)
+    return time.perf_counter() - started
+
+
+def run(argv: List[str]) -> int:
+    """
+    Run the memory benchmark.
+
+    Args:
+        argv: Command-line arguments
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(prog='pink-voice memory',
+                                     description='Measure resident memory warm vs. idle, and warm-up time')
+    parser.add_argument('--rounds', type=int, default=3, help='Idle/warm-up cycles to measure')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    recorder = AudioRecorder(prewarm=True)
+    try:
+        cold_start = _wait_ready(recorder, 30)
+        if cold_start < 0:
+            print("Recorder process did not start", flush=True)
+            return 1
+
+        warm = memory_footprint(recorder)
+        idle, warmups = warm, []
+
+        for _ in range(args.rounds):
+            recorder.release_standby()
+            trim_memory()
+            idle = memory_footprint(recorder)
+
+            started = time.perf_counter()
+            recorder.ensure_standby()
+            warmups.append(_wait_ready(recorder, 30))
+            if warmups[-1] < 0:
+                print("Recorder process did not restart", flush=True)
+                return 1
+            warmups[-1] = time.perf_counter() - started
+    finally:
+        recorder.shutdown()
+
+    result = {
+        "warm": warm,
+        "idle": idle,
+        "saved_bytes": warm["total"] - idle["total"],
+        "cold_start_seconds": round(cold_start, 4),
+        "warmup_seconds": [round(seconds, 4) for seconds in warmups],
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    mb = 1024 * 1024
+    print(f"Warm:    main {warm['main'] / mb:6.1f}MB  recorder {warm['recorder'] / mb:6.1f}MB", flush=True)
+    print(f"Idle:    main {idle['main'] / mb:6.1f}MB  recorder {idle['recorder'] / mb:6.1f}MB", flush=True)
+    print(f"Saved:   {result['saved_bytes'] / mb:.1f}MB", flush=True)
+    print(f"Warm-up: {', '.join(f'{s * 1000:.0f}ms' for s in warmups)}", flush=True)
+    return 0
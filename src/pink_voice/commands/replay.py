@@ -0,0 +1,291 @@
+"""
+pink-voice replay: re-drive a recorded session trace on this machine.
+
+Each traced utterance is replayed with its own timing: synthetic audio is
+fed to the recorder's capture pipeline in blocks of the traced sizes at
+the traced callback times (device stalls included), the recording is
+saved the way the recorder saves it, and transcribed through
+TranscribeService against the stub transcriber answering in the traced
+response time. The report sets traced and replayed timings side by side;
+with --profile the pipeline and transcription client run under cProfile.
+
+    PINK_VOICE_TRACE=~/pink-voice-trace.jsonl pink-voice     # in the field
+    pink-voice replay pink-voice-trace.jsonl --profile replay.prof
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from pink_voice.config import LATENCY_PROFILES, config
+from pink_voice.core.recorder_process import CapturePipeline, RecorderSettings
+from pink_voice.core.trace import read_trace
+from pink_voice.core.transcribe import TranscribeService, reset_transport
+
+
+class _SyntheticVoice:
+    """Deterministic speech-like noise: bursts of syllable-modulated noise with pauses."""
+
+    def __init__(self, rate: int, channels: int, rms_dbfs: float, seed: int) -> None:
+        self.rate: int = rate
+        self.channels: int = channels
+        self.amplitude: float = 32768 * 10 ** (rms_dbfs / 20)
+        self.rng = np.random.default_rng(seed)
+        self.position: int = 0
+        self._bursts: List[tuple] = []  # (start, end) in frames
+        self._scheduled: int = 0
+
+    def _schedule(self, until: int) -> None:
+        while self._scheduled < until:
+            start = self._scheduled + int(self.rng.uniform(0.1, 0.5) * self.rate)
+            end = start + int(self.rng.uniform(0.3, 1.2) * self.rate)
+            self._bursts.append((start, end))
+            self._scheduled = end
+
+    def block(self, frames: int) -> np.ndarray:
+        """Next `frames` frames as int16, frames x channels."""
+        start, end = self.position, self.position + frames
+        self._schedule(end)
+        t = np.arange(start, end)
+        envelope = np.zeros(frames)
+        for burst_start, burst_end in self._bursts:
+            if burst_end > start and burst_start < end:
+                inside = (t >= burst_start) & (t < burst_end)
+                envelope[inside] = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t[inside] / self.rate)
+        self.position = end
+
+        noise = self.rng.standard_normal((frames, self.channels)) * self.amplitude
+        # A little background noise in the pauses too
+        return np.clip(noise * (envelope[:, None] + 0.02), -32768, 32767).astype(np.int16)
+
+
+def _utterances(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Group events into utterances: from status "recording" to the next "idle"."""
+    utterances: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for event in events:
+        kind = event.get("event")
+        if kind == "status" and event.get("status") == "recording":
+            current = {"start": event["t"], "stop": None, "done": None, "recording": None, "transcribe": []}
+            utterances.append(current)
+        elif current is None:
+            continue
+        elif kind == "status" and event.get("status") == "transcribing":
+            current["stop"] = event["t"]
+        elif kind == "status" and event.get("status") == "idle":
+            current["done"] = event["t"]
+            current = None
+        elif kind == "recording":
+            current["recording"] = event
+        elif kind == "transcribe":
+            current["transcribe"].append(event)
+    # Incomplete utterances (trace cut off, or nothing recorded) can't be replayed
+    return [u for u in utterances if u["stop"] is not None and u["recording"] and u["recording"].get("frames")]
+
+
+def _use_stub(latency: float, result_format: str) -> None:
+    """Point the transcription backend at the stub, answering after `latency` seconds."""
+    config.transcribe_command = [
+        sys.executable, '-m', 'pink_voice.core.stub_transcriber', '--latency', f"{latency:.6f}", '--jitter', '0',
+    ]
+    config.result_format = result_format
+    reset_transport()
+
+
+def _replay_utterance(index: int, utterance: Dict[str, Any], settings: Dict[str, Any], speed: float,
+                      seed: int) -> Dict[str, Any]:
+    """
+    Replay one utterance.
+
+    Args:
+        index: Utterance number (seeds the synthetic audio)
+        utterance: Grouped trace events
+        settings: Traced session settings
+        speed: Time scale (2 = twice as fast, 0 = no waiting)
+        seed: Random seed
+
+    Returns:
+        Report entry
+    """
+    recording = utterance["recording"]
+    capture_rate = recording.get("capture_rate") or recording["sample_rate"]
+    channels = recording.get("channels") or 1
+    profile = LATENCY_PROFILES.get(recording.get("latency_profile", ""), LATENCY_PROFILES['balanced'])
+    recorder_settings = RecorderSettings(
+        sample_rate=recording["sample_rate"],
+        capture_rate=capture_rate,
+        latency_profile=profile,
+        channels=channels,
+        downmix=settings.get("downmix", "mean"),
+        normalize=settings.get("normalize_audio", False),
+        target_rms_dbfs=settings.get("normalize_target_dbfs", -20.0),
+        highpass_hz=settings.get("highpass_hz", 0.0),
+        noise_reduction_db=settings.get("noise_reduction_db", 0.0),
+    )
+
+    # Traced callbacks, or evenly spaced blocks of the profile's size for traces without them
+    callbacks = recording.get("callbacks") or []
+    if not callbacks:
+        block = max(int(profile.block_seconds * capture_rate), 1)
+        total = int(recording["frames"] * capture_rate / recording["sample_rate"])
+        callbacks = [[utterance["start"] + (i + 1) * block / capture_rate, block] for i in range(total // block)]
+    origin = utterance["start"]
+
+    transcribes = utterance["transcribe"]
+    traced_transcribe = transcribes[0]["seconds"] if transcribes else 0.0
+    result_format = (transcribes[0].get("format") if transcribes else None) or "text"
+    _use_stub(traced_transcribe, result_format)
+
+    voice = _SyntheticVoice(capture_rate, channels, recording.get("input_rms_dbfs") or -30.0, seed + index)
+    blocks: queue.Queue = queue.Queue()
+
+    def feed() -> None:
+        # Stands in for the audio callback: delivers blocks at the traced times
+        started = time.monotonic()
+        for at, frames in callbacks:
+            due = started + (at - origin) / speed if speed > 0 else 0.0
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            blocks.put((voice.block(frames), time.monotonic()))
+        blocks.put(None)
+
+    if settings.get("warmup", True):
+        TranscribeService.prepare()
+
+    capture = CapturePipeline(recorder_settings, capture_rate, channels)
+    threading.Thread(target=feed, daemon=True).start()
+
+    # The pipeline runs on this thread so --profile sees it
+    lag = 0.0
+    while True:
+        item = blocks.get()
+        if item is None:
+            break
+        samples, delivered = item
+        capture.process(samples)
+        lag = max(lag, time.monotonic() - delivered)
+
+    stop_started = time.monotonic()
+    capture.finish()
+    capture.normalize()
+    fd, path = tempfile.mkstemp(prefix='pink-voice-replay-', suffix='.wav')
+    os.close(fd)
+    try:
+        capture.save(path)
+        saved = time.monotonic()
+        try:
+            TranscribeService.transcribe_result(path)
+            ok = True
+        except Exception:
+            ok = False
+        finished = time.monotonic()
+    finally:
+        os.unlink(path)
+
+    times = [at for at, _ in callbacks]
+    gaps = np.diff(times) if len(times) > 1 else np.zeros(1)
+    return {
+        "utterance": index,
+        "audio_seconds": round(recording["frames"] / recording["sample_rate"], 3),
+        "callbacks": len(callbacks),
+        "traced": {
+            "callback_gap_max": round(float(gaps.max()), 4),
+            "xruns": len(recording.get("overflows", [])) + len(recording.get("underflows", [])),
+            "stop_seconds": recording.get("stop_seconds"),
+            "transcribe_seconds": traced_transcribe,
+            "done_seconds": round(utterance["done"] - utterance["stop"], 4) if utterance["done"] else None,
+        },
+        "replay": {
+            "pipeline_lag_max": round(lag, 4),
+            "stop_seconds": round(saved - stop_started, 4),
+            "transcribe_seconds": round(finished - saved, 4),
+            "done_seconds": round(finished - stop_started, 4),
+            "ok": ok,
+        },
+    }
+
+
+def run(argv: List[str]) -> int:
+    """
+    Replay a session trace.
+
+    Args:
+        argv: Command-line arguments
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(prog='pink-voice replay', description='Replay a session trace for profiling')
+    parser.add_argument('trace', help='Trace file (recorded with PINK_VOICE_TRACE)')
+    parser.add_argument('--speed', type=float, default=1.0, help='Time scale (2 = twice as fast, 0 = no waiting)')
+    parser.add_argument('--utterance', type=int, action='append', help='Replay only these utterances (repeatable)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic audio')
+    parser.add_argument('--profile', metavar='FILE', help='Write cProfile stats (pstats format) to this file')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        events = read_trace(args.trace)
+    except OSError as e:
+        print(f"Trace not readable: {e}", file=sys.stderr)
+        return 1
+
+    session = next((event for event in events if event.get("event") == "session"), {})
+    settings = session.get("settings", {})
+    utterances = _utterances(events)
+    if args.utterance:
+        selected = [(i, u) for i, u in enumerate(utterances) if i in args.utterance]
+    else:
+        selected = list(enumerate(utterances))
+    if not selected:
+        print("No complete utterances in the trace", file=sys.stderr)
+        return 1
+
+    config.transport = 'command'
+    config.endpoints = []
+    config.routes = []
+    config.refine_below = 0.0
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    report = [_replay_utterance(i, u, settings, args.speed, args.seed) for i, u in selected]
+
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+
+    if args.json:
+        print(json.dumps({"trace": args.trace, "platform": session.get("platform"), "utterances": report}, indent=2))
+    else:
+        print(f"{'#':>3} {'audio':>7} {'blocks':>6} {'max gap':>8} {'lag':>7} "
+              f"{'stop':>15} {'transcribe':>15} {'done':>15}")
+        print(f"{'':>3} {'':>7} {'':>6} {'traced':>8} {'replay':>7} "
+              f"{'traced/replay':>15} {'traced/replay':>15} {'traced/replay':>15}")
+
+        def pair(traced: Optional[float], replayed: float) -> str:
+            return f"{'-' if traced is None else f'{traced:.3f}'}/{replayed:.3f}"
+
+        for entry in report:
+            traced, replayed = entry["traced"], entry["replay"]
+            print(f"{entry['utterance']:>3} {entry['audio_seconds']:>6.1f}s {entry['callbacks']:>6} "
+                  f"{traced['callback_gap_max']:>7.3f}s {replayed['pipeline_lag_max']:>6.3f}s "
+                  f"{pair(traced['stop_seconds'], replayed['stop_seconds']):>15} "
+                  f"{pair(traced['transcribe_seconds'], replayed['transcribe_seconds']):>15} "
+                  f"{pair(traced['done_seconds'], replayed['done_seconds']):>15}"
+                  f"{'' if replayed['ok'] else '  (transcription failed)'}")
+        if args.profile:
+            print(f"\nProfile written to {args.profile} (python -m pstats {args.profile})")
+    return 0
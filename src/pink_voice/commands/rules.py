@@ -0,0 +1,70 @@
+"""pink-voice rules: try out and benchmark transcript post-processing rules."""
+
+import argparse
+import random
+import string
+import sys
+import time
+from typing import List
+
+from pink_voice.config import config
+from pink_voice.core.postprocess import RuleEngine
+
+
+def run(argv: List[str]) -> int:
+    """
+    Run the rules command.
+
+    Args:
+        argv: Command-line arguments
+
+    Returns:
+        Process exit code
+    """
+    parser = argparse.ArgumentParser(prog='pink-voice rules', description='Apply post-processing rules to text')
+    parser.add_argument('text', nargs='*', help='Text to process (default: stdin)')
+    parser.add_argument('--file', default=config.rules_path, help='Rules file')
+    parser.add_argument('--bench', type=int, metavar='N', help='Benchmark with N generated phrase rules')
+    args = parser.parse_args(argv)
+
+    if args.bench is not None:
+        return _bench(args.bench)
+
+    engine = RuleEngine(args.file)
+    engine.reload_if_changed()
+
+    text = ' '.join(args.text) if args.text else sys.stdin.read()
+    print(engine.apply(text))
+    return 0
+
+
+def _bench(count: int) -> int:
+    """Time compiling and applying a large generated rule set."""
+    rng = random.Random(0)
+
+    def word() -> str:
+        return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+    phrases = [' '.join(word() for _ in range(rng.randint(1, 3))) for _ in range(count)]
+    lines = [f"{phrase} => {phrase.upper()}" for phrase in phrases]
+    lines += [r"re: \s+([,.;:!?]) => \1", r"re: [ \t]*\n[ \t]* => \n"]
+
+    engine = RuleEngine('')
+    engine.load(lines)
+
+    # A long dictation (~300 words) with some phrases mixed in
+    words = [word() for _ in range(300)]
+    for i in range(0, len(words), 10):
+        words[i] = rng.choice(phrases)
+    text = ' '.join(words)
+
+    runs = 200
+    started = time.perf_counter()
+    for _ in range(runs):
+        engine.apply(text)
+    per_call = (time.perf_counter() - started) / runs
+
+    print(f"Rules:   {engine.rule_count}", flush=True)
+    print(f"Compile: {engine.compile_seconds * 1000:.1f}ms", flush=True)
+    print(f"Apply:   {per_call * 1000:.3f}ms per transcript ({len(text)} chars)", flush=True)
+    return 0
@@ -1,13 +1,31 @@
-"""Configuration for Pink Voice."""
+"""
+Configuration for Pink Voice.
 
+Settings come from, in increasing priority: defaults, the TOML config file
+(PINK_VOICE_CONFIG, default ~/.pink-voice/config.toml) and environment
+variables. The file is watched and re-read when it changes; listeners
+registered with config.add_listener() apply the new values.
+"""
+
+import copy
+import multiprocessing
 import os
 import platform
-from dataclasses import dataclass
-from typing import List
+import threading
+import time
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
 
 
 # Singleton configuration
-VERBOSE_MODE = os.getenv('VERBOSE') == '1'
 SINGLETON_IDENTIFIERS = [
     'pink-voice',
     'pink_voice',
@@ -30,11 +48,13 @@ def _detect_platform() -> str:
         return "unknown"
 
 
-def _get_ui_mode() -> str:
-    """Get UI mode based on platform and environment."""
+def _get_ui_mode(configured: str = "") -> str:
+    """Get UI mode based on platform, config file and environment."""
     env_ui = os.getenv('PINK_VOICE_UI', '').lower()
     if env_ui in ('macos', 'headless'):
         return env_ui
+    if configured in ('macos', 'headless'):
+        return configured
 
     detected_platform = _detect_platform()
     if detected_platform == "macos":
@@ -43,8 +63,13 @@ def _get_ui_mode() -> str:
         return "headless"
 
 
-def _get_transcribe_command() -> List[str]:
-    """Get transcribe command based on platform."""
+def _get_transcribe_command(configured: Union[str, List[str], None] = None) -> List[str]:
+    """Get transcribe command from config file or based on platform."""
+    if isinstance(configured, str) and configured.strip():
+        return configured.split()
+    if configured:
+        return list(configured)
+
     detected_platform = _detect_platform()
     if detected_platform == "windows":
         return ['wsl', 'pink-transcriber']
@@ -52,6 +77,100 @@ def _get_transcribe_command() -> List[str]:
         return ['pink-transcriber']
 
 
+def _get_endpoints(configured: Union[str, List[str], None] = None) -> List[str]:
+    """Get transcriber endpoints (comma-separated in PINK_VOICE_ENDPOINTS)."""
+    value = os.getenv('PINK_VOICE_ENDPOINTS') or configured or []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [endpoint.strip() for endpoint in value if endpoint.strip()]
+
+
+def _get_routes(configured: Union[str, List[dict], None] = None) -> List[dict]:
+    """
+    Get transcription routes.
+
+    PINK_VOICE_ROUTES (or a string in the config file) is a compact form:
+    "name:max_seconds:args;..." (e.g. "fast:6:--model base.en;accurate::--model large-v3").
+    """
+    value = os.getenv('PINK_VOICE_ROUTES') or configured or []
+    if not isinstance(value, str):
+        return [dict(route) for route in value]
+
+    routes: List[dict] = []
+    for entry in value.split(';'):
+        name, _, rest = entry.strip().partition(':')
+        max_seconds, _, args = rest.partition(':')
+        if not name.strip():
+            continue
+        route: Dict[str, Any] = {'name': name.strip(), 'args': args.split()}
+        try:
+            if max_seconds.strip():
+                route['max_seconds'] = float(max_seconds)
+        except ValueError:
+            continue
+        routes.append(route)
+    return routes
+
+
+def _get_refine_args(configured: Union[str, List[str], None] = None) -> List[str]:
+    """Get transcriber args for re-transcribing uncertain segments (space-separated in the environment)."""
+    value = os.getenv('PINK_VOICE_REFINE_ARGS') or configured or []
+    if isinstance(value, str):
+        value = value.split()
+    return [str(arg) for arg in value]
+
+
+def _get_result_format(configured: str = "") -> str:
+    """Get the result format: text, jsonl or auto (negotiated with the transcriber)."""
+    value = os.getenv('PINK_VOICE_RESULT_FORMAT', configured).lower()
+    return value if value in ('text', 'jsonl') else 'auto'
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to default."""
+    try:
+        return int(os.getenv(name, ''))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float environment variable, falling back to default."""
+    try:
+        return float(os.getenv(name, ''))
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean environment variable ('1'/'0'), falling back to default."""
+    value = os.getenv(name, '').lower()
+    if not value:
+        return default
+    return value in ('1', 'true', 'yes', 'on')
+
+
+def _get_data_dir(configured: str = "") -> str:
+    """Get directory for local state (archive, queues, sockets)."""
+    path = os.getenv('PINK_VOICE_DATA_DIR') or configured or os.path.join('~', '.pink-voice')
+    return os.path.expanduser(path)
+
+
+def _get_config_path() -> str:
+    """Get config file path."""
+    return os.path.expanduser(os.getenv('PINK_VOICE_CONFIG') or os.path.join(_get_data_dir(), 'config.toml'))
+
+
+def _get_transport(configured: str = "") -> str:
+    """Get transport: relay on Windows (avoids WSL login shell per request), command elsewhere."""
+    env_transport = os.getenv('PINK_VOICE_TRANSPORT', '').lower()
+    if env_transport in ('command', 'relay'):
+        return env_transport
+    if configured in ('command', 'relay'):
+        return configured
+    return 'relay' if _detect_platform() == "windows" else 'command'
+
+
 def windows_path_to_wsl(path: str) -> str:
     """
     Convert Windows path to WSL path.
@@ -75,6 +194,29 @@ def windows_path_to_wsl(path: str) -> str:
     return path
 
 
+@dataclass(frozen=True)
+class LatencyProfile:
+    """Input stream tuning: PortAudio block size/latency and recorder buffer page size."""
+
+    name: str
+    block_seconds: float
+    latency: Union[str, float]  # 'low', 'high' or seconds
+    page_seconds: float
+
+
+LATENCY_PROFILES = {
+    "low-latency": LatencyProfile("low-latency", block_seconds=0.005, latency='low', page_seconds=10),
+    "balanced": LatencyProfile("balanced", block_seconds=0.02, latency='high', page_seconds=30),
+    "power-saver": LatencyProfile("power-saver", block_seconds=0.1, latency=0.2, page_seconds=60),
+}
+
+
+def _get_latency_profile(configured: str = "balanced") -> str:
+    """Get latency profile name from config file or environment."""
+    name = (os.getenv('PINK_VOICE_LATENCY_PROFILE') or configured).lower()
+    return name if name in LATENCY_PROFILES else 'balanced'
+
+
 # Sound file paths
 MACOS_SOUND_PATHS = {
     "start": "/System/Library/Sounds/Ping.aiff",
@@ -97,24 +239,284 @@ class Config:
     platform: str = ""
     ui_mode: str = ""
     transcribe_command: List[str] = None
+    transport: str = ""  # command or relay (default: relay on Windows)
+    relay_port: int = 47821
+    relay_idle_timeout: int = 1800
+    relay_timeout: float = 300.0  # seconds to wait for a relay's transcript
+    transcribe_timeout: float = 300.0  # seconds to wait for a command's or an endpoint's transcript (0 = no limit)
+    endpoints: List[str] = None  # several backends: commands or relay://host:port
+    gateway_token: str = ""  # shared secret of a pink-voice gateway (sent to relay:// endpoints)
+    retries: int = 2
+    retry_backoff: float = 0.2
+    hedge: bool = True
+    hedge_delay: float = 3.0  # until an endpoint's p95 latency is known
+    routes: List[dict] = None  # transcriber args by clip length, first match wins (see core/routing.py)
+    result_format: str = "auto"  # text, jsonl or auto (ask the transcriber, see core/results.py)
+    refine_below: float = 0.0  # re-transcribe segments below this confidence, 0 = off
+    refine_args: List[str] = None  # transcriber args for re-transcription, e.g. a larger model
+
+    # General
+    verbose: bool = False
+    hotkey: str = "ctrl+q"  # modifiers and a key, e.g. "ctrl+shift+space", "f9"
 
     # Service timeouts
     health_check_timeout: int = 2
     service_wait_interval: int = 2
     service_max_attempts: int = 3
+    warmup: bool = True  # ping the transcriber when recording starts
 
     # Audio
     sample_rate: int = 16000
+    capture_rate: int = 0  # 0 = device native rate, resampled to sample_rate
+    latency_profile: str = "balanced"
+    xrun_recovery: bool = False
+    input_device: str = ""  # index or name substring; empty = system default
+    input_channels: int = 1  # 0 = all channels of the device
+    downmix: str = "mean"  # mean or beamform
+    recorder_stall_timeout: float = 0.5
+    idle_timeout: float = 0.0  # seconds before releasing the standby recorder (0 = never)
+
+    # Preprocessing before transcription
+    normalize_audio: bool = False
+    normalize_target_dbfs: float = -20.0
+    highpass_hz: float = 0.0  # 0 = off
+    noise_reduction_db: float = 0.0  # spectral noise gate, 0 = off
 
     # Text processing
     transcription_prefix: str = ""
+    rules_path: str = ""  # default: <data_dir>/rules.txt
+
+    # Local state
+    data_dir: str = ""
+
+    # Recording archive
+    archive_enabled: bool = False
+    archive_retention_days: int = 30
+    archive_max_mb: int = 1024
+
+    # Recordings kept for retry while the transcriber is down
+    queue_enabled: bool = True
+    queue_max_mb: int = 500
+    queue_retry_interval: float = 30.0  # seconds between health checks while jobs wait
+    queue_max_attempts: int = 5  # retries with the service up before a job is given up
+
+    # Local control API
+    control_enabled: bool = False
+    control_port: int = 47822  # Windows only (Unix socket elsewhere)
+
+    # Metrics export (both off by default)
+    metrics_port: int = 0  # Prometheus text endpoint on 127.0.0.1
+    statsd_address: str = ""  # host:port
+
+    # Session trace for `pink-voice replay` ("" = off, see core/trace.py)
+    trace_path: str = ""
 
     def __post_init__(self) -> None:
-        """Initialize configuration from environment."""
+        """Initialize configuration from config file and environment."""
+        self.config_path: str = _get_config_path()
+        self._mtime: Optional[float] = None
+        self._listeners: List[Callable[[Set[str]], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self) -> None:
+        """Reset to defaults, then apply config file and environment."""
+        file_values = self._read_file()
+        for field in fields(self):
+            setattr(self, field.name, file_values.get(field.name, field.default))
+
         self.platform = _detect_platform()
-        self.ui_mode = _get_ui_mode()
-        self.transcribe_command = _get_transcribe_command()
-        self.transcription_prefix = os.getenv('TRANSCRIPTION_PREFIX', '')
+        self.ui_mode = _get_ui_mode(self.ui_mode)
+        self.verbose = _env_bool('VERBOSE', self.verbose)
+        self.hotkey = os.getenv('PINK_VOICE_HOTKEY', self.hotkey).lower()
+        self.transcribe_command = _get_transcribe_command(self.transcribe_command)
+        self.transport = _get_transport(self.transport)
+        self.relay_port = _env_int('PINK_VOICE_RELAY_PORT', self.relay_port)
+        self.relay_idle_timeout = _env_int('PINK_VOICE_RELAY_IDLE_TIMEOUT', self.relay_idle_timeout)
+        self.relay_timeout = _env_float('PINK_VOICE_RELAY_TIMEOUT', self.relay_timeout)
+        self.transcribe_timeout = _env_float('PINK_VOICE_TRANSCRIBE_TIMEOUT', self.transcribe_timeout)
+        self.warmup = _env_bool('PINK_VOICE_WARMUP', self.warmup)
+        self.endpoints = _get_endpoints(self.endpoints)
+        self.gateway_token = os.getenv('PINK_VOICE_GATEWAY_TOKEN', self.gateway_token)
+        self.retries = _env_int('PINK_VOICE_RETRIES', self.retries)
+        self.retry_backoff = _env_float('PINK_VOICE_RETRY_BACKOFF', self.retry_backoff)
+        self.hedge = _env_bool('PINK_VOICE_HEDGE', self.hedge)
+        self.hedge_delay = _env_float('PINK_VOICE_HEDGE_DELAY', self.hedge_delay)
+        self.routes = _get_routes(self.routes)
+        self.result_format = _get_result_format(self.result_format)
+        self.refine_below = _env_float('PINK_VOICE_REFINE_BELOW', self.refine_below)
+        self.refine_args = _get_refine_args(self.refine_args)
+        self.transcription_prefix = os.getenv('TRANSCRIPTION_PREFIX', self.transcription_prefix)
+        self.sample_rate = _env_int('PINK_VOICE_SAMPLE_RATE', self.sample_rate)
+        self.capture_rate = _env_int('PINK_VOICE_CAPTURE_RATE', self.capture_rate)
+        self.latency_profile = _get_latency_profile(self.latency_profile)
+        self.xrun_recovery = _env_bool('PINK_VOICE_XRUN_RECOVERY', self.xrun_recovery)
+        self.input_device = os.getenv('PINK_VOICE_INPUT_DEVICE', self.input_device)
+        self.input_channels = _env_int('PINK_VOICE_INPUT_CHANNELS', self.input_channels)
+        self.normalize_audio = _env_bool('PINK_VOICE_NORMALIZE', self.normalize_audio)
+        self.normalize_target_dbfs = _env_float('PINK_VOICE_NORMALIZE_TARGET_DBFS', self.normalize_target_dbfs)
+        self.highpass_hz = _env_float('PINK_VOICE_HIGHPASS_HZ', self.highpass_hz)
+        self.noise_reduction_db = _env_float('PINK_VOICE_NOISE_REDUCTION_DB', self.noise_reduction_db)
+        self.recorder_stall_timeout = _env_float('PINK_VOICE_STALL_TIMEOUT', self.recorder_stall_timeout)
+        self.idle_timeout = _env_float('PINK_VOICE_IDLE_TIMEOUT', self.idle_timeout)
+        self.downmix = 'beamform' if os.getenv('PINK_VOICE_DOWNMIX', self.downmix).lower() == 'beamform' else 'mean'
+        self.data_dir = _get_data_dir(self.data_dir)
+        self.rules_path = os.path.expanduser(
+            os.getenv('PINK_VOICE_RULES') or self.rules_path or os.path.join(self.data_dir, 'rules.txt')
+        )
+        self.archive_enabled = _env_bool('PINK_VOICE_ARCHIVE', self.archive_enabled)
+        self.archive_retention_days = _env_int('PINK_VOICE_ARCHIVE_RETENTION_DAYS', self.archive_retention_days)
+        self.archive_max_mb = _env_int('PINK_VOICE_ARCHIVE_MAX_MB', self.archive_max_mb)
+        self.queue_enabled = _env_bool('PINK_VOICE_QUEUE', self.queue_enabled)
+        self.queue_max_mb = _env_int('PINK_VOICE_QUEUE_MAX_MB', self.queue_max_mb)
+        self.queue_retry_interval = _env_float('PINK_VOICE_QUEUE_RETRY_INTERVAL', self.queue_retry_interval)
+        self.queue_max_attempts = _env_int('PINK_VOICE_QUEUE_MAX_ATTEMPTS', self.queue_max_attempts)
+        self.control_enabled = _env_bool('PINK_VOICE_CONTROL', self.control_enabled)
+        self.control_port = _env_int('PINK_VOICE_CONTROL_PORT', self.control_port)
+        self.metrics_port = _env_int('PINK_VOICE_METRICS_PORT', self.metrics_port)
+        self.statsd_address = os.getenv('PINK_VOICE_STATSD', self.statsd_address)
+        self.trace_path = os.path.expanduser(os.getenv('PINK_VOICE_TRACE', self.trace_path))
+
+    def _read_file(self) -> Dict[str, Any]:
+        """
+        Read and type-check the config file.
+
+        Tables are only for grouping: [audio] sample_rate = 16000 is the same
+        as a top-level sample_rate. Unknown keys and values of the wrong type
+        are reported and ignored.
+
+        Returns:
+            Field values from the file (empty if there is no file)
+        """
+        try:
+            self._mtime = os.stat(self.config_path).st_mtime
+        except OSError:
+            self._mtime = None
+            return {}
+
+        # Spawned recorder processes re-read the file; only the main process reports problems
+        report = multiprocessing.parent_process() is None
+
+        if tomllib is None:
+            if report:
+                print("⚠️  Config file needs Python 3.11+ or the 'tomli' package", flush=True)
+            return {}
+
+        try:
+            with open(self.config_path, 'rb') as f:
+                data = tomllib.load(f)
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            if report:
+                print(f"⚠️  Config file not loaded: {e}", flush=True)
+            return {}
+
+        flat: Dict[str, Any] = {}
+        for key, value in data.items():
+            if isinstance(value, dict):
+                flat.update(value)
+            else:
+                flat[key] = value
+
+        types = {field.name: field.type for field in fields(self)}
+        values: Dict[str, Any] = {}
+        for key, value in flat.items():
+            expected = types.get(key)
+            if expected is None:
+                if report:
+                    print(f"⚠️  Config: unknown setting '{key}'", flush=True)
+                continue
+
+            if expected is float and isinstance(value, int) and not isinstance(value, bool):
+                value = float(value)
+
+            if expected == List[str]:
+                valid = isinstance(value, (str, list))
+            elif expected == List[dict]:
+                # Array of tables, or the compact string form
+                valid = isinstance(value, str) or (
+                    isinstance(value, list) and all(isinstance(item, dict) for item in value))
+            else:
+                valid = type(value) is expected
+            if not valid:
+                if report:
+                    print(f"⚠️  Config: '{key}' has the wrong type ({type(value).__name__})", flush=True)
+                continue
+
+            values[key] = value
+
+        return values
+
+    def add_listener(self, listener: Callable[[Set[str]], None]) -> None:
+        """
+        Register a callback for configuration changes.
+
+        Args:
+            listener: Called with the names of changed settings (watcher thread)
+        """
+        self._listeners.append(listener)
+
+    def reload(self) -> Set[str]:
+        """
+        Re-read config file and environment.
+
+        Returns:
+            Names of settings that changed
+        """
+        fresh = copy.copy(self)
+        fresh._load()
+        self._mtime = fresh._mtime
+
+        changed: Set[str] = set()
+        for field in fields(self):
+            value = getattr(fresh, field.name)
+            if value != getattr(self, field.name):
+                setattr(self, field.name, value)
+                changed.add(field.name)
+
+        if changed:
+            if self.verbose:
+                print(f"Config reloaded: {', '.join(sorted(changed))}", flush=True)
+            for listener in list(self._listeners):
+                try:
+                    listener(changed)
+                except Exception as e:
+                    print(f"⚠️  Applying config change failed: {e}", flush=True)
+
+        return changed
+
+    def reload_if_changed(self) -> Set[str]:
+        """
+        Reload if the config file was modified, created or removed.
+
+        Returns:
+            Names of settings that changed
+        """
+        try:
+            mtime: Optional[float] = os.stat(self.config_path).st_mtime
+        except OSError:
+            mtime = None
+
+        if mtime == self._mtime:
+            return set()
+        return self.reload()
+
+    def watch(self, interval: float = 1.0) -> None:
+        """
+        Watch the config file for changes in a background thread.
+
+        Args:
+            interval: Seconds between checks
+        """
+        if self._watcher:
+            return
+
+        def run() -> None:
+            while True:
+                time.sleep(interval)
+                self.reload_if_changed()
+
+        self._watcher = threading.Thread(target=run, daemon=True)
+        self._watcher.start()
 
     def convert_path_for_transcribe(self, path: str) -> str:
         """
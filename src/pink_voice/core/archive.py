@@ -0,0 +1,299 @@
+"""
+Local archive of past recordings and their transcripts.
+
+Audio is appended to memory-mapped segment files, transcripts go to an
+SQLite table with a full-text index. Old entries are evicted by age and
+total size, one segment at a time; segments are sized from the size cap
+so that even a small cap is enforced.
+"""
+
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+# Segments per size cap: the active segment is never evicted, so it must be a small part of the cap
+SEGMENTS_PER_CAP = 4
+
+
+@dataclass
+class ArchiveEntry:
+    """One archived recording."""
+
+    id: int
+    created_at: float
+    segment: int
+    offset: int
+    length: int
+    sample_rate: int
+    channels: int
+    sample_width: int
+    text: str
+
+    @property
+    def duration(self) -> float:
+        """Audio duration in seconds."""
+        bytes_per_second = self.sample_rate * self.channels * self.sample_width
+        return self.length / bytes_per_second if bytes_per_second else 0.0
+
+
+class RecordingArchive:
+    """Append-only recording archive with indexed transcript search."""
+
+    def __init__(self, root: str, retention_days: int = 30, max_bytes: int = 1024 * 1024 * 1024) -> None:
+        """
+        Open (or create) an archive.
+
+        Args:
+            root: Archive directory
+            retention_days: Entries older than this are evicted (0 = keep forever)
+            max_bytes: Maximum total size of audio segments on disk
+        """
+        self.root: Path = Path(root)
+        self.segments_dir: Path = self.root / "segments"
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        self.retention_days: int = retention_days
+        self.max_bytes: int = max_bytes
+        self.segment_bytes: int = max(min(SEGMENT_MAX_BYTES, max_bytes // SEGMENTS_PER_CAP), 1)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "archive.db"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS recordings ("
+            "id INTEGER PRIMARY KEY, created_at REAL NOT NULL, segment INTEGER NOT NULL, "
+            "offset INTEGER NOT NULL, length INTEGER NOT NULL, sample_rate INTEGER NOT NULL, "
+            "channels INTEGER NOT NULL, sample_width INTEGER NOT NULL, text TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS recordings_created ON recordings(created_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS recordings_segment ON recordings(segment)")
+
+        # FTS5 is compiled into nearly every SQLite build; fall back to LIKE if not
+        try:
+            self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS transcripts USING fts5(text)")
+            self._fts: bool = True
+        except sqlite3.OperationalError:
+            self._fts = False
+        self._db.commit()
+
+    def add(self, audio_path: str, text: str) -> int:
+        """
+        Archive a WAV recording and its transcript.
+
+        Args:
+            audio_path: Path to WAV file
+            text: Transcribed text
+
+        Returns:
+            ID of the new entry
+        """
+        with wave.open(audio_path, 'rb') as wav:
+            sample_rate = wav.getframerate()
+            channels = wav.getnchannels()
+            sample_width = wav.getsampwidth()
+            pcm = wav.readframes(wav.getnframes())
+
+        with self._lock:
+            segment = self._active_segment(len(pcm))
+            with open(self._segment_path(segment), 'ab') as f:
+                offset = f.tell()
+                f.write(pcm)
+
+            cursor = self._db.execute(
+                "INSERT INTO recordings (created_at, segment, offset, length, sample_rate, channels, sample_width, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), segment, offset, len(pcm), sample_rate, channels, sample_width, text)
+            )
+            entry_id = cursor.lastrowid
+            if self._fts:
+                self._db.execute("INSERT INTO transcripts (rowid, text) VALUES (?, ?)", (entry_id, text))
+            self._db.commit()
+
+            self._evict()
+
+        return entry_id
+
+    def update_text(self, entry_id: int, text: str) -> None:
+        """
+        Replace the transcript of an entry.
+
+        Args:
+            entry_id: Entry ID
+            text: New transcript
+        """
+        with self._lock:
+            self._db.execute("UPDATE recordings SET text = ? WHERE id = ?", (text, entry_id))
+            if self._fts:
+                self._db.execute("DELETE FROM transcripts WHERE rowid = ?", (entry_id,))
+                self._db.execute("INSERT INTO transcripts (rowid, text) VALUES (?, ?)", (entry_id, text))
+            self._db.commit()
+
+    def search(self, query: str = "", limit: int = 20) -> List[ArchiveEntry]:
+        """
+        Search transcripts, newest first.
+
+        Args:
+            query: Words to search for (prefix match); empty lists recent entries
+            limit: Maximum number of entries
+
+        Returns:
+            Matching entries
+        """
+        columns = "r.id, r.created_at, r.segment, r.offset, r.length, r.sample_rate, r.channels, r.sample_width, r.text"
+        words = query.split()
+
+        with self._lock:
+            if not words:
+                rows = self._db.execute(
+                    f"SELECT {columns} FROM recordings r ORDER BY r.id DESC LIMIT ?", (limit,)
+                ).fetchall()
+            elif self._fts:
+                match = " ".join('"{}"*'.format(word.replace('"', '""')) for word in words)
+                rows = self._db.execute(
+                    f"SELECT {columns} FROM transcripts t JOIN recordings r ON r.id = t.rowid "
+                    f"WHERE transcripts MATCH ? ORDER BY r.id DESC LIMIT ?", (match, limit)
+                ).fetchall()
+            else:
+                where = " AND ".join("r.text LIKE ?" for _ in words)
+                rows = self._db.execute(
+                    f"SELECT {columns} FROM recordings r WHERE {where} ORDER BY r.id DESC LIMIT ?",
+                    [f"%{word}%" for word in words] + [limit]
+                ).fetchall()
+
+        return [ArchiveEntry(*row) for row in rows]
+
+    def get(self, entry_id: int) -> Optional[ArchiveEntry]:
+        """
+        Get a single entry.
+
+        Args:
+            entry_id: Entry ID
+
+        Returns:
+            Entry, or None if it does not exist (or was evicted)
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, created_at, segment, offset, length, sample_rate, channels, sample_width, text "
+                "FROM recordings WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return ArchiveEntry(*row) if row else None
+
+    def read_pcm(self, entry: ArchiveEntry) -> bytes:
+        """
+        Read raw PCM of an entry from its memory-mapped segment.
+
+        Args:
+            entry: Archive entry
+
+        Returns:
+            PCM bytes
+        """
+        with open(self._segment_path(entry.segment), 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as segment:
+                return segment[entry.offset:entry.offset + entry.length]
+
+    def export_wav(self, entry: ArchiveEntry, path: str) -> None:
+        """
+        Write an entry back out as a WAV file.
+
+        Args:
+            entry: Archive entry
+            path: Destination path
+        """
+        pcm = self.read_pcm(entry)
+        with wave.open(path, 'wb') as wav:
+            wav.setnchannels(entry.channels)
+            wav.setsampwidth(entry.sample_width)
+            wav.setframerate(entry.sample_rate)
+            wav.writeframes(pcm)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.segments_dir / f"{segment:06d}.pcm"
+
+    def _segment_numbers(self) -> List[int]:
+        return sorted(int(p.stem) for p in self.segments_dir.glob("*.pcm") if p.stem.isdigit())
+
+    def _active_segment(self, incoming: int) -> int:
+        """Pick the segment to append to, rolling over when the current one is full."""
+        segments = self._segment_numbers()
+        if not segments:
+            return 1
+        current = segments[-1]
+        size = self._segment_path(current).stat().st_size
+        if size and size + incoming > self.segment_bytes:
+            return current + 1
+        return current
+
+    def _evict(self) -> None:
+        """Drop entries past retention, then oldest segments until under the size cap."""
+        if self.retention_days > 0:
+            cutoff = time.time() - self.retention_days * 86400
+            expired = [row[0] for row in self._db.execute(
+                "SELECT id FROM recordings WHERE created_at < ?", (cutoff,)
+            )]
+            self._delete_entries(expired)
+
+        segments = self._segment_numbers()
+        sizes = {s: self._segment_path(s).stat().st_size for s in segments}
+        total = sum(sizes.values())
+
+        live = {row[0] for row in self._db.execute("SELECT DISTINCT segment FROM recordings")}
+        dropped = [s for s in segments if s not in live]
+
+        # Oldest segments go first; the active one is never dropped for size
+        for segment in segments[:-1]:
+            if total - sum(sizes[s] for s in dropped) <= self.max_bytes:
+                break
+            if segment not in dropped:
+                ids = [row[0] for row in self._db.execute(
+                    "SELECT id FROM recordings WHERE segment = ?", (segment,)
+                )]
+                self._delete_entries(ids)
+                dropped.append(segment)
+
+        self._db.commit()
+
+        for segment in dropped:
+            try:
+                self._segment_path(segment).unlink()
+            except OSError:
+                pass
+
+    def _delete_entries(self, ids: List[int]) -> None:
+        for entry_id in ids:
+            self._db.execute("DELETE FROM recordings WHERE id = ?", (entry_id,))
+            if self._fts:
+                self._db.execute("DELETE FROM transcripts WHERE rowid = ?", (entry_id,))
+
+
+def open_archive() -> Optional[RecordingArchive]:
+    """
+    Open the archive configured in config.
+
+    Returns:
+        Archive, or None if archiving is disabled
+    """
+    from pink_voice.config import config
+
+    if not config.archive_enabled:
+        return None
+
+    return RecordingArchive(
+        os.path.join(config.data_dir, "archive"),
+        retention_days=config.archive_retention_days,
+        max_bytes=config.archive_max_mb * 1024 * 1024
+    )
@@ -0,0 +1,339 @@
+"""
+On-demand diagnostics for the running instance.
+
+Thread stacks, a sampling profile or a tracemalloc snapshot can be taken
+from the main process and the recorder worker while they run, without a
+restart or VERBOSE=1:
+
+    kill -USR1 <pid>     # thread stacks (plus a memory snapshot while memory tracing is on)
+    kill -USR2 <pid>     # sampling profiler on for 30s, or off if it is running
+    pink-voice ctl diag stacks|profile|profile-stop|memory|memory-stop [--seconds N]
+
+Signals go to the process they are sent to; the main process passes
+them on to the recorder worker, as does the control command (the only
+way on Windows, which has no SIGUSR1/SIGUSR2). Files are written to
+<data dir>/diagnostics, named by kind, process and PID.
+
+Nothing runs until asked: the handlers only start a thread, the profiler
+samples only while it is on, and memory tracing starts with the first
+`memory` request and ends with `memory-stop`.
+"""
+
+import collections
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pink_voice.config import config
+
+ACTIONS = ('stacks', 'profile', 'profile-stop', 'memory', 'memory-stop')
+
+DEFAULT_PROFILE_SECONDS = 30.0
+
+# 200 samples per second: enough to see where a 100ms wait goes, cheap enough to leave on for a while
+SAMPLE_INTERVAL = 0.005
+
+# Frames kept per allocation while memory tracing is on
+MEMORY_FRAMES = 10
+
+# Lines in the memory report tables
+MEMORY_TOP = 25
+
+# Process role in file names and messages ('main' or 'recorder')
+_role: str = 'main'
+
+
+def _output_path(kind: str, suffix: str) -> str:
+    """New file in the diagnostics directory, e.g. stacks-main-1234-20261019-101500.txt (-2, -3... within a second)."""
+    directory = os.path.join(config.data_dir, 'diagnostics')
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{kind}-{_role}-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}")
+    path, number = base + suffix, 1
+    while os.path.exists(path):
+        number += 1
+        path = f"{base}-{number}{suffix}"
+    return path
+
+
+def _frames(frame) -> List[str]:
+    """Stack of a frame as 'function (file:line)', outermost first."""
+    stack: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def dump_stacks() -> str:
+    """
+    Write the stacks of all threads.
+
+    Threads with identical stacks are listed once with a count, so a
+    pile-up (e.g. hotkey threads all waiting on one lock) shows as a
+    single entry at the top.
+
+    Returns:
+        Path of the written file
+    """
+    own = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    groups: Dict[Tuple[str, ...], List[str]] = collections.defaultdict(list)
+    for ident, frame in sys._current_frames().items():
+        if ident != own:
+            groups[tuple(_frames(frame))].append(names.get(ident, f"thread {ident}"))
+
+    path = _output_path('stacks', '.txt')
+    with open(path, 'w', encoding='utf-8') as f:
+        total = sum(len(threads) for threads in groups.values())
+        f.write(f"# {total} threads in {_role} (PID {os.getpid()}) at {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        for stack, threads in sorted(groups.items(), key=lambda item: -len(item[1])):
+            f.write(f"\n## {len(threads)} x {', '.join(sorted(threads))}\n")
+            for line in stack:
+                f.write(f"    {line}\n")
+    return path
+
+
+class SamplingProfiler:
+    """Samples all thread stacks at a fixed interval for a limited time."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        """
+        Initialize a profiler that is off until started.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval: float = interval
+        self.last_path: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop: threading.Event = threading.Event()
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """True while sampling."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float = DEFAULT_PROFILE_SECONDS) -> bool:
+        """
+        Start sampling.
+
+        Args:
+            seconds: Stop after this long
+
+        Returns:
+            False if the profiler is already running
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(seconds, self._stop),
+                                            name='pink-voice-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> Optional[str]:
+        """
+        Stop sampling and wait for the profile to be written.
+
+        Returns:
+            Path of the profile, or None if the profiler wasn't running
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return None
+            self._stop.set()
+        thread.join()
+        return self.last_path
+
+    def _run(self, seconds: float, stop: threading.Event) -> None:
+        own = threading.get_ident()
+        counts: collections.Counter = collections.Counter()
+        samples = 0
+        started = time.monotonic()
+        deadline = started + seconds
+
+        while not stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    counts[(names.get(ident, f"thread {ident}"), *_frames(frame))] += 1
+            samples += 1
+
+        # Folded stacks: one "thread;outer;...;inner count" line per stack (flamegraph.pl, speedscope)
+        path = _output_path('profile', '.folded')
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in counts.most_common():
+                f.write(f"{';'.join(stack)} {count}\n")
+        self.last_path = path
+
+        print(f"🩺 [{_role}] Profile of {time.monotonic() - started:.1f}s ({samples} samples) written to {path}",
+              flush=True)
+        # Innermost frames across threads, as the average number of threads found there
+        leaves: collections.Counter = collections.Counter()
+        for stack, count in counts.items():
+            leaves[stack[-1]] += count
+        for leaf, count in leaves.most_common(5):
+            print(f"   {count / max(samples, 1):5.1f} threads  {leaf}", flush=True)
+
+
+profiler = SamplingProfiler()
+
+# Snapshot the next one is compared against
+_last_snapshot: Optional[str] = None
+
+
+def memory_snapshot() -> Optional[str]:
+    """
+    Write a tracemalloc snapshot, starting memory tracing on the first call.
+
+    The snapshot is written as-is (tracemalloc.Snapshot.load) and as a
+    report of the top allocation sites and the growth since the previous
+    snapshot.
+
+    Returns:
+        Path of the report, or None if tracing was only just started
+    """
+    global _last_snapshot
+    import tracemalloc
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(MEMORY_FRAMES)
+        _last_snapshot = None
+        return None
+
+    snapshot = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+    path = _output_path('memory', '.tracemalloc')
+    snapshot.dump(path)
+
+    report = os.path.splitext(path)[0] + '.txt'
+    current, peak = tracemalloc.get_traced_memory()
+    with open(report, 'w', encoding='utf-8') as f:
+        f.write(f"# {_role} (PID {os.getpid()}): {current / 1e6:.1f} MB traced, peak {peak / 1e6:.1f} MB\n")
+        f.write(f"\n## Top {MEMORY_TOP} allocation sites\n")
+        for stat in snapshot.statistics('lineno')[:MEMORY_TOP]:
+            f.write(f"    {stat}\n")
+        if _last_snapshot and os.path.exists(_last_snapshot):
+            f.write(f"\n## Growth since {os.path.basename(_last_snapshot)}\n")
+            previous = tracemalloc.Snapshot.load(_last_snapshot)
+            for stat in snapshot.compare_to(previous, 'lineno')[:MEMORY_TOP]:
+                f.write(f"    {stat}\n")
+
+    _last_snapshot = path
+    return report
+
+
+def stop_memory() -> bool:
+    """
+    Stop memory tracing (and its overhead).
+
+    Returns:
+        False if memory tracing wasn't on
+    """
+    global _last_snapshot
+    import tracemalloc
+
+    if not tracemalloc.is_tracing():
+        return False
+    tracemalloc.stop()
+    _last_snapshot = None
+    return True
+
+
+def run_action(action: str, seconds: Optional[float] = None) -> dict:
+    """
+    Run a diagnostics action in this process.
+
+    Args:
+        action: One of ACTIONS
+        seconds: Profile duration for 'profile' (default DEFAULT_PROFILE_SECONDS)
+
+    Returns:
+        {"file": path or None, "message": str}
+
+    Raises:
+        ValueError: If the action is unknown
+    """
+    file: Optional[str] = None
+
+    if action == 'stacks':
+        file = dump_stacks()
+        message = f"Thread stacks written to {file}"
+    elif action == 'profile':
+        seconds = seconds or DEFAULT_PROFILE_SECONDS
+        if profiler.start(seconds):
+            message = f"Profiling for {seconds:g}s"
+        else:
+            message = "Profiler already running"
+    elif action == 'profile-stop':
+        file = profiler.stop()
+        message = f"Profile written to {file}" if file else "Profiler not running"
+    elif action == 'memory':
+        file = memory_snapshot()
+        message = f"Memory report written to {file}" if file else "Memory tracing started, ask again for a snapshot"
+    elif action == 'memory-stop':
+        message = "Memory tracing stopped" if stop_memory() else "Memory tracing not running"
+    else:
+        raise ValueError(f"Unknown diagnostics action: {action}")
+
+    print(f"🩺 [{_role}] {message}", flush=True)
+    return {"file": file, "message": message}
+
+
+def request(action: str, seconds: Optional[float] = None) -> None:
+    """
+    Run an action on a background thread (from signal handlers and command loops).
+
+    Args:
+        action: One of ACTIONS
+        seconds: Profile duration for 'profile'
+    """
+    def work() -> None:
+        try:
+            run_action(action, seconds)
+        except Exception as e:
+            print(f"⚠️  [{_role}] Diagnostics '{action}' failed: {e}", flush=True)
+
+    threading.Thread(target=work, name='pink-voice-diagnostics', daemon=True).start()
+
+
+def install_signal_handlers(role: str, forward: Optional[Callable[[str, Optional[float]], None]] = None) -> None:
+    """
+    React to SIGUSR1 (stacks, plus a memory snapshot while tracing) and SIGUSR2 (toggle profiler).
+
+    No-op on platforms without these signals (Windows) and off the main thread.
+
+    Args:
+        role: Process role used in file names ('main' or 'recorder')
+        forward: Passes each action on to another process (the recorder worker)
+    """
+    global _role
+    _role = role
+
+    if not hasattr(signal, 'SIGUSR1') or threading.current_thread() is not threading.main_thread():
+        return
+
+    def dispatch(action: str) -> None:
+        # Handlers only start threads: queue puts or file writes here could deadlock the interrupted code
+        request(action)
+        if forward is not None:
+            threading.Thread(target=forward, args=(action, None), daemon=True).start()
+
+    def on_usr1(sig: int, frame) -> None:
+        import tracemalloc
+        dispatch('stacks')
+        if tracemalloc.is_tracing():
+            dispatch('memory')
+
+    def on_usr2(sig: int, frame) -> None:
+        dispatch('profile-stop' if profiler.running else 'profile')
+
+    signal.signal(signal.SIGUSR1, on_usr1)
+    signal.signal(signal.SIGUSR2, on_usr2)
@@ -0,0 +1,598 @@
+"""
+Audio processing stages for the recorder pipeline.
+
+Every stage is fed block by block while recording, so the work is done
+by the time the user stops talking.
+"""
+
+import math
+import time
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def _round_up(value: int, multiple: int) -> int:
+    return -(-value // multiple) * multiple
+
+
+@lru_cache(maxsize=8)
+def _polyphase_filter(up: int, down: int) -> Tuple[np.ndarray, int]:
+    """
+    Anti-aliasing FIR filter split into `up` phases.
+
+    Same design as scipy.signal.resample_poly's default: windowed sinc with
+    cutoff at the lower Nyquist rate, 10 zero crossings per side, Kaiser
+    window (beta 5), unity DC gain per phase.
+
+    Returns:
+        (phases, skip): time-reversed taps as an (up, taps_per_phase) array,
+        and the filter delay in output samples
+    """
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    m = np.arange(-half_len, half_len + 1, dtype=np.float64)
+    h = np.sinc(m / max_rate) / max_rate * np.kaiser(2 * half_len + 1, 5.0)
+    h *= up / h.sum()
+
+    # Leading zeros make the filter delay a whole number of output samples
+    pre_pad = down - half_len % down
+    h = np.concatenate((np.zeros(pre_pad), h))
+    phases = np.zeros((up, -(-len(h) // up)))
+    for phase in range(up):
+        taps = h[phase::up]
+        phases[phase, :len(taps)] = taps
+    return phases[:, ::-1].copy(), (half_len + pre_pad) // down
+
+
+def resample_poly(x: np.ndarray, up: int, down: int) -> np.ndarray:
+    """
+    Resample by up/down with a polyphase FIR filter (zero padding at the ends).
+
+    Matches scipy.signal.resample_poly with its default window, so scipy
+    isn't needed at runtime.
+
+    Args:
+        x: Samples
+        up: Upsampling factor
+        down: Downsampling factor
+
+    Returns:
+        float64 samples, ceil(len(x) * up / down) of them
+    """
+    g = math.gcd(up, down)
+    up, down = up // g, down // g
+    x = np.asarray(x, dtype=np.float64)
+    if up == down:
+        return x.copy()
+
+    phases, skip = _polyphase_filter(up, down)
+    taps = phases.shape[1]
+    n_out = -(-len(x) * up // down)
+
+    # Output sample k sits at upsampled position t = (k + skip) * down: it is the
+    # dot product of phase t % up with the `taps` inputs ending at t // up.
+    # Every up-th output uses the same phase and an input window `down` further on,
+    # so each phase is one matrix-vector product over a strided view.
+    last = (skip + n_out - 1) * down // up
+    padded = np.concatenate((np.zeros(taps - 1), x, np.zeros(max(last - len(x) + 1, 0))))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, taps)
+
+    out = np.empty(n_out)
+    for first in range(min(up, n_out)):
+        t = (skip + first) * down
+        count = len(range(first, n_out, up))
+        out[first::up] = windows[t // up::down][:count] @ phases[t % up]
+    return out
+
+
+class StreamingResampler:
+    """
+    Polyphase resampler for a stream of int16 blocks.
+
+    Input is resampled in fixed chunks with enough context on both sides
+    that the output is identical to resampling the whole recording at once
+    with resample_poly.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, chunk_seconds: float = 0.25) -> None:
+        """
+        Initialize resampler.
+
+        Args:
+            src_rate: Capture sample rate in Hz
+            dst_rate: Target sample rate in Hz
+            chunk_seconds: Amount of input resampled per step
+        """
+        self.src_rate: int = src_rate
+        self.dst_rate: int = dst_rate
+
+        g = math.gcd(src_rate, dst_rate)
+        self.up: int = dst_rate // g
+        self.down: int = src_rate // g
+
+        # resample_poly's filter spans 10 zero crossings per side at the higher rate.
+        # Chunk boundaries must fall on multiples of `down` so output samples line up.
+        half_len = 10 * max(self.up, self.down)
+        self.context: int = _round_up(half_len // self.up + 1, self.down)
+        self.chunk: int = _round_up(max(int(src_rate * chunk_seconds), 1), self.down)
+
+        self._pending: np.ndarray = np.zeros(0, dtype=np.float32)
+        self._left: int = 0
+
+        # Conversion cost, reported with the recording
+        self.seconds: float = 0.0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Feed a block of mono samples.
+
+        Args:
+            block: int16 samples at src_rate
+
+        Returns:
+            int16 samples at dst_rate (may be empty)
+        """
+        started = time.perf_counter()
+
+        self._pending = np.concatenate((self._pending, block.astype(np.float32, copy=False)))
+        out = []
+
+        while len(self._pending) - self._left >= self.chunk + self.context:
+            segment = self._pending[:self._left + self.chunk + self.context]
+            start = self._left * self.up // self.down
+            out.append(resample_poly(segment, self.up, self.down)[start:start + self.chunk * self.up // self.down])
+
+            self._pending = self._pending[self._left + self.chunk - self.context:]
+            self._left = self.context
+
+        result = self._to_int16(np.concatenate(out)) if out else np.zeros(0, dtype=np.int16)
+        self.seconds += time.perf_counter() - started
+        return result
+
+    def flush(self) -> np.ndarray:
+        """
+        Resample whatever input is left.
+
+        Returns:
+            Remaining int16 samples at dst_rate
+        """
+        started = time.perf_counter()
+
+        result = np.zeros(0, dtype=np.int16)
+        if len(self._pending) > self._left:
+            start = self._left * self.up // self.down
+            result = self._to_int16(resample_poly(self._pending, self.up, self.down)[start:])
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._left = 0
+        self.seconds += time.perf_counter() - started
+        return result
+
+    @staticmethod
+    def _to_int16(samples: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+
+class Downmixer:
+    """
+    Reduces multi-channel int16 blocks to one channel.
+
+    Modes:
+        mean: plain average of all channels
+        beamform: delay-and-sum; per-channel delays are estimated once with
+            GCC-PHAT from the first estimate_seconds of audio (plain average
+            is used until then)
+    """
+
+    def __init__(self, channels: int, mode: str = "mean", sample_rate: int = 16000,
+                 max_delay_seconds: float = 0.001, estimate_seconds: float = 0.5) -> None:
+        """
+        Initialize downmixer.
+
+        Args:
+            channels: Number of input channels
+            mode: "mean" or "beamform"
+            sample_rate: Input sample rate in Hz
+            max_delay_seconds: Largest inter-microphone delay considered
+            estimate_seconds: Amount of audio used to estimate delays
+        """
+        self.channels: int = channels
+        self.mode: str = mode
+        self.max_lag: int = max(int(max_delay_seconds * sample_rate), 1)
+        self.delays: Optional[np.ndarray] = None
+        self._shifts: np.ndarray = np.zeros(channels, dtype=int)
+
+        self._estimate_frames: int = int(estimate_seconds * sample_rate)
+        self._training: list[np.ndarray] = []
+        self._training_frames: int = 0
+        self._history: np.ndarray = np.zeros((self.max_lag, channels), dtype=np.int16)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Downmix a block.
+
+        Args:
+            block: int16 array of shape (frames, channels)
+
+        Returns:
+            int16 array of shape (frames,)
+        """
+        if self.channels == 1:
+            return block[:, 0]
+
+        if self.mode == "beamform":
+            if self.delays is None:
+                self._train(block)
+            extended = np.concatenate((self._history, block))
+            self._history = extended[-self.max_lag:]
+            if self.delays is not None:
+                # Delay every channel so it lines up with the latest-arriving one
+                frames = len(block)
+                block = np.stack(
+                    [extended[self.max_lag - s:self.max_lag - s + frames, c] for c, s in enumerate(self._shifts)],
+                    axis=1
+                )
+
+        return (block.sum(axis=1, dtype=np.int32) // self.channels).astype(np.int16)
+
+    def _train(self, block: np.ndarray) -> None:
+        self._training.append(block)
+        self._training_frames += len(block)
+        if self._training_frames < self._estimate_frames:
+            return
+
+        audio = np.concatenate(self._training).astype(np.float32)
+        self._training = []
+
+        # GCC-PHAT of every channel against channel 0
+        n = 1 << int(np.ceil(np.log2(2 * len(audio))))
+        spectra = np.fft.rfft(audio, n=n, axis=0)
+        cross = spectra[:, :1] * np.conj(spectra)
+        cross /= np.abs(cross) + 1e-9
+        corr = np.fft.irfft(cross, n=n, axis=0)
+        window = np.concatenate((corr[-self.max_lag:], corr[:self.max_lag + 1]))
+        lags = np.argmax(window, axis=0) - self.max_lag
+
+        # lag > 0: channel 0 arrives later than this channel
+        arrival = -lags
+        self.delays = arrival - arrival.min()
+        self._shifts = self.delays.max() - self.delays
+
+
+class HighPassFilter:
+    """
+    First-order high-pass filter for a stream of int16 blocks.
+
+    The recursion is evaluated in closed form over short sub-blocks, so it
+    runs vectorized instead of sample by sample.
+    """
+
+    SUB_BLOCK = 256
+
+    def __init__(self, sample_rate: int, cutoff_hz: float) -> None:
+        """
+        Initialize filter.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            cutoff_hz: Cutoff frequency in Hz
+        """
+        self.a: float = math.exp(-2 * math.pi * cutoff_hz / sample_rate)
+        self.b: float = (1 + self.a) / 2
+
+        powers = np.arange(self.SUB_BLOCK + 1, dtype=np.float64)
+        self._decay: np.ndarray = self.a ** powers
+        self._inverse: np.ndarray = self.a ** -powers[:-1]
+        self._x_prev: float = 0.0
+        self._y_prev: float = 0.0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Filter a block.
+
+        Args:
+            block: int16 samples
+
+        Returns:
+            Filtered int16 samples
+        """
+        x = block.astype(np.float64)
+        out = np.empty(len(x), dtype=np.float64)
+
+        # y[n] = a*y[n-1] + b*(x[n] - x[n-1])
+        for start in range(0, len(x), self.SUB_BLOCK):
+            sub = x[start:start + self.SUB_BLOCK]
+            n = len(sub)
+            d = self.b * np.diff(sub, prepend=self._x_prev)
+            y = self._decay[:n] * (np.cumsum(d * self._inverse[:n]) + self.a * self._y_prev)
+            out[start:start + n] = y
+            self._x_prev = sub[-1]
+            self._y_prev = y[-1]
+
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+
+class SpectralGate:
+    """
+    STFT spectral-gating noise suppressor for a stream of int16 blocks.
+
+    The noise spectrum is estimated from the first `noise_seconds` of the
+    recording (per-bin low percentile, so words spoken right away don't
+    count as noise) and then follows frames that are close to it. Bins that
+    don't rise clearly above the noise are attenuated by up to
+    `reduction_db`. Every complete frame is processed as it arrives, in
+    batches (one rfft/irfft over all frames of a block); only the last
+    partial frame is left for flush().
+    """
+
+    OVERSUBTRACTION = 1.5  # noise magnitude multiple that is fully gated
+    NOISE_PERCENTILE = 20
+    NOISE_ADAPT = 0.05  # per frame in which a bin is near the noise
+
+    def __init__(self, sample_rate: int, reduction_db: float = 12.0, noise_seconds: float = 0.3,
+                 frame_seconds: float = 0.032) -> None:
+        """
+        Initialize suppressor.
+
+        Args:
+            sample_rate: Sample rate in Hz
+            reduction_db: Largest attenuation of noise-only bins
+            noise_seconds: Leading audio used to learn the noise spectrum
+            frame_seconds: STFT frame length (50% overlap)
+        """
+        self.frame: int = 1 << max(int(round(math.log2(sample_rate * frame_seconds))), 4)
+        self.hop: int = self.frame // 2
+        # sqrt-Hann analysis and synthesis windows sum to one at 50% overlap
+        self.window: np.ndarray = np.sqrt(np.hanning(self.frame + 1)[:-1]).astype(np.float32)
+        self.floor: float = 10 ** (-reduction_db / 20)
+        self.noise_frames: int = max(int(noise_seconds * sample_rate) // self.hop, 1)
+
+        self.noise: Optional[np.ndarray] = None  # magnitude per bin
+        self._input: np.ndarray = np.zeros(self.hop, dtype=np.float32)  # first half-frame of padding
+        self._overlap: np.ndarray = np.zeros(self.hop, dtype=np.float32)
+        self._gain: Optional[np.ndarray] = None
+        self._received: int = 0
+        self._emitted: int = 0
+
+        # Processing cost, reported with the recording
+        self.seconds: float = 0.0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Feed a block.
+
+        Args:
+            block: int16 samples
+
+        Returns:
+            Denoised int16 samples, delayed by up to one frame (may be empty)
+        """
+        started = time.perf_counter()
+        self._received += len(block)
+        self._input = np.concatenate((self._input, block.astype(np.float32)))
+        result = self._run()
+        self.seconds += time.perf_counter() - started
+        return result
+
+    def flush(self) -> np.ndarray:
+        """
+        Process the remaining samples.
+
+        Returns:
+            Last denoised int16 samples (total output length equals input length)
+        """
+        started = time.perf_counter()
+        # Pad so the last real sample gets both of its overlapping frames
+        self._input = np.concatenate((self._input, np.zeros(self.frame, dtype=np.float32)))
+        result = self._run(final=True)
+        result = result[:max(self._received - (self._emitted - len(result)), 0)]
+        self.seconds += time.perf_counter() - started
+        return result
+
+    def _run(self, final: bool = False) -> np.ndarray:
+        count = (len(self._input) - self.frame) // self.hop + 1 if len(self._input) >= self.frame else 0
+        # Hold output back until the leading frames for the noise estimate are in
+        if count <= 0 or (self.noise is None and count < self.noise_frames and not final):
+            return np.zeros(0, dtype=np.int16)
+
+        spectra = np.fft.rfft(self._frames(count) * self.window, axis=1)
+        magnitude = np.abs(spectra)
+
+        if self.noise is None:
+            self.noise = np.percentile(magnitude[:self.noise_frames], self.NOISE_PERCENTILE, axis=0)
+        else:
+            # Follow slow changes in the noise, per bin, with values that are barely above it
+            quiet = magnitude < 2 * self.noise
+            hits = quiet.sum(axis=0)
+            mean = np.where(quiet, magnitude, 0).sum(axis=0) / np.maximum(hits, 1)
+            self.noise += (1 - (1 - self.NOISE_ADAPT) ** hits) * np.where(hits > 0, mean - self.noise, 0)
+
+        # Against musical noise: compare the noise with magnitudes smoothed across neighbouring bins
+        # (isolated noise peaks don't open the gate), and let the gain fall at most 6 dB per frame
+        smoothed = magnitude.copy()
+        smoothed[:, 1:-1] = (magnitude[:, :-2] + magnitude[:, 1:-1] + magnitude[:, 2:]) / 3
+        gain = np.clip(1 - self.OVERSUBTRACTION * self.noise / np.maximum(smoothed, 1e-6), self.floor, 1.0)
+        previous = np.vstack((self._gain if self._gain is not None else gain[:1], gain[:-1]))
+        gain = np.maximum(gain, 0.5 * previous)
+        self._gain = gain[-1:]
+
+        output = np.fft.irfft(spectra * gain, n=self.frame, axis=1).astype(np.float32) * self.window
+
+        # Overlap-add: each hop of output is the second half of one frame plus the first half of the next
+        out = np.empty(count * self.hop, dtype=np.float32)
+        out[:self.hop] = self._overlap + output[0, :self.hop]
+        out[self.hop:] = (output[:-1, self.hop:] + output[1:, :self.hop]).reshape(-1)
+        self._overlap = output[-1, self.hop:].copy()
+        self._input = self._input[count * self.hop:]
+
+        # The first hop of output belongs to the padding in front of the recording
+        if self._emitted == 0:
+            out = out[self.hop:]
+        self._emitted += len(out)
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+    def _frames(self, count: int) -> np.ndarray:
+        """Overlapping frames of the buffered input (a strided view)."""
+        return np.lib.stride_tricks.sliding_window_view(self._input, self.frame)[::self.hop][:count]
+
+
+class LoudnessNormalizer:
+    """
+    DC-offset removal, gain normalization and a soft peak limiter.
+
+    Statistics are accumulated block by block while recording (observe);
+    the correction is then applied in place in one pass over the recorded
+    buffer (apply), working on small slices so no full-size copy is made.
+    """
+
+    SLICE = 65536
+
+    def __init__(self, target_rms_dbfs: float = -20.0, max_gain_db: float = 20.0,
+                 ceiling_dbfs: float = -1.0) -> None:
+        """
+        Initialize normalizer.
+
+        Args:
+            target_rms_dbfs: RMS level to normalize to
+            max_gain_db: Largest gain applied (keeps silence from being boosted)
+            ceiling_dbfs: Peak level the limiter never exceeds
+        """
+        self.target_rms: float = 32768 * 10 ** (target_rms_dbfs / 20)
+        self.max_gain: float = 10 ** (max_gain_db / 20)
+        self.ceiling: float = 32767 * 10 ** (ceiling_dbfs / 20)
+        self.knee: float = self.ceiling * 0.8
+
+        self.frames: int = 0
+        self.peak: int = 0
+        self._sum: float = 0.0
+        self._sum_squares: float = 0.0
+
+        # Filled in by apply()
+        self.gain: float = 1.0
+        self.seconds: float = 0.0
+
+    @property
+    def dc_offset(self) -> float:
+        """Mean sample value."""
+        return self._sum / self.frames if self.frames else 0.0
+
+    @property
+    def rms(self) -> float:
+        """RMS level with DC offset removed."""
+        if not self.frames:
+            return 0.0
+        variance = self._sum_squares / self.frames - self.dc_offset ** 2
+        return math.sqrt(max(variance, 0.0))
+
+    @property
+    def rms_dbfs(self) -> float:
+        """RMS level in dBFS."""
+        return 20 * math.log10(self.rms / 32768) if self.rms > 0 else -120.0
+
+    def observe(self, samples: np.ndarray) -> None:
+        """
+        Accumulate statistics of a block.
+
+        Args:
+            samples: int16 samples
+        """
+        if not len(samples):
+            return
+        values = samples.astype(np.float64)
+        self.frames += len(values)
+        self._sum += float(values.sum())
+        self._sum_squares += float(np.dot(values, values))
+        self.peak = max(self.peak, int(np.abs(values).max()))
+
+    def apply(self, pages) -> None:
+        """
+        Normalize recorded audio in place.
+
+        Args:
+            pages: Iterable of int16 arrays (modified in place)
+        """
+        started = time.perf_counter()
+
+        rms = self.rms
+        self.gain = min(self.target_rms / rms, self.max_gain) if rms > 0 else 1.0
+        dc = self.dc_offset
+        span = self.ceiling - self.knee
+
+        for page in pages:
+            for start in range(0, len(page), self.SLICE):
+                view = page[start:start + self.SLICE]
+                y = (view.astype(np.float32) - dc) * self.gain
+
+                magnitude = np.abs(y)
+                over = magnitude > self.knee
+                if over.any():
+                    limited = self.knee + span * np.tanh((magnitude[over] - self.knee) / span)
+                    y[over] = np.copysign(limited, y[over])
+
+                view[:] = np.rint(y)
+
+        self.seconds = time.perf_counter() - started
+
+
+class SpeechActivity:
+    """
+    Cheap speech/silence estimate for routing.
+
+    The RMS level of every 10 ms frame is collected while recording; at the
+    end, frames more than `margin_db` above the noise floor (the quietest
+    tenth of the frames) count as speech. Without pauses there is no floor
+    to measure, so frames within `range_db` of the loud end always count:
+    long dictation is never mistaken for a short command. This is one short
+    pass per block and a few kilobytes per minute, not a voice activity
+    detector.
+    """
+
+    FRAME_SECONDS = 0.01
+
+    def __init__(self, sample_rate: int, margin_db: float = 12.0, range_db: float = 20.0,
+                 floor_dbfs: float = -60.0) -> None:
+        """
+        Initialize meter.
+
+        Args:
+            sample_rate: Sample rate of the observed audio
+            margin_db: Level above the noise floor that counts as speech
+            range_db: Level below the loudest frames that always counts as speech
+            floor_dbfs: Frames quieter than this never count as speech
+        """
+        self.frame: int = max(int(sample_rate * self.FRAME_SECONDS), 1)
+        self.margin_db: float = margin_db
+        self.range_db: float = range_db
+        self.floor_dbfs: float = floor_dbfs
+        self._levels: list = []
+        self._pending: np.ndarray = np.zeros(0, dtype=np.int16)
+
+    def observe(self, samples: np.ndarray) -> None:
+        """
+        Measure a block.
+
+        Args:
+            samples: int16 samples
+        """
+        if len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        whole = len(samples) // self.frame * self.frame
+        self._pending = samples[whole:].copy()
+        if not whole:
+            return
+
+        frames = samples[:whole].astype(np.float32).reshape(-1, self.frame)
+        power = np.einsum('ij,ij->i', frames, frames) / self.frame
+        self._levels.append(10 * np.log10(np.maximum(power, 1.0) / 32768 ** 2))
+
+    @property
+    def speech_seconds(self) -> float:
+        """Seconds of audio that are likely speech."""
+        if not self._levels:
+            return 0.0
+        levels = np.concatenate(self._levels)
+        floor, loud = np.percentile(levels, [10, 95])
+        threshold = max(min(float(floor) + self.margin_db, float(loud) - self.range_db), self.floor_dbfs)
+        return int(np.count_nonzero(levels > threshold)) * self.FRAME_SECONDS
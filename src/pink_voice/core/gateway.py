@@ -0,0 +1,447 @@
+"""
+Transcription gateway.
+
+Serves many Pink Voice clients from one transcriber host. Clients add the
+gateway as an endpoint (relay://host:47823) and speak the relay protocol
+(see wsl_relay.py); the gateway transcribes through the same backend layer
+as a desktop instance (TranscribeService and the configured transport).
+
+Requests that arrive within a short window are micro-batched: their WAVs
+are joined with a second of silence in between, transcribed in one call,
+and the result is split back by segment and word timings. That needs a
+transcriber that returns timings (see results.py); with plain-text
+backends every request is sent on its own. Batches are filled round-robin
+across clients, so one busy client can't starve the others.
+
+Every request must carry the gateway's shared token. Clients can't pass
+transcriber arguments of their own: only the args of a route profile
+configured on the gateway are accepted, anything else is dropped.
+"""
+
+import collections
+import hmac
+import io
+import os
+import socketserver
+import tempfile
+import threading
+import time
+import wave
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from pink_voice.config import config
+from pink_voice.core.metrics import metrics
+from pink_voice.core.results import FORMATS, TranscriptionResult, split_result
+from pink_voice.core.routing import configured_routes
+from pink_voice.core.transcribe import TranscribeService, result_format
+from pink_voice.core.wav import WavWriter
+from pink_voice.core.wsl_relay import recv_message, safe_suffix, send_message
+
+DEFAULT_PORT = 47823
+
+# Silence between joined clips, so the transcriber ends a segment at each boundary
+GAP_SECONDS = 1.0
+
+# Smoothing of the per-client queue wait behind the fairness gauge
+WAIT_SMOOTHING = 0.2
+
+# Distinct client names scheduled and labelled on their own; later ones share "other"
+MAX_CLIENTS = 64
+
+
+def _read_wav(audio: bytes) -> Optional[Tuple[Tuple[int, int, int], bytes]]:
+    """Format (rate, channels, sample width) and PCM of a WAV file, or None if it isn't one."""
+    try:
+        with wave.open(io.BytesIO(audio), 'rb') as wav:
+            return (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()), wav.readframes(wav.getnframes())
+    except (EOFError, wave.Error):
+        return None
+
+
+def _strip_format(args: List[str]) -> Tuple[Tuple[str, ...], bool]:
+    """Split `--format X` off a client's args (the gateway picks the backend format)."""
+    kept: List[str] = []
+    jsonl = False
+    i = 0
+    while i < len(args):
+        if args[i] == '--format' and i + 1 < len(args):
+            jsonl = args[i + 1] == 'jsonl'
+            i += 2
+            continue
+        kept.append(args[i])
+        i += 1
+    return tuple(kept), jsonl
+
+
+@dataclass
+class GatewayJob:
+    """One client request waiting for (or in) a batch."""
+
+    client: str
+    audio: bytes
+    suffix: str = '.wav'
+    args: Tuple[str, ...] = ()
+    jsonl: bool = False  # reply with JSON-line segments
+    arrived: float = field(default_factory=time.monotonic)
+    reply: Optional[dict] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def __post_init__(self) -> None:
+        wav = _read_wav(self.audio) if self.suffix == '.wav' else None
+        self.wav_format: Optional[Tuple[int, int, int]] = wav[0] if wav else None
+        self.pcm: bytes = wav[1] if wav else b''
+
+    @property
+    def seconds(self) -> float:
+        """Audio duration (0 if not a WAV)."""
+        if not self.wav_format:
+            return 0.0
+        rate, channels, width = self.wav_format
+        return len(self.pcm) / (rate * channels * width)
+
+    def batch_key(self) -> Optional[tuple]:
+        """Jobs with equal keys can share a transcriber call (None = always alone)."""
+        return (self.args, self.wav_format) if self.wav_format else None
+
+
+class MicroBatcher:
+    """Per-client queues drained round-robin into batched transcriber calls."""
+
+    def __init__(self, window: float = 0.05, max_batch: int = 8, max_seconds: float = 30.0,
+                 workers: int = 1, timeout: float = 300.0) -> None:
+        """
+        Start the batch workers.
+
+        Args:
+            window: Seconds to wait after the oldest request for others to join it
+            max_batch: Maximum requests per transcriber call
+            max_seconds: Maximum joined audio per call (a longer single clip still goes alone)
+            workers: Concurrent transcriber calls
+            timeout: Seconds a request waits for its reply, queue included (0 = no limit)
+        """
+        self.window: float = window
+        self.max_batch: int = max(max_batch, 1)
+        self.max_seconds: float = max_seconds
+        self.timeout: float = timeout
+        # Client -> waiting jobs; order is the round-robin order
+        self._queues: "collections.OrderedDict[str, Deque[GatewayJob]]" = collections.OrderedDict()
+        self._waits: Dict[str, Tuple[float, float]] = {}  # client -> (smoothed queue wait, last seen)
+        self._cond = threading.Condition()
+        for i in range(max(workers, 1)):
+            threading.Thread(target=self._work, name=f'gateway-batch-{i}', daemon=True).start()
+
+    def submit(self, job: GatewayJob) -> dict:
+        """
+        Queue a job and wait for its reply.
+
+        Args:
+            job: Job to transcribe
+
+        Returns:
+            Relay reply header (an error if there is none within the timeout)
+        """
+        with self._cond:
+            self._queues.setdefault(job.client, collections.deque()).append(job)
+            self._update_depth(job.client)
+            self._cond.notify()
+        if job.done.wait(self.timeout or None):
+            return job.reply
+
+        with self._cond:
+            # Still queued: nobody is waiting for it any more
+            queue = self._queues.get(job.client, ())
+            for i, queued in enumerate(queue):
+                if queued is job:
+                    del queue[i]
+                    if not queue:
+                        del self._queues[job.client]
+                    self._update_depth(job.client)
+                    break
+        metrics.inc("gateway_timeouts_total", client=job.client)
+        return {'ok': False, 'error': f"No transcript within {self.timeout:g}s"}
+
+    def _pending(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _update_depth(self, client: str) -> None:
+        queue = self._queues.get(client)
+        metrics.set("gateway_queue_depth", len(queue) if queue else 0, client=client)
+
+    def _take(self, batching: bool) -> List[GatewayJob]:
+        """Wait for work, hold the batch window open, then fill a batch."""
+        with self._cond:
+            while True:
+                while not self._queues:
+                    self._cond.wait()
+
+                if batching:
+                    oldest = min(queue[0].arrived for queue in self._queues.values())
+                    while self._queues and self._pending() < self.max_batch:
+                        remaining = oldest + self.window - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+
+                # Another worker may have taken everything meanwhile
+                if self._queues:
+                    return self._fill(batching)
+
+    def _fill(self, batching: bool) -> List[GatewayJob]:
+        """Take one job per client per round, starting with the client whose turn it is."""
+        first_client = next(iter(self._queues))
+        first = self._queues[first_client].popleft()
+        batch = [first]
+        key = first.batch_key() if batching else None
+        seconds = first.seconds
+        # The first client goes to the back of the line, for this batch's later rounds and the next batch
+        self._queues.move_to_end(first_client)
+
+        while key is not None and len(batch) < self.max_batch:
+            took = False
+            for queue in self._queues.values():
+                if len(batch) >= self.max_batch:
+                    break
+                if not queue or queue[0].batch_key() != key:
+                    continue
+                if seconds + GAP_SECONDS + queue[0].seconds <= self.max_seconds:
+                    job = queue.popleft()
+                    batch.append(job)
+                    seconds += GAP_SECONDS + job.seconds
+                    took = True
+            if not took:
+                break
+
+        # Drained clients leave the line
+        for client in {job.client for job in batch}:
+            if not self._queues[client]:
+                del self._queues[client]
+            self._update_depth(client)
+        return batch
+
+    def _work(self) -> None:
+        while True:
+            try:
+                # Asked once per transport, so this is a lookup after the first batch
+                batching = result_format() == "jsonl"
+            except Exception:
+                batching = False
+            batch = self._take(batching)
+            try:
+                self._run(batch)
+            except Exception as e:
+                # The worker outlives a failed batch; its jobs get the error
+                print(f"⚠️  Gateway batch failed: {e}", flush=True)
+                for job in batch:
+                    if not job.done.is_set():
+                        job.reply = {'ok': False, 'error': str(e)}
+                        job.done.set()
+
+    def _run(self, batch: List[GatewayJob]) -> None:
+        """Transcribe a batch and reply to its jobs."""
+        started = time.monotonic()
+        for job in batch:
+            self._record_wait(job.client, started - job.arrived)
+        metrics.inc("gateway_batches_total")
+        metrics.inc("gateway_batched_requests_total", len(batch))
+
+        try:
+            results = self._transcribe(batch)
+            for job, result in zip(batch, results):
+                job.reply = {'ok': True, 'text': result.to_jsonl() if job.jsonl else result.text}
+        except Exception as e:
+            for job in batch:
+                job.reply = {'ok': False, 'error': str(e)}
+
+        finished = time.monotonic()
+        for job in batch:
+            metrics.inc("gateway_requests_total", client=job.client, result="ok" if job.reply['ok'] else "error")
+            metrics.observe("gateway_request_seconds", finished - job.arrived, client=job.client)
+            job.done.set()
+
+        if config.verbose:
+            clients = len({job.client for job in batch})
+            audio = sum(job.seconds for job in batch)
+            print(f"Batch of {len(batch)} from {clients} client(s), {audio:.1f}s audio: "
+                  f"{(finished - started) * 1000:.0f}ms", flush=True)
+
+    def _transcribe(self, batch: List[GatewayJob]) -> List[TranscriptionResult]:
+        """One transcriber call for the batch; returns a result per job."""
+        first = batch[0]
+        fd, path = tempfile.mkstemp(prefix='pink-voice-gateway-', suffix=first.suffix)
+        try:
+            if len(batch) == 1:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(first.audio)
+                return [TranscribeService.transcribe_result(path, args=first.args)]
+
+            os.close(fd)
+            rate, channels, width = first.wav_format
+            gap = b'\x00' * int(GAP_SECONDS * rate) * channels * width
+            starts: List[float] = []
+            with WavWriter(path, rate, channels, width) as writer:
+                for i, job in enumerate(batch):
+                    if i:
+                        writer.write(gap)
+                    starts.append(writer.frames / rate)
+                    writer.write(job.pcm)
+            return split_result(TranscribeService.transcribe_result(path, args=first.args), starts)
+        finally:
+            os.unlink(path)
+
+    def _record_wait(self, client: str, wait: float) -> None:
+        """Track queue wait per client and update the fairness gauge."""
+        metrics.observe("gateway_queue_seconds", wait, client=client)
+        now = time.monotonic()
+        with self._cond:
+            previous = self._waits.get(client)
+            smoothed = wait if previous is None else previous[0] + WAIT_SMOOTHING * (wait - previous[0])
+            self._waits[client] = (smoothed, now)
+            # Clients quiet for a minute no longer count
+            recent = [value for value, seen in self._waits.values() if now - seen < 60]
+        metrics.set("gateway_fairness", jain_index(recent))
+
+
+def jain_index(values: List[float]) -> float:
+    """
+    Jain's fairness index.
+
+    Args:
+        values: Per-client amounts (e.g. queue wait)
+
+    Returns:
+        1.0 when all are equal, down to 1/n when one client gets everything
+    """
+    squares = sum(value * value for value in values)
+    if not squares:
+        return 1.0
+    return sum(values) ** 2 / (len(values) * squares)
+
+
+class _GatewayHandler(socketserver.BaseRequestHandler):
+    """Serves requests on one client connection until it closes."""
+
+    def handle(self) -> None:
+        server: GatewayServer = self.server
+        peer = self.client_address[0]
+        while True:
+            try:
+                header, payload = recv_message(self.request)
+            except (ConnectionError, OSError, ValueError):
+                # Closed, or malformed/oversized: the stream can't be resynchronized
+                return
+
+            if not server.authorized(header):
+                try:
+                    send_message(self.request, {'ok': False, 'error': "invalid token"})
+                except OSError:
+                    pass
+                return
+
+            try:
+                reply = server.dispatch(header, payload, peer)
+            except Exception as e:
+                reply = {'ok': False, 'error': str(e)}
+            try:
+                send_message(self.request, reply)
+            except OSError:
+                return
+
+
+class GatewayServer(socketserver.ThreadingTCPServer):
+    """Relay-protocol server that feeds a MicroBatcher."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str, port: int, batcher: MicroBatcher, token: str) -> None:
+        """
+        Initialize gateway server.
+
+        Args:
+            host: Address to bind
+            port: Port to bind
+            batcher: Batcher that transcribes the requests
+            token: Shared secret every request must carry
+        """
+        if not token:
+            raise ValueError("Gateway token must not be empty")
+        super().__init__((host, port), _GatewayHandler)
+        self.batcher: MicroBatcher = batcher
+        self.token: str = token
+        self.profiles: Set[Tuple[str, ...]] = {route.args for route in configured_routes()}
+        self._clients: Set[str] = set()
+        self._clients_lock = threading.Lock()
+
+    def authorized(self, header: dict) -> bool:
+        """True if the request carries the gateway's token."""
+        token = header.get('token')
+        return isinstance(token, str) and hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8'))
+
+    def client_name(self, name: str) -> str:
+        """
+        Scheduling and metrics label for a client, folding names past MAX_CLIENTS into "other".
+
+        Args:
+            name: Name the client sent (or its address)
+
+        Returns:
+            Label to use
+        """
+        name = name[:64]
+        with self._clients_lock:
+            if name in self._clients:
+                return name
+            if len(self._clients) < MAX_CLIENTS:
+                self._clients.add(name)
+                return name
+        return "other"
+
+    def profile_args(self, args: Tuple[str, ...]) -> Tuple[str, ...]:
+        """
+        Transcriber args of a request: a configured route profile's, or none.
+
+        Args:
+            args: Args the client sent (without --format)
+
+        Returns:
+            The args if a route on this gateway uses exactly these, else ()
+        """
+        if args and args not in self.profiles:
+            if config.verbose:
+                print(f"⚠️  Gateway: dropping transcriber args that match no route: {' '.join(args)}", flush=True)
+            return ()
+        return args
+
+    def dispatch(self, header: dict, payload: bytes, peer: str) -> dict:
+        """
+        Handle one request.
+
+        Args:
+            header: Request header ('op' plus op-specific fields)
+            payload: Audio bytes for 'transcribe'
+            peer: Client address (identifies clients that don't send a name)
+
+        Returns:
+            Reply header
+        """
+        op = header.get('op')
+
+        if op == 'ping':
+            return {'ok': True}
+
+        if op == 'health':
+            return {'ok': TranscribeService.health_check()}
+
+        if op == 'capabilities':
+            # Plain-text backend results are wrapped in a segment, so JSON lines always work
+            return {'ok': True, 'formats': list(FORMATS)}
+
+        if op == 'transcribe':
+            args = header.get('args')
+            args, jsonl = _strip_format([str(arg) for arg in args] if isinstance(args, list) else [])
+            client = self.client_name(str(header.get('client') or peer))
+            job = GatewayJob(client, payload, safe_suffix(header.get('suffix')), self.profile_args(args), jsonl)
+            return self.batcher.submit(job)
+
+        return {'ok': False, 'error': f"Unknown op: {op}"}
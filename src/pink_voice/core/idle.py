@@ -0,0 +1,169 @@
+"""
+Low-memory idle mode.
+
+After a period without dictation the standby recorder process (which
+holds numpy and sounddevice) is killed, idle relay connections are
+closed and the main process returns freed heap to the OS. Holding the
+hotkey's modifiers (Ctrl) starts a new standby process, so it is usually
+ready by the time the key itself is pressed. Other shortcuts share those
+modifiers (Ctrl+C), so such a warm-up is only speculative: unused, it is
+released again after PREPARE_GRACE seconds and the modifiers are ignored
+for one idle timeout.
+"""
+
+import ctypes
+import gc
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import psutil
+
+from pink_voice.config import config
+from pink_voice.core.recorder import AudioRecorder
+
+# Seconds a speculative warm-up stays up without a recording
+PREPARE_GRACE = 30.0
+
+
+def process_rss(pid: Optional[int] = None) -> int:
+    """
+    Resident memory of a process.
+
+    Args:
+        pid: Process ID (None = this process)
+
+    Returns:
+        RSS in bytes (0 if the process is gone)
+    """
+    try:
+        return psutil.Process(pid).memory_info().rss
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return 0
+
+
+def memory_footprint(recorder: AudioRecorder) -> Dict[str, int]:
+    """
+    Resident memory of the main and recorder processes.
+
+    Args:
+        recorder: Recorder whose standby process is measured
+
+    Returns:
+        {"main": bytes, "recorder": bytes, "total": bytes}
+    """
+    main = process_rss()
+    process = recorder.process
+    worker = process_rss(process.pid) if process and process.is_alive() else 0
+    return {"main": main, "recorder": worker, "total": main + worker}
+
+
+def trim_memory() -> None:
+    """Run the garbage collector and return free heap pages to the OS (glibc only)."""
+    gc.collect()
+    if sys.platform.startswith('linux'):
+        try:
+            ctypes.CDLL('libc.so.6').malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+def _mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.0f}MB"
+
+
+class IdleMonitor:
+    """Releases the standby recorder after inactivity and warms it up on demand."""
+
+    def __init__(self, recorder: AudioRecorder, timeout: float,
+                 is_busy: Callable[[], bool] = lambda: False,
+                 on_idle: Optional[Callable[[], None]] = None) -> None:
+        """
+        Initialize idle monitor.
+
+        Args:
+            recorder: Recorder to trim
+            timeout: Seconds without activity before going idle (0 = never)
+            is_busy: Returns True while work is in progress (e.g. transcribing)
+            on_idle: Extra cleanup when going idle (e.g. closing connections)
+        """
+        self.recorder: AudioRecorder = recorder
+        self.timeout: float = timeout
+        self.is_busy: Callable[[], bool] = is_busy
+        self.on_idle: Optional[Callable[[], None]] = on_idle
+        self.idle: bool = False
+        self.last_footprint: Dict[str, int] = {}
+        self._last_activity: float = time.monotonic()
+        self._speculative: bool = False  # awake only because of prepare(), no activity since
+        self._prepare_blocked_until: float = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start watching for inactivity."""
+        if self.timeout <= 0 or self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def touch(self) -> None:
+        """Record activity."""
+        self._last_activity = time.monotonic()
+        self._speculative = False
+
+    def wake(self) -> None:
+        """Record activity and leave idle mode: spawn the standby recorder in the background."""
+        self.touch()
+        self._leave_idle()
+
+    def prepare(self) -> None:
+        """
+        Speculative wake-up: the hotkey's modifiers are down, the key may follow.
+
+        Not counted as activity. Cheap when not idle or backing off, so it can
+        be called on every press of the modifiers.
+        """
+        if not self.idle or time.monotonic() < self._prepare_blocked_until:
+            return
+        self._speculative = True
+        # Idle again after PREPARE_GRACE unless a recording starts
+        self._last_activity = time.monotonic() - max(self.timeout - PREPARE_GRACE, 0.0)
+        self._leave_idle()
+
+    def _leave_idle(self) -> None:
+        if not self.idle:
+            return
+        self.idle = False
+        threading.Thread(target=self.recorder.ensure_standby, daemon=True).start()
+
+        if config.verbose:
+            print("Warming up recorder", flush=True)
+
+    def _run(self) -> None:
+        while True:
+            # The timeout may change with a config reload
+            time.sleep(min(self.timeout / 4, 5) if self.timeout > 0 else 5)
+            if self.idle or self.timeout <= 0 or time.monotonic() - self._last_activity < self.timeout:
+                continue
+            if self.recorder.is_recording() or self.is_busy():
+                self.touch()
+                continue
+            if self._speculative:
+                # The modifiers were pressed for another shortcut: stop warming up on them for a while
+                self._prepare_blocked_until = time.monotonic() + self.timeout
+                self._speculative = False
+            self.enter_idle()
+
+    def enter_idle(self) -> None:
+        """Release the standby recorder and trim memory."""
+        before = memory_footprint(self.recorder)
+
+        self.idle = True
+        self.recorder.release_standby()
+        if self.on_idle:
+            self.on_idle()
+        trim_memory()
+
+        self.last_footprint = memory_footprint(self.recorder)
+        if config.verbose:
+            print(f"💤 Idle: memory {_mb(before['total'])} -> {_mb(self.last_footprint['total'])}", flush=True)
@@ -0,0 +1,192 @@
+"""
+Durable queue of recordings waiting for transcription.
+
+When the transcriber can't be reached, the recording is moved here instead
+of being deleted: one WAV plus a small JSON file per job, so the queue
+survives restarts and crashes. The oldest jobs are dropped when the queue
+grows past its disk cap; jobs that keep failing are moved to a `failed`
+folder, of which only the newest few are kept.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from pink_voice.core.metrics import metrics
+
+# Given-up jobs kept in the failed folder (the oldest are deleted first)
+FAILED_KEEP = 20
+
+
+@dataclass
+class QueuedJob:
+    """A recording waiting to be transcribed."""
+
+    id: str
+    created_at: float
+    attempts: int = 0
+    last_error: str = ""  # of the last attempt
+
+
+class JobQueue:
+    """Recordings on disk, oldest first."""
+
+    def __init__(self, root: str, max_bytes: int = 500 * 1024 * 1024) -> None:
+        """
+        Open (or create) a queue.
+
+        Args:
+            root: Queue directory
+            max_bytes: Maximum total size of queued audio
+        """
+        self.root: Path = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes: int = max_bytes
+        self._lock = threading.Lock()
+
+    def audio_path(self, job: QueuedJob) -> str:
+        """Path of the job's WAV file."""
+        return str(self.root / f"{job.id}.wav")
+
+    def _meta_path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.json"
+
+    def _write_meta(self, job: QueuedJob) -> None:
+        # Write then rename, so a crash never leaves half a file
+        tmp = self.root / f"{job.id}.json.tmp"
+        tmp.write_text(json.dumps(asdict(job)), encoding="utf-8")
+        os.replace(tmp, self._meta_path(job.id))
+
+    def add(self, audio_path: str, error: str = "") -> QueuedJob:
+        """
+        Move a recording into the queue.
+
+        Args:
+            audio_path: WAV file (moved, not copied)
+            error: Why it could not be transcribed
+
+        Returns:
+            The new job
+        """
+        # Time-ordered ids keep directory listings in queue order
+        job = QueuedJob(id=f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}", created_at=time.time(),
+                        last_error=error)
+        with self._lock:
+            shutil.move(audio_path, self.audio_path(job))
+            self._write_meta(job)
+            self._evict()
+        return job
+
+    def pending(self) -> List[QueuedJob]:
+        """
+        Jobs in the queue, oldest first.
+
+        Returns:
+            Jobs (WAV files without metadata are adopted, stray metadata is removed)
+        """
+        jobs: List[QueuedJob] = []
+        with self._lock:
+            for wav in sorted(self.root.glob("*.wav")):
+                meta = self._meta_path(wav.stem)
+                try:
+                    jobs.append(QueuedJob(**json.loads(meta.read_text(encoding="utf-8"))))
+                except (OSError, ValueError, TypeError):
+                    job = QueuedJob(id=wav.stem, created_at=wav.stat().st_mtime)
+                    self._write_meta(job)
+                    jobs.append(job)
+
+            for meta in self.root.glob("*.json"):
+                if not (self.root / f"{meta.stem}.wav").exists():
+                    meta.unlink(missing_ok=True)
+        return jobs
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.root.glob("*.wav"))
+
+    def record_failure(self, job: QueuedJob, error: str) -> None:
+        """
+        Note a failed retry (the service was up but the job still failed).
+
+        Args:
+            job: Job that failed
+            error: Error message
+        """
+        job.attempts += 1
+        job.last_error = error
+        with self._lock:
+            if os.path.exists(self.audio_path(job)):
+                self._write_meta(job)
+
+    def remove(self, job: QueuedJob) -> None:
+        """
+        Delete a job (after it was delivered).
+
+        Args:
+            job: Job to delete
+        """
+        with self._lock:
+            Path(self.audio_path(job)).unlink(missing_ok=True)
+            self._meta_path(job.id).unlink(missing_ok=True)
+
+    def fail(self, job: QueuedJob) -> str:
+        """
+        Give up on a job: move it out of the queue into the failed folder.
+
+        Args:
+            job: Job to give up on
+
+        Returns:
+            Path of the job's WAV file in the failed folder
+        """
+        failed = self.root / "failed"
+        target = failed / f"{job.id}.wav"
+        with self._lock:
+            failed.mkdir(exist_ok=True)
+            if os.path.exists(self.audio_path(job)):
+                shutil.move(self.audio_path(job), target)
+            meta = self._meta_path(job.id)
+            if meta.exists():
+                os.replace(meta, failed / meta.name)
+
+            for wav in sorted(failed.glob("*.wav"))[:-FAILED_KEEP]:
+                wav.unlink(missing_ok=True)
+                (failed / f"{wav.stem}.json").unlink(missing_ok=True)
+        return str(target)
+
+    def size_bytes(self) -> int:
+        """Total size of queued audio."""
+        return sum(wav.stat().st_size for wav in self.root.glob("*.wav"))
+
+    def _evict(self) -> None:
+        """Drop the oldest jobs until the queue fits its disk cap (keeps the newest job)."""
+        wavs = sorted(self.root.glob("*.wav"))
+        total = sum(wav.stat().st_size for wav in wavs)
+        for wav in wavs[:-1]:
+            if total <= self.max_bytes:
+                break
+            total -= wav.stat().st_size
+            wav.unlink(missing_ok=True)
+            self._meta_path(wav.stem).unlink(missing_ok=True)
+            metrics.inc("queue_jobs_total", result="dropped")
+            print(f"⚠️  Queue over {self.max_bytes // (1024 * 1024)}MB, dropped recording {wav.stem}", flush=True)
+
+
+def open_queue() -> Optional[JobQueue]:
+    """
+    Open the queue configured in config.
+
+    Returns:
+        Queue, or None if queueing is disabled
+    """
+    from pink_voice.config import config
+
+    if not config.queue_enabled:
+        return None
+
+    return JobQueue(os.path.join(config.data_dir, "queue"), max_bytes=config.queue_max_mb * 1024 * 1024)
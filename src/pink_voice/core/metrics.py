@@ -0,0 +1,281 @@
+"""
+Metrics for fleet monitoring.
+
+Counters, gauges and latency histograms are kept in memory and can be exported
+two ways, both off by default:
+
+- Prometheus text format over HTTP (PINK_VOICE_METRICS_PORT), served on
+  127.0.0.1 at /metrics
+- StatsD over UDP (PINK_VOICE_STATSD=host:port), one datagram per event
+
+Recording a metric is a dict update under a lock (plus a non-blocking UDP
+send with StatsD), and only happens a few times per dictation.
+"""
+
+import bisect
+import re
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from pink_voice.config import config
+
+PREFIX = "pink_voice"
+
+# Histogram bucket upper bounds in seconds
+BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DESCRIPTIONS: Dict[str, str] = {
+    "recordings_total": "Recordings stopped with audio",
+    "recording_seconds": "Duration of recorded audio",
+    "transcriptions_total": "Transcription requests by result",
+    "transcription_seconds": "Transcription request latency",
+    "transcription_warm_seconds": "Transcription latency when a warm-up ran during recording",
+    "transcription_cold_seconds": "Transcription latency without a warm-up",
+    "transcription_retries_total": "Transcription attempts retried after a failure",
+    "transcription_hedges_total": "Hedged requests sent to a second endpoint",
+    "transcription_hedge_wins_total": "Hedged requests by which copy answered first",
+    "transcription_timeouts_total": "Endpoint requests abandoned at the attempt deadline",
+    "transcription_routes_total": "Transcriptions by route (profile)",
+    "transcription_route_seconds": "Transcription latency by route",
+    "transcription_refines_total": "Re-transcribed low-confidence segments by result (replaced, kept, failure)",
+    "transcription_refine_seconds": "Time to re-transcribe one low-confidence segment",
+    "warmups_total": "Speculative transcriber warm-ups by result",
+    "warmup_seconds": "Speculative transcriber warm-up latency",
+    "queue_jobs_total": "Recordings queued while the transcriber was down, and their outcome",
+    "health_checks_total": "Transcriber health checks by result",
+    "health_check_seconds": "Transcriber health check latency",
+    "recorder_restarts_total": "Recorder processes restarted after a stall or crash",
+    "xruns_total": "Audio input overflows and underflows",
+    "gateway_requests_total": "Gateway requests by client and result",
+    "gateway_queue_seconds": "Time gateway requests waited for a batch, by client",
+    "gateway_request_seconds": "Gateway request latency (queue and transcription), by client",
+    "gateway_batches_total": "Transcriber calls made by the gateway",
+    "gateway_batched_requests_total": "Requests served by gateway transcriber calls (divide by batches for batch size)",
+    "gateway_queue_depth": "Requests waiting in the gateway, by client",
+    "gateway_fairness": "Jain's index of recent per-client queue wait (1 = all clients wait alike)",
+    "gateway_timeouts_total": "Gateway requests answered with an error after the request timeout, by client",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    """Cumulative-bucket histogram."""
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(BUCKETS) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """In-memory counters and histograms."""
+
+    def __init__(self) -> None:
+        """Initialize empty registry."""
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._lock = threading.Lock()
+        self._statsd: Optional["StatsdEmitter"] = None
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name: Metric name without prefix (e.g. "recordings_total")
+            value: Amount to add
+            **labels: Label values
+        """
+        if not value:
+            return
+        key: LabelKey = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+        if self._statsd:
+            self._statsd.counter(name, value, labels)
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """
+        Set a gauge.
+
+        Args:
+            name: Metric name without prefix (e.g. "gateway_queue_depth")
+            value: Current value
+            **labels: Label values
+        """
+        key: LabelKey = tuple(sorted(labels.items()))
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+        if self._statsd:
+            self._statsd.gauge(name, value, labels)
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        """
+        Record a duration in a histogram.
+
+        Args:
+            name: Metric name without prefix (e.g. "transcription_seconds")
+            seconds: Observed value
+            **labels: Label values
+        """
+        key: LabelKey = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram()
+            histogram.observe(seconds)
+        if self._statsd:
+            self._statsd.timing(name, seconds, labels)
+
+    def render_prometheus(self) -> str:
+        """
+        Render all metrics in Prometheus text exposition format.
+
+        Returns:
+            Metrics text
+        """
+        lines: List[str] = []
+
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = f"{PREFIX}_{name}"
+                lines.append(f"# HELP {full} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(key)} {value:g}")
+
+            for name, series in sorted(self._gauges.items()):
+                full = f"{PREFIX}_{name}"
+                lines.append(f"# HELP {full} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {full} gauge")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(key)} {value:g}")
+
+            for name, series in sorted(self._histograms.items()):
+                full = f"{PREFIX}_{name}"
+                lines.append(f"# HELP {full} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS + (float('inf'),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                        lines.append(f"{full}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{full}_count{_format_labels(key)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value) -> str:
+    """Label value escaped as the Prometheus text format requires (backslash, quote, newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in key) + "}"
+
+
+def _statsd_segment(value) -> str:
+    """Label value as one StatsD path segment: anything but letters, digits, - and _ becomes _."""
+    return re.sub(r"[^A-Za-z0-9_-]", "_", str(value)) or "_"
+
+
+class StatsdEmitter:
+    """Sends metric events to a StatsD server over UDP."""
+
+    def __init__(self, host: str, port: int) -> None:
+        """
+        Initialize emitter.
+
+        Args:
+            host: StatsD host
+            port: StatsD UDP port
+        """
+        self.address: Tuple[str, int] = (host, port)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def counter(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        """Send a counter increment (labels become name segments)."""
+        # recordings_total -> pink_voice.recordings, result=success -> .success
+        stem = name[:-len("_total")] if name.endswith("_total") else name
+        self._send(f"{self._path(stem, labels)}:{value:g}|c")
+
+    def gauge(self, name: str, value: float, labels: Dict[str, str]) -> None:
+        """Send a gauge value (labels become name segments)."""
+        self._send(f"{self._path(name, labels)}:{value:g}|g")
+
+    def timing(self, name: str, seconds: float, labels: Dict[str, str]) -> None:
+        """Send a timing in milliseconds (labels become name segments)."""
+        stem = name[:-len("_seconds")] if name.endswith("_seconds") else name
+        self._send(f"{self._path(stem, labels)}:{seconds * 1000:.3f}|ms")
+
+    @staticmethod
+    def _path(stem: str, labels: Dict[str, str]) -> str:
+        # Label values may come from remote clients: a '.', ':' or '|' would forge other metrics
+        return ".".join([PREFIX, stem] + [_statsd_segment(labels[k]) for k in sorted(labels)])
+
+    def _send(self, line: str) -> None:
+        try:
+            self._sock.sendto(line.encode("ascii"), self.address)
+        except OSError:
+            # Metrics must never disturb dictation
+            pass
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves /metrics."""
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+metrics = MetricsRegistry()
+
+
+def start_exporters() -> None:
+    """Start the exporters enabled in config."""
+    if config.statsd_address:
+        host, _, port = config.statsd_address.rpartition(":")
+        try:
+            metrics._statsd = StatsdEmitter(host or "127.0.0.1", int(port))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  StatsD export not started: {e}", flush=True)
+
+    if config.metrics_port:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", config.metrics_port), _MetricsHandler)
+        except OSError as e:
+            print(f"⚠️  Metrics endpoint not started: {e}", flush=True)
+            return
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        if config.verbose:
+            print(f"Metrics at http://127.0.0.1:{config.metrics_port}/metrics", flush=True)
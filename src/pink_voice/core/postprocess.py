@@ -0,0 +1,222 @@
+"""
+Transcript post-processing rules.
+
+Rules live in a plain text file, one per line:
+
+    # comment
+    new line => \\n
+    comma => ,
+    pink voice => Pink Voice
+    re: \\s+([,.;:!?]) => \\1
+
+Phrase rules match whole words, case-insensitively. All of them are
+compiled into one regex shaped like a trie of the phrases, so a transcript
+is scanned once no matter how many phrases there are. `re:` rules are
+regular expressions applied afterwards, in file order.
+
+The file is re-read when its modification time changes.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pink_voice.config import config
+
+_ESCAPES = {'n': '\n', 't': '\t', '\\': '\\'}
+
+
+def _unescape(value: str) -> str:
+    """Decode \\n, \\t and \\\\ in a phrase replacement."""
+    return re.sub(r'\\([nt\\])', lambda m: _ESCAPES[m.group(1)], value)
+
+
+def _normalize(phrase: str) -> str:
+    """Key of a phrase: lowercase, single spaces."""
+    return ' '.join(phrase.lower().split())
+
+
+def _fold(phrase: str) -> str:
+    """
+    Lookup key of matched text: casefolded, single spaces.
+
+    The regex matches case-insensitively with simple case folding, so a
+    match can lowercase to something other than its phrase ('S' matches
+    'ſ'); casefolding both sides maps them to the same key.
+    """
+    return ' '.join(phrase.casefold().split())
+
+
+def _trie_pattern(node: dict) -> str:
+    """
+    Turn a character trie into a regex.
+
+    Args:
+        node: Trie node (char -> child node, '' marks the end of a phrase)
+
+    Returns:
+        Regex matching every phrase in the trie
+    """
+    branches = [
+        (r'\s+' if char == ' ' else re.escape(char)) + _trie_pattern(child)
+        for char, child in sorted(node.items()) if char
+    ]
+    if not branches:
+        return ''
+
+    if len(branches) == 1 and '' not in node:
+        return branches[0]
+
+    pattern = '(?:' + '|'.join(branches) + ')'
+    # Longer phrases win; the shorter one still matches if the longer fails
+    return pattern + '?' if '' in node else pattern
+
+
+class RuleEngine:
+    """Applies phrase and regex rules from a rules file to transcripts."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize rule engine.
+
+        Args:
+            path: Rules file (a missing file means no rules)
+        """
+        self.path: str = path
+        self.phrases: Dict[str, str] = {}
+        self._folded: Dict[str, str] = {}
+        self.regexes: List[Tuple[re.Pattern, str]] = []
+        self._pattern: Optional[re.Pattern] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+        # Compile cost of the last (re)load
+        self.compile_seconds: float = 0.0
+
+    @property
+    def rule_count(self) -> int:
+        """Number of loaded rules."""
+        return len(self.phrases) + len(self.regexes)
+
+    def load(self, lines: List[str], source: str = "rules") -> None:
+        """
+        Parse and compile rules.
+
+        Invalid lines are reported and skipped.
+
+        Args:
+            lines: Lines in rules file format
+            source: Name used in warnings
+        """
+        started = time.perf_counter()
+
+        phrases: Dict[str, str] = {}
+        regexes: List[Tuple[re.Pattern, str]] = []
+
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            if '=>' not in line:
+                print(f"⚠️  {source}:{number}: expected 'phrase => replacement'", flush=True)
+                continue
+
+            match, replacement = (part.strip() for part in line.split('=>', 1))
+
+            if match.startswith('re:'):
+                try:
+                    regexes.append((re.compile(match[3:].strip()), replacement))
+                except re.error as e:
+                    print(f"⚠️  {source}:{number}: invalid regex: {e}", flush=True)
+                continue
+
+            key = _normalize(match)
+            if key:
+                phrases[key] = _unescape(replacement)
+
+        trie: dict = {}
+        for phrase in phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        pattern = None
+        if phrases:
+            pattern = re.compile(r'(?<!\w)' + _trie_pattern(trie) + r'(?!\w)', re.IGNORECASE)
+
+        folded = {_fold(phrase): replacement for phrase, replacement in phrases.items()}
+
+        with self._lock:
+            self.phrases = phrases
+            self._folded = folded
+            self.regexes = regexes
+            self._pattern = pattern
+
+        self.compile_seconds = time.perf_counter() - started
+
+    def reload_if_changed(self) -> None:
+        """Re-read the rules file if it changed since the last load."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+
+        lines: List[str] = []
+        if mtime is not None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    lines = f.readlines()
+            except OSError as e:
+                print(f"⚠️  Could not read rules file: {e}", flush=True)
+
+        self.load(lines, os.path.basename(self.path))
+
+        if config.verbose and mtime is not None:
+            print(f"Loaded {self.rule_count} text rules in {self.compile_seconds * 1000:.1f}ms", flush=True)
+
+    def apply(self, text: str) -> str:
+        """
+        Apply rules to a transcript.
+
+        Args:
+            text: Transcript
+
+        Returns:
+            Processed transcript
+        """
+        with self._lock:
+            pattern, folded, regexes = self._pattern, self._folded, self.regexes
+
+        if pattern is not None:
+            # Text whose casefolding matches no phrase ('İ' for 'i') is left as it is
+            text = pattern.sub(lambda m: folded.get(_fold(m.group(0)), m.group(0)), text)
+
+        for regex, replacement in regexes:
+            text = regex.sub(replacement, text)
+
+        return text
+
+
+_engine: Optional[RuleEngine] = None
+
+
+def get_rule_engine() -> RuleEngine:
+    """
+    Get the shared rule engine for the configured rules file.
+
+    Returns:
+        RuleEngine (reloaded if the file changed)
+    """
+    global _engine
+    if _engine is None or _engine.path != config.rules_path:
+        _engine = RuleEngine(config.rules_path)
+    _engine.reload_if_changed()
+    return _engine
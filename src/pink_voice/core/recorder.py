@@ -2,117 +2,555 @@
 
 import multiprocessing
 import os
+import queue
+import re
+import tempfile
+import threading
 import time
-from typing import Optional
+import wave
+from typing import Callable, List, Optional, Union
 
-from pink_voice.core.recorder_process import run_recorder
+from pink_voice.config import LATENCY_PROFILES, config
+from pink_voice.core.metrics import metrics
+from pink_voice.core.recorder_process import (
+    HEARTBEAT_FRAMES,
+    HEARTBEAT_SIZE,
+    HEARTBEAT_TICKS,
+    RecorderSettings,
+    RecordingResult,
+    run_recorder,
+)
+from pink_voice.core.trace import tracer
+
+# Spill files carry their sample rate, so files left by a crash can be salvaged at start-up
+_SPILL_NAME = re.compile(r'pink-voice-([1-9]\d*)hz-.*\.pcm')
+
+
+def list_input_devices() -> List[str]:
+    """
+    List names of available input devices.
+
+    Returns:
+        Device names (empty if audio is unavailable)
+    """
+    try:
+        import sounddevice as sd
+        return [info['name'] for info in sd.query_devices() if info['max_input_channels'] > 0]
+    except Exception:
+        return []
 
 
 class AudioRecorder:
     """
     Records audio from microphone using a separate process.
     This prevents the main UI process from freezing if the audio driver hangs.
+
+    The next recorder process is spawned in standby as soon as the previous
+    one is done, so starting a recording doesn't wait for process start-up
+    and imports.
+
+    While recording, a watchdog follows the process heartbeat (frames
+    captured, liveness ticks). If the audio driver stops delivering frames
+    or the process stops responding, on_stall is called within
+    stall_timeout so the audio captured so far can be salvaged.
     """
 
-    def __init__(self, sample_rate: int = 16000) -> None:
+    def __init__(self, sample_rate: int = 16000, capture_rate: int = 0,
+                 latency_profile: str = "balanced", xrun_recovery: bool = False,
+                 device: Union[int, str, None] = None, channels: int = 1,
+                 downmix: str = "mean", normalize: bool = False, target_rms_dbfs: float = -20.0,
+                 highpass_hz: float = 0.0, noise_reduction_db: float = 0.0, prewarm: bool = True,
+                 stall_timeout: float = 0.5, stream_start_timeout: float = 3.0,
+                 spill_dir: Optional[str] = None) -> None:
         """
         Initialize audio recorder.
 
         Args:
-            sample_rate: Audio sample rate in Hz
+            sample_rate: Sample rate of saved recordings in Hz
+            capture_rate: Rate to open the device at (0 = device native rate, resampled)
+            latency_profile: Name of a profile in LATENCY_PROFILES
+            xrun_recovery: On input overflows, raise recorder priority and
+                switch to a larger-buffer profile for the next recording
+            device: Input device index or name (None = system default)
+            channels: Channels to capture (0 = all channels of the device)
+            downmix: How to reduce channels to mono ("mean" or "beamform")
+            normalize: Remove DC offset and normalize loudness before saving
+            target_rms_dbfs: Loudness target for normalization
+            highpass_hz: High-pass cutoff in Hz (0 = off)
+            noise_reduction_db: Spectral noise gate attenuation in dB (0 = off)
+            prewarm: Keep a standby recorder process ready
+            stall_timeout: Seconds without frames/ticks before the recorder counts as stuck
+            stream_start_timeout: Seconds allowed for the device to deliver its first frames
+            spill_dir: Directory for crash-recovery spill files (None = system temp dir)
         """
         self.sample_rate: int = sample_rate
+        self.capture_rate: int = capture_rate
+        self.latency_profile: str = latency_profile
+        self.xrun_recovery: bool = xrun_recovery
+        self.device: Union[int, str, None] = device
+        self.channels: int = channels
+        self.downmix: str = downmix
+        self.normalize: bool = normalize
+        self.target_rms_dbfs: float = target_rms_dbfs
+        self.highpass_hz: float = highpass_hz
+        self.noise_reduction_db: float = noise_reduction_db
+        self.prewarm: bool = prewarm
+        self.stall_timeout: float = stall_timeout
+        self.stream_start_timeout: float = stream_start_timeout
+        self.spill_dir: Optional[str] = spill_dir
+        self.on_stall: Optional[Callable[[], None]] = None
+        self.restarts: int = 0
+        self.last_result: Optional[RecordingResult] = None
         self.process: Optional[multiprocessing.Process] = None
         self.command_queue: Optional[multiprocessing.Queue] = None
         self.result_queue: Optional[multiprocessing.Queue] = None
+        self._recording: bool = False
+        self._heartbeat = None
+        self._spill_path: Optional[str] = None
+        self._spill_rate: int = sample_rate
+        self._watchdog_stop: threading.Event = threading.Event()
+        # Serializes start, stop, spawn and release (UI, control API, watchdog and idle threads)
+        self._lock: threading.RLock = threading.RLock()
 
-    def start_recording(self) -> bool:
+        if self.prewarm:
+            self._spawn_worker()
+
+    def set_input_device(self, device: Union[int, str, None], channels: Optional[int] = None) -> None:
         """
-        Start recording audio in a separate process.
+        Select input device for the next recording.
 
-        Returns:
-            True if recording started, False if already recording
+        The standby process opens the device only when recording starts,
+        so no respawn is needed.
+
+        Args:
+            device: Device index or name (None = system default)
+            channels: Channels to capture (None = keep current setting)
         """
-        if self.is_recording():
-            return False
+        self.device = device
+        if channels is not None:
+            self.channels = channels
+
+    def configure(self, **settings) -> None:
+        """
+        Change recording settings (constructor arguments) for the next recording.
+
+        Settings are sent to the recorder process when recording starts,
+        so the standby process doesn't need a respawn.
+
+        Args:
+            **settings: e.g. sample_rate=24000, latency_profile="low-latency"
 
-        self.command_queue = multiprocessing.Queue()
-        self.result_queue = multiprocessing.Queue()
+        Raises:
+            ValueError: If a setting is unknown
+        """
+        allowed = {
+            'sample_rate', 'capture_rate', 'latency_profile', 'xrun_recovery', 'device', 'channels',
+            'downmix', 'normalize', 'target_rms_dbfs', 'highpass_hz', 'noise_reduction_db', 'stall_timeout',
+        }
+        unknown = set(settings) - allowed
+        if unknown:
+            raise ValueError(f"Unknown recorder settings: {', '.join(sorted(unknown))}")
+
+        for name, value in settings.items():
+            setattr(self, name, value)
 
+    def _spawn_worker(self) -> None:
+        """Spawn a recorder process that waits in standby for the start command."""
         # Use 'spawn' context for macOS compatibility with CoreAudio
+        # (queues must come from the same context as the process)
         ctx = multiprocessing.get_context('spawn')
+        self.command_queue = ctx.Queue()
+        self.result_queue = ctx.Queue()
+        self._heartbeat = ctx.Array('d', HEARTBEAT_SIZE, lock=False)
         self.process = ctx.Process(
             target=run_recorder,
-            args=(self.command_queue, self.result_queue, self.sample_rate),
+            args=(self.command_queue, self.result_queue, self._heartbeat),
             daemon=True
         )
         self.process.start()
 
-        if os.getenv('VERBOSE') == '1':
+        if config.verbose:
             print(f"Recording process started (PID: {self.process.pid})", flush=True)
 
-        return True
+    def _settings(self) -> RecorderSettings:
+        return RecorderSettings(
+            sample_rate=self.sample_rate,
+            capture_rate=self.capture_rate,
+            latency_profile=LATENCY_PROFILES[self.latency_profile],
+            xrun_recovery=self.xrun_recovery,
+            device=self.device,
+            channels=self.channels,
+            downmix=self.downmix,
+            normalize=self.normalize,
+            target_rms_dbfs=self.target_rms_dbfs,
+            highpass_hz=self.highpass_hz,
+            noise_reduction_db=self.noise_reduction_db,
+            spill_path=self._spill_path or "",
+            trace=tracer.enabled
+        )
+
+    def start_recording(self) -> bool:
+        """
+        Start recording audio in a separate process.
+
+        Returns:
+            True if recording started, False if already recording
+        """
+        with self._lock:
+            # A recording whose process died still needs stop_recording() to salvage it
+            if self._recording:
+                return False
+
+            self.ensure_standby()
+
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            # The rate is fixed here: configure() may change sample_rate before the recording is stopped
+            self._spill_rate = self.sample_rate
+            fd, self._spill_path = tempfile.mkstemp(prefix=f'pink-voice-{self._spill_rate}hz-', suffix='.pcm',
+                                                    dir=self.spill_dir)
+            os.close(fd)
+
+            self.command_queue.put(('start', self._settings()))
+            self._recording = True
+
+            self._watchdog_stop = threading.Event()
+            threading.Thread(target=self._watchdog, args=(self._watchdog_stop,), daemon=True).start()
+
+            return True
+
+    def ensure_standby(self) -> None:
+        """Spawn the standby process if there is none (e.g. after release_standby)."""
+        with self._lock:
+            if not (self.process and self.process.is_alive()):
+                self._spawn_worker()
+
+    def release_standby(self) -> bool:
+        """
+        Kill the standby process to free its memory while idle.
+
+        Returns:
+            True if a standby process was killed
+        """
+        with self._lock:
+            if self._recording or not self.process:
+                return False
+            self._kill_process()
+            return True
+
+    def standby_ready(self) -> bool:
+        """
+        Check if the standby process has finished starting up.
+
+        Returns:
+            True if the process is alive and its heartbeat is ticking
+        """
+        return bool(self.process and self.process.is_alive() and self._heartbeat[HEARTBEAT_TICKS])
+
+    def _watchdog(self, stop: threading.Event) -> None:
+        """Detect a stuck driver or unresponsive recorder process while recording."""
+        heartbeat = self._heartbeat
+        process = self.process
+        started = time.monotonic()
+        last_frames, frames_changed = heartbeat[HEARTBEAT_FRAMES], started
+        last_ticks, ticks_changed = heartbeat[HEARTBEAT_TICKS], started
+
+        while not stop.wait(0.1):
+            now = time.monotonic()
+            frames, ticks = heartbeat[HEARTBEAT_FRAMES], heartbeat[HEARTBEAT_TICKS]
+            if frames != last_frames:
+                last_frames, frames_changed = frames, now
+            if ticks != last_ticks:
+                if not last_ticks and not frames:
+                    # Process just finished importing; the device opens from here
+                    frames_changed = now
+                last_ticks, ticks_changed = ticks, now
+
+            # Before the first callback, allow time for the device to open
+            frames_timeout = self.stall_timeout if frames else self.stream_start_timeout
+
+            if not process.is_alive():
+                reason = "recorder process died"
+            elif not ticks:
+                # A freshly spawned process is still importing
+                if now - started < 30:
+                    continue
+                reason = "recorder process did not start"
+            elif now - ticks_changed > self.stall_timeout:
+                reason = "recorder process not responding"
+            elif now - frames_changed > frames_timeout:
+                reason = f"no audio for {now - frames_changed:.1f}s"
+            else:
+                continue
+
+            if config.verbose:
+                print(f"⚠️  Recorder stalled: {reason}", flush=True)
+            self.restarts += 1
+            metrics.inc("recorder_restarts_total")
+            if self.on_stall and not stop.is_set():
+                self.on_stall()
+            return
 
     def stop_recording(self) -> Optional[str]:
         """
         Stop recording and save audio to temporary file.
 
+        Safe to call from several threads: one stops the recording, the
+        others wait for it and get None.
+
         Returns:
             Path to temporary WAV file, or None if no audio recorded
         """
-        if not self.is_recording():
+        with self._lock:
+            return self._stop()
+
+    def _stop(self) -> Optional[str]:
+        # Also runs after the process died, to clean up and respawn
+        if not self._recording:
             return None
 
-        result = None
+        result: Optional[RecordingResult] = None
+        stop_started = time.monotonic()
+        self._watchdog_stop.set()
 
         try:
             if self.command_queue:
                 self.command_queue.put('stop')
 
-            # Wait for result while process is alive (max 30s as safety net)
-            import queue
-            deadline = time.time() + 30
+            # Wait for result while the process keeps ticking (30s cap as safety net)
+            deadline = time.monotonic() + 30
+            last_ticks, ticks_changed = self._heartbeat[HEARTBEAT_TICKS], time.monotonic()
 
-            while self.process and self.process.is_alive() and time.time() < deadline:
+            while self.process and self.process.is_alive() and time.monotonic() < deadline:
                 try:
                     result = self.result_queue.get(timeout=0.1)
                     break
                 except queue.Empty:
-                    continue
+                    pass
+
+                ticks = self._heartbeat[HEARTBEAT_TICKS]
+                if ticks != last_ticks:
+                    last_ticks, ticks_changed = ticks, time.monotonic()
+                elif time.monotonic() - ticks_changed > self.stall_timeout:
+                    if config.verbose:
+                        print("⚠️  Recorder not responding, giving up", flush=True)
+                    self.restarts += 1
+                    metrics.inc("recorder_restarts_total")
+                    break
 
-            if result is None and time.time() >= deadline:
-                if os.getenv('VERBOSE') == '1':
-                    print("⚠️  30s timeout waiting for recorder", flush=True)
+            # The process may have exited right after sending its result
+            if result is None and self.result_queue and not (self.process and self.process.is_alive()):
+                try:
+                    result = self.result_queue.get(timeout=0.2)
+                except queue.Empty:
+                    pass
 
         finally:
             self._kill_process()
+            if self.prewarm:
+                self.ensure_standby()
+
+        # Recorder crashed or was killed: recover what it spilled to disk
+        if result is None and self._spill_path:
+            result = self._salvage_spill(self._spill_path, self._spill_rate)
+
+        if self._spill_path:
+            try:
+                os.unlink(self._spill_path)
+            except OSError:
+                pass
+            self._spill_path = None
+
+        self.last_result = result
+        if tracer.enabled:
+            self._trace(result, time.monotonic() - stop_started)
+        if result:
+            metrics.inc("recordings_total")
+            metrics.observe("recording_seconds", result.frames / result.sample_rate)
+            metrics.inc("xruns_total", len(result.overflows), kind="overflow")
+            metrics.inc("xruns_total", len(result.underflows), kind="underflow")
+        if result and result.overflows and self.xrun_recovery:
+            self._enlarge_buffers()
+
+        return result.path if result else None
+
+    @staticmethod
+    def _trace(result: Optional[RecordingResult], stop_seconds: float) -> None:
+        """Record a finished recording and its callback timing in the session trace."""
+        if result is None:
+            tracer.event("recording", frames=0, stop_seconds=round(stop_seconds, 6))
+            return
+        tracer.event(
+            "recording",
+            frames=result.frames,
+            sample_rate=result.sample_rate,
+            capture_rate=result.capture_rate,
+            channels=result.channels,
+            device=result.device,
+            latency_profile=result.latency_profile,
+            callbacks=[[tracer.relative(at), frames] for at, frames in result.callback_times],
+            overflows=result.overflows,
+            underflows=result.underflows,
+            input_rms_dbfs=result.input_rms_dbfs,
+            speech_seconds=result.speech_seconds,
+            preprocess_seconds=result.preprocess_seconds,
+            salvaged=result.salvaged,
+            stop_seconds=round(stop_seconds, 6),
+        )
+
+    @staticmethod
+    def _salvage_spill(spill_path: str, sample_rate: int) -> Optional[RecordingResult]:
+        """
+        Turn a spill file (raw int16 mono PCM) into a WAV file.
+
+        Args:
+            spill_path: Spill file path
+            sample_rate: Sample rate of the spilled audio
+
+        Returns:
+            RecordingResult marked as salvaged, or None if nothing was spilled
+        """
+        try:
+            size = os.path.getsize(spill_path)
+        except OSError:
+            return None
+        if size < 2:
+            return None
+
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
+            wav_path: str = tmp.name
+
+        with open(spill_path, 'rb') as spill, wave.open(wav_path, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            remaining = size - size % 2
+            while remaining:
+                chunk = spill.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                wav.writeframes(chunk)
+                remaining -= len(chunk)
+
+        if config.verbose:
+            print(f"⚠️  Recorder crashed, salvaged {size / 2 / sample_rate:.1f}s of audio", flush=True)
+
+        return RecordingResult(
+            path=wav_path,
+            sample_rate=sample_rate,
+            capture_rate=0,
+            frames=size // 2,
+            salvaged=True
+        )
+
+    def salvage_orphaned_spills(self) -> List[str]:
+        """
+        Turn spill files left by a crashed Pink Voice process into WAV files.
+
+        Call at start-up, before the first recording.
+
+        Returns:
+            Paths of the salvaged WAV files, oldest first
+        """
+        if not self.spill_dir:
+            return []
+        try:
+            names = os.listdir(self.spill_dir)
+        except OSError:
+            return []
+
+        spills = []
+        for name in names:
+            match = _SPILL_NAME.fullmatch(name)
+            path = os.path.join(self.spill_dir, name)
+            if match and path != self._spill_path:
+                try:
+                    spills.append((os.path.getmtime(path), path, int(match.group(1))))
+                except OSError:
+                    pass
 
-        return result
+        salvaged = []
+        for _, path, sample_rate in sorted(spills):
+            try:
+                result = self._salvage_spill(path, sample_rate)
+                os.unlink(path)
+            except OSError as e:
+                print(f"⚠️  Could not salvage {path}: {e}", flush=True)
+                continue
+            if result:
+                salvaged.append(result.path)
+        return salvaged
+
+    def shutdown(self) -> None:
+        """Stop any recording and kill the standby process."""
+        self.prewarm = False
+        if self.is_recording():
+            self.stop_recording()
+        self._kill_process()
+
+    def _enlarge_buffers(self) -> None:
+        """Move to the next larger-buffer latency profile after overflows."""
+        names = list(LATENCY_PROFILES)
+        index = names.index(self.latency_profile)
+        if index + 1 < len(names):
+            self.latency_profile = names[index + 1]
+            if config.verbose:
+                print(f"⚠️  Input overflows, switching to '{self.latency_profile}' latency profile", flush=True)
 
     def _kill_process(self) -> None:
         """Force kill the recording process."""
         if self.process:
             if self.process.is_alive():
-                if os.getenv('VERBOSE') == '1':
+                if config.verbose:
                     print(f"Force killing recorder process (PID: {self.process.pid})", flush=True)
-                
+
                 self.process.terminate()
                 # Give it a tiny bit of time to die gracefully
                 self.process.join(timeout=0.1)
-                
+
                 # If still alive, kill hard
                 if self.process.is_alive():
                     self.process.kill()
-            
+
             self.process = None
             self.command_queue = None
             self.result_queue = None
+        self._recording = False
+
+    def diagnose(self, action: str, seconds: Optional[float] = None) -> bool:
+        """
+        Ask the recorder process for diagnostics (see diagnostics.py).
+
+        Args:
+            action: Diagnostics action, e.g. 'stacks'
+            seconds: Profile duration for 'profile'
+
+        Returns:
+            False if there is no recorder process (e.g. released while idle)
+        """
+        command_queue = self.command_queue
+        if command_queue is None or not (self.process and self.process.is_alive()):
+            return False
+        command_queue.put(('diag', action, seconds))
+        return True
+
+    def is_started(self) -> bool:
+        """
+        Check if a recording was started and not yet stopped.
+
+        Unlike is_recording(), stays True after the recorder process died,
+        until stop_recording() has salvaged what it captured.
+
+        Returns:
+            True between start_recording() and stop_recording()
+        """
+        return self._recording
 
     def is_recording(self) -> bool:
         """
         Check if currently recording.
 
         Returns:
-            True if recording process is alive
+            True if a recording was started and its process is alive
         """
-        return self.process is not None and self.process.is_alive()
+        return self._recording and self.process is not None and self.process.is_alive()
@@ -3,101 +3,518 @@ Isolated recording process module.
 Runs in a separate process to prevent audio driver hangs from freezing the main UI.
 """
 
+import math
+import multiprocessing
 import os
 import queue
 import sys
 import tempfile
+import threading
 import time
 import traceback
+from dataclasses import dataclass, field
 from multiprocessing import Queue
-from typing import Optional
+from typing import BinaryIO, Iterator, Optional, Union
 
 import numpy as np
 import sounddevice as sd
-from scipy.io import wavfile
 
+from pink_voice.config import LATENCY_PROFILES, LatencyProfile, config
+from pink_voice.core import diagnostics
+from pink_voice.core.dsp import (Downmixer, HighPassFilter, LoudnessNormalizer, SpectralGate, SpeechActivity,
+                                 StreamingResampler)
+from pink_voice.core.wav import WavWriter
 
-def run_recorder(command_queue: Queue, result_queue: Queue, sample_rate: int = 16000) -> None:
+
+# Cap on traced callbacks per recording (about 20 minutes at 20ms blocks)
+MAX_TRACED_CALLBACKS = 60000
+
+
+@dataclass
+class RecorderSettings:
+    """Per-recording settings, sent with the 'start' command."""
+
+    sample_rate: int = 16000
+    capture_rate: int = 0  # 0 = device native rate
+    latency_profile: LatencyProfile = LATENCY_PROFILES['balanced']
+    xrun_recovery: bool = False
+    device: Union[int, str, None] = None  # index, name substring, or None for default
+    channels: int = 1  # 0 = all channels of the device
+    downmix: str = "mean"
+    normalize: bool = False
+    target_rms_dbfs: float = -20.0
+    highpass_hz: float = 0.0  # 0 = off
+    noise_reduction_db: float = 0.0  # 0 = off
+    spill_path: str = ""  # raw PCM copy for crash recovery ("" = off)
+    spill_interval: float = 0.5
+    trace: bool = False  # record callback times (see core/trace.py)
+
+
+@dataclass
+class RecordingResult:
+    """Result sent back to the main process when recording stops."""
+
+    path: str
+    sample_rate: int
+    capture_rate: int
+    frames: int
+    device: str = ""
+    channels: int = 1
+    resample_seconds: float = 0.0
+    latency_profile: str = ""
+    callbacks: int = 0
+    cpu_seconds: float = 0.0
+    # Capture-rate sample positions where the driver reported dropped input
+    overflows: list[int] = field(default_factory=list)
+    underflows: list[int] = field(default_factory=list)
+    priority_raised: bool = False
+    input_rms_dbfs: float = 0.0
+    gain_db: float = 0.0
+    preprocess_seconds: float = 0.0
+    salvaged: bool = False  # recovered from the spill file after a crash
+    speech_seconds: Optional[float] = None  # None = not measured
+    # (time.monotonic(), frames) per audio callback, if tracing
+    callback_times: list[tuple[float, int]] = field(default_factory=list)
+
+    @property
+    def xruns(self) -> int:
+        """Total number of overflow/underflow events."""
+        return len(self.overflows) + len(self.underflows)
+
+    @property
+    def cpu_per_minute(self) -> float:
+        """Recorder process CPU seconds per recorded minute."""
+        minutes = self.frames / self.sample_rate / 60 if self.sample_rate else 0
+        return self.cpu_seconds / minutes if minutes else 0.0
+
+
+class PcmBuffer:
+    """
+    Growable int16 buffer made of fixed-size pages.
+
+    Appending never moves recorded audio; a new page is allocated only
+    when the current one is full.
+    """
+
+    def __init__(self, page_frames: int) -> None:
+        """
+        Initialize buffer.
+
+        Args:
+            page_frames: Number of samples per page
+        """
+        self.page_frames: int = max(page_frames, 1)
+        self.pages: list[np.ndarray] = []
+        self.frames: int = 0
+
+    def append(self, samples: np.ndarray) -> None:
+        """
+        Append samples.
+
+        Args:
+            samples: int16 samples
+        """
+        offset = 0
+        while offset < len(samples):
+            used = self.frames % self.page_frames
+            if used == 0 and self.frames == len(self.pages) * self.page_frames:
+                self.pages.append(np.empty(self.page_frames, dtype=np.int16))
+
+            count = min(self.page_frames - used, len(samples) - offset)
+            self.pages[-1][used:used + count] = samples[offset:offset + count]
+            offset += count
+            self.frames += count
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        """
+        Iterate over filled parts of pages (views, not copies).
+
+        Returns:
+            Iterator of int16 arrays
+        """
+        remaining = self.frames
+        for page in self.pages:
+            if remaining <= 0:
+                break
+            yield page[:min(remaining, self.page_frames)]
+            remaining -= self.page_frames
+
+
+class CapturePipeline:
+    """
+    Processing from audio callback blocks to the stored recording.
+
+    Downmix, resample, high-pass and noise gate, then level and speech
+    measurement, the page buffer and the spill file. Runs on the pipeline
+    thread while recording; `pink-voice replay` feeds it synthetic blocks.
+    """
+
+    def __init__(self, settings: RecorderSettings, capture_rate: int, channels: int,
+                 spill: Optional[BinaryIO] = None) -> None:
+        """
+        Set up the stages for one recording.
+
+        Args:
+            settings: Recording settings
+            capture_rate: Device sample rate
+            channels: Device channels
+            spill: File receiving a raw copy of everything stored (crash recovery)
+        """
+        self.settings: RecorderSettings = settings
+        self.downmixer = Downmixer(channels, settings.downmix, capture_rate)
+        self.resampler = None
+        if capture_rate != settings.sample_rate:
+            self.resampler = StreamingResampler(capture_rate, settings.sample_rate)
+        self.highpass = HighPassFilter(settings.sample_rate, settings.highpass_hz) if settings.highpass_hz > 0 else None
+        self.gate = SpectralGate(settings.sample_rate, settings.noise_reduction_db) \
+            if settings.noise_reduction_db > 0 else None
+        # Always measures the input level (routes use it); the gain is applied only when normalizing
+        self.normalizer = LoudnessNormalizer(settings.target_rms_dbfs)
+        self.activity = SpeechActivity(settings.sample_rate)
+        self.buffer = PcmBuffer(int(settings.latency_profile.page_seconds * settings.sample_rate))
+        self.spill: Optional[BinaryIO] = spill
+        self.filter_seconds: float = 0.0
+        self._last_flush: float = time.monotonic()
+
+    def process(self, block: np.ndarray) -> None:
+        """
+        Process one callback block.
+
+        Args:
+            block: int16 frames x channels at the capture rate
+        """
+        samples = self.downmixer.process(block)
+        self._store(self.resampler.process(samples) if self.resampler else samples)
+
+    def finish(self) -> None:
+        """Flush the stages' remaining samples and close the spill file."""
+        if self.resampler:
+            self._store(self.resampler.flush())
+        if self.gate:
+            self._keep(self.gate.flush())
+        if self.spill:
+            self.spill.close()
+
+    def _store(self, samples: np.ndarray) -> None:
+        if self.highpass:
+            started = time.perf_counter()
+            samples = self.highpass.process(samples)
+            self.filter_seconds += time.perf_counter() - started
+        # The gate holds back less than one STFT frame, the rest is processed while recording
+        self._keep(self.gate.process(samples) if self.gate else samples)
+
+    def _keep(self, samples: np.ndarray) -> None:
+        self.normalizer.observe(samples)
+        self.activity.observe(samples)
+        self.buffer.append(samples)
+
+        if self.spill:
+            self.spill.write(samples.tobytes())
+            if time.monotonic() - self._last_flush >= self.settings.spill_interval:
+                self.spill.flush()
+                self._last_flush = time.monotonic()
+
+    @property
+    def preprocess_seconds(self) -> float:
+        """Time spent filtering, gating and normalizing."""
+        return self.filter_seconds + self.normalizer.seconds + (self.gate.seconds if self.gate else 0.0)
+
+    def normalize(self) -> None:
+        """One in-place pass over the recording: DC removal, gain, limiter."""
+        if self.settings.normalize:
+            self.normalizer.apply(self.buffer.chunks())
+
+    def save(self, path: str) -> None:
+        """
+        Write the recording to a WAV file page by page (no contiguous copy).
+
+        Args:
+            path: Output path
+        """
+        with WavWriter(path, self.settings.sample_rate) as wav:
+            for chunk in self.buffer.chunks():
+                wav.write(chunk)
+
+
+def _refresh_devices() -> None:
+    """
+    Re-scan audio devices; PortAudio lists them only when it initializes.
+
+    This relies on sounddevice's private _terminate/_initialize. Without
+    them the list stays as it was when the worker spawned, which is still
+    correct for every recording after the next one: each recording gets a
+    fresh worker.
+    """
+    terminate = getattr(sd, '_terminate', None)
+    initialize = getattr(sd, '_initialize', None)
+    if not (callable(terminate) and callable(initialize)):
+        return
+    try:
+        terminate()
+    except Exception as e:
+        # Still initialized, with the old device list
+        if config.verbose:
+            print(f"[RecorderProcess] Device re-scan skipped: {e}", flush=True)
+        return
+    # Terminated: PortAudio must come back up or nothing can record
+    initialize()
+
+
+def _resolve_device(device: Union[int, str, None]) -> Optional[int]:
+    """
+    Resolve device index from index or (partial, case-insensitive) name.
+
+    Raises:
+        ValueError: If no input device matches
+    """
+    if device is None or device == '':
+        return None
+    if isinstance(device, int) or str(device).isdigit():
+        return int(device)
+
+    wanted = str(device).lower()
+    for index, info in enumerate(sd.query_devices()):
+        if info['max_input_channels'] > 0 and wanted in info['name'].lower():
+            return index
+    raise ValueError(f"No input device matching '{device}'")
+
+
+def _raise_priority() -> bool:
+    """Raise recorder process priority after an overflow. Returns True on success."""
+    try:
+        import psutil
+        process = psutil.Process()
+        if sys.platform == 'win32':
+            process.nice(psutil.HIGH_PRIORITY_CLASS)
+        else:
+            process.nice(-10)
+        return True
+    except Exception:
+        # Usually not permitted for unprivileged users on POSIX
+        return False
+
+
+# Heartbeat slots shared with the main process (see AudioRecorder watchdog)
+HEARTBEAT_FRAMES = 0    # frames delivered by the audio callback
+HEARTBEAT_CALLBACK = 1  # time.monotonic() of the last callback
+HEARTBEAT_TICKS = 2     # incremented while the process is responsive
+HEARTBEAT_SIZE = 3
+
+
+def _start_ticker(heartbeat, interval: float = 0.05) -> None:
+    """Increment the tick slot from a daemon thread so the parent can tell we're alive."""
+    def tick() -> None:
+        while True:
+            heartbeat[HEARTBEAT_TICKS] += 1
+            time.sleep(interval)
+
+    threading.Thread(target=tick, daemon=True).start()
+
+
+def run_recorder(command_queue: Queue, result_queue: Queue, heartbeat=None) -> None:
     """
     Main loop for the recording process.
-    
+
+    The process is spawned ahead of time and waits in standby with its
+    imports loaded until it receives ('start', RecorderSettings). Device and
+    format are chosen at that point, so switching devices between
+    recordings never needs a new process.
+
     Args:
-        command_queue: Queue to receive commands ('stop')
-        result_queue: Queue to send results (file path or error)
-        sample_rate: Audio sample rate
+        command_queue: Queue to receive commands (('start', settings), 'stop', 'exit', ('diag', action, seconds))
+        result_queue: Queue to send results (RecordingResult or None)
+        heartbeat: Shared array of HEARTBEAT_SIZE doubles (frames, last callback, ticks)
     """
     # Redirect output for debugging if needed
-    if os.getenv('VERBOSE') == '1':
+    if config.verbose:
         print(f"[RecorderProcess] Started (PID: {os.getpid()})", flush=True)
 
+    if heartbeat is None:
+        heartbeat = [0.0] * HEARTBEAT_SIZE
+    _start_ticker(heartbeat)
+    diagnostics.install_signal_handlers('recorder')
+
+    # Standby: wait for start command, exit if the main process went away
+    parent = multiprocessing.parent_process()
+    while True:
+        try:
+            cmd = command_queue.get(timeout=1.0)
+        except queue.Empty:
+            if parent is not None and not parent.is_alive():
+                return
+            continue
+        if cmd == 'exit':
+            return
+        if isinstance(cmd, tuple) and cmd[0] == 'diag':
+            diagnostics.request(cmd[1], cmd[2])
+        if isinstance(cmd, tuple) and cmd[0] == 'start':
+            settings: RecorderSettings = cmd[1]
+            break
+
+    try:
+        _record(settings, command_queue, result_queue, heartbeat)
+    except Exception as e:
+        error_msg = f"Recorder process error: {str(e)}\n{traceback.format_exc()}"
+        print(error_msg, file=sys.stderr)
+        result_queue.put(None)
+
+
+def _record(settings: RecorderSettings, command_queue: Queue, result_queue: Queue, heartbeat) -> None:
+    """Record one utterance with the given settings and send the result."""
+    profile = settings.latency_profile
+    sample_rate = settings.sample_rate
+
+    # Pick up devices plugged in (or default changed) while in standby
+    _refresh_devices()
+
+    device = _resolve_device(settings.device)
+    device_info = sd.query_devices(device, kind='input')
+    capture_rate = settings.capture_rate or int(device_info['default_samplerate'])
+    channels = settings.channels or int(device_info['max_input_channels'])
+
     audio_queue: queue.Queue = queue.Queue()
     recording: bool = False
     stream: Optional[sd.InputStream] = None
+    callbacks: int = 0
+    captured: int = 0
+    overflows: list[int] = []
+    underflows: list[int] = []
+    # Callback arrival times and block sizes, for the trace recorder
+    callback_times: Optional[list[tuple[float, int]]] = [] if settings.trace else None
 
     def audio_callback(indata: np.ndarray, frames: int, time_info: dict, status: sd.CallbackFlags) -> None:
         """Audio callback running in PortAudio thread."""
+        nonlocal callbacks, captured
+        now = time.monotonic()
+        callbacks += 1
+        if callback_times is not None and len(callback_times) < MAX_TRACED_CALLBACKS:
+            callback_times.append((now, frames))
+        # Only count here - printing from the audio thread makes overflows worse
         if status:
-            print(f"[RecorderProcess] Audio status: {status}", file=sys.stderr)
+            if status.input_overflow:
+                overflows.append(captured)
+            if status.input_underflow:
+                underflows.append(captured)
+        captured += frames
+        heartbeat[HEARTBEAT_FRAMES] = captured
+        heartbeat[HEARTBEAT_CALLBACK] = now
         if recording:
             audio_queue.put(indata.copy())
 
-    try:
-        # Start recording immediately upon process start
-        recording = True
-        stream = sd.InputStream(
-            samplerate=sample_rate,
-            channels=1,
-            dtype='int16',
-            callback=audio_callback
-        )
-        stream.start()
-        
-        if os.getenv('VERBOSE') == '1':
-            print("[RecorderProcess] Stream started", flush=True)
-
-        # Event loop waiting for stop command
+    # Crash safety: everything stored is also appended to the spill file and
+    # flushed to the OS regularly, so it survives the process being killed
+    spill = open(settings.spill_path, 'wb') if settings.spill_path else None
+
+    # Background stage: downmixes and converts blocks to the target rate while recording
+    capture = CapturePipeline(settings, capture_rate, channels, spill)
+
+    def pipeline() -> None:
         while True:
-            try:
-                # Check for commands (non-blocking)
-                cmd = command_queue.get(timeout=0.1)
-                
-                if cmd == 'stop':
-                    if os.getenv('VERBOSE') == '1':
-                        print("[RecorderProcess] Stop received", flush=True)
-                    break
-            except queue.Empty:
-                continue
-
-        # Stop callback from adding more data
-        recording = False
-        time.sleep(0.05)  # Let current callback finish
-
-        # Collect audio data BEFORE stopping stream (stop can hang on CoreAudio)
-        audio_data: list[np.ndarray] = []
-        while not audio_queue.empty():
-            audio_data.append(audio_queue.get())
-
-        if not audio_data:
-            result_queue.put(None)
-            return
+            block = audio_queue.get()
+            if block is None:
+                break
+            capture.process(block)
 
-        # Save to file
-        audio: np.ndarray = np.concatenate(audio_data, axis=0)
+    pipeline_thread = threading.Thread(target=pipeline, daemon=True)
 
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
-            tmp_path: str = tmp.name
-            wavfile.write(tmp_path, sample_rate, audio)
+    recording = True
+    pipeline_thread.start()
+    stream = sd.InputStream(
+        device=device,
+        samplerate=capture_rate,
+        blocksize=int(profile.block_seconds * capture_rate),
+        latency=profile.latency,
+        channels=channels,
+        dtype='int16',
+        callback=audio_callback
+    )
+    stream.start()
+    cpu_started = time.process_time()
 
-        if os.getenv('VERBOSE') == '1':
-            print(f"[RecorderProcess] Saved to {tmp_path}", flush=True)
+    if config.verbose:
+        print(f"[RecorderProcess] Stream started on '{device_info['name']}' ({channels} ch, "
+              f"{capture_rate} Hz -> {sample_rate} Hz, profile {profile.name})", flush=True)
 
-        # Send result - process will be killed after this, no need to clean up stream
-        result_queue.put(tmp_path)
+    # Event loop waiting for stop command
+    priority_raised = False
+    while True:
+        if settings.xrun_recovery and overflows and not priority_raised:
+            priority_raised = _raise_priority()
+            if config.verbose:
+                print(f"[RecorderProcess] Overflow detected, priority raised: {priority_raised}", flush=True)
 
-        # Don't call close() - it can hang on CoreAudio
-        # Process will be killed by main thread, OS will clean up resources
+        try:
+            # Check for commands (non-blocking)
+            cmd = command_queue.get(timeout=0.1)
 
-    except Exception as e:
-        error_msg = f"Recorder process error: {str(e)}\n{traceback.format_exc()}"
-        print(error_msg, file=sys.stderr)
+            if cmd == 'stop':
+                if config.verbose:
+                    print("[RecorderProcess] Stop received", flush=True)
+                break
+            if isinstance(cmd, tuple) and cmd[0] == 'diag':
+                diagnostics.request(cmd[1], cmd[2])
+        except queue.Empty:
+            continue
+
+    # Stop callback from adding more data
+    recording = False
+    time.sleep(0.05)  # Let current callback finish
+
+    # Collect audio data BEFORE stopping stream (stop can hang on CoreAudio)
+    audio_queue.put(None)
+    pipeline_thread.join()
+    capture.finish()
+    buffer, resampler, normalizer = capture.buffer, capture.resampler, capture.normalizer
+
+    if not buffer.frames:
         result_queue.put(None)
+        return
+
+    capture.normalize()
+    cpu_seconds = time.process_time() - cpu_started
+
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp:
+        tmp_path: str = tmp.name
+    capture.save(tmp_path)
+
+    result = RecordingResult(
+        path=tmp_path,
+        sample_rate=sample_rate,
+        capture_rate=capture_rate,
+        frames=buffer.frames,
+        device=device_info['name'],
+        channels=channels,
+        resample_seconds=resampler.seconds if resampler else 0.0,
+        latency_profile=profile.name,
+        callbacks=callbacks,
+        cpu_seconds=cpu_seconds,
+        overflows=list(overflows),
+        underflows=list(underflows),
+        priority_raised=priority_raised,
+        input_rms_dbfs=normalizer.rms_dbfs,
+        gain_db=20 * math.log10(normalizer.gain),
+        preprocess_seconds=capture.preprocess_seconds,
+        speech_seconds=capture.activity.speech_seconds,
+        callback_times=callback_times or [],
+    )
+
+    if config.verbose:
+        print(f"[RecorderProcess] Saved to {tmp_path}", flush=True)
+        if resampler:
+            audio_seconds = buffer.frames / sample_rate
+            print(f"[RecorderProcess] Resampling took {result.resample_seconds * 1000:.1f} ms "
+                  f"for {audio_seconds:.1f}s of audio", flush=True)
+        if settings.normalize:
+            print(f"[RecorderProcess] Input {result.input_rms_dbfs:.1f} dBFS, gain {result.gain_db:+.1f} dB, "
+                  f"preprocessing {result.preprocess_seconds * 1000:.1f} ms", flush=True)
+        print(f"[RecorderProcess] {callbacks} callbacks, "
+              f"{result.cpu_per_minute:.2f} CPU s per recorded minute", flush=True)
+        if result.xruns:
+            print(f"[RecorderProcess] ⚠️  {len(overflows)} overflow(s), {len(underflows)} underflow(s) "
+                  f"at samples {(overflows + underflows)[:10]}", flush=True)
+
+    # Send result - process will be killed after this, no need to clean up stream
+    result_queue.put(result)
+
+    # Don't call close() - it can hang on CoreAudio
+    # Process will be killed by main thread, OS will clean up resources
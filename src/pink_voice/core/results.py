@@ -0,0 +1,224 @@
+"""
+Structured transcription results.
+
+Backends that support it return JSON lines instead of plain text. The
+format is negotiated once per transport:
+
+    pink-transcriber --capabilities
+    {"formats": ["text", "jsonl"]}
+
+A transcriber without --capabilities (it exits non-zero) gets plain-text
+requests. With `--format jsonl`, each output line is one segment:
+
+    {"start": 0.0, "end": 1.8, "text": "Hello world.", "confidence": 0.94,
+     "words": [{"word": "Hello", "start": 0.0, "end": 0.5, "confidence": 0.97}, ...]}
+
+Only "text" is required. Output that doesn't parse as segments is used
+as plain text, so a backend that ignores --format still works.
+"""
+
+import bisect
+import json
+from dataclasses import asdict, dataclass, field, replace
+from typing import List, Optional
+
+FORMATS = ("text", "jsonl")
+
+
+@dataclass
+class Word:
+    """A word with its position in the audio."""
+
+    word: str
+    start: float
+    end: float
+    confidence: Optional[float] = None
+
+
+@dataclass
+class Segment:
+    """A stretch of transcript (usually a sentence)."""
+
+    text: str
+    start: Optional[float] = None
+    end: Optional[float] = None
+    confidence: Optional[float] = None
+    words: List[Word] = field(default_factory=list)
+
+
+@dataclass
+class TranscriptionResult:
+    """Transcript with optional timings and confidence."""
+
+    text: str
+    segments: List[Segment] = field(default_factory=list)
+    format: str = "text"
+
+    def low_confidence(self, threshold: float) -> List[int]:
+        """
+        Segments worth re-transcribing.
+
+        Args:
+            threshold: Confidence below which a segment counts as uncertain
+
+        Returns:
+            Indexes of timed segments with confidence below threshold
+        """
+        return [
+            index for index, segment in enumerate(self.segments)
+            if segment.confidence is not None and segment.confidence < threshold
+            and segment.start is not None and segment.end is not None
+        ]
+
+    def replace_segment(self, index: int, text: str) -> None:
+        """
+        Swap in new text for a segment and rebuild the full text.
+
+        Args:
+            index: Segment index
+            text: New segment text (its words are dropped, timings no longer apply)
+        """
+        segment = self.segments[index]
+        segment.text = text
+        segment.words = []
+        self.text = _join(segment.text for segment in self.segments)
+
+    def to_jsonl(self) -> str:
+        """
+        Render in the transcriber output format.
+
+        Returns:
+            One JSON segment per line (a single untimed segment for plain-text results)
+        """
+        if not self.segments:
+            return json.dumps({"text": self.text}) if self.text else ""
+        return "\n".join(json.dumps(asdict(segment)) for segment in self.segments)
+
+
+def _join(texts) -> str:
+    return " ".join(text.strip() for text in texts if text.strip())
+
+
+def _number(value) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def parse_result(output: str) -> TranscriptionResult:
+    """
+    Parse transcriber output.
+
+    Args:
+        output: JSON lines of segments, or plain text
+
+    Returns:
+        Result (format "text" if the output isn't JSON lines)
+    """
+    lines = [line for line in output.splitlines() if line.strip()]
+    segments: List[Segment] = []
+
+    for line in lines:
+        try:
+            item = json.loads(line)
+        except ValueError:
+            return TranscriptionResult(text=output.strip())
+        if not isinstance(item, dict) or not isinstance(item.get("text"), str):
+            return TranscriptionResult(text=output.strip())
+
+        words = [
+            Word(str(word.get("word", "")), _number(word.get("start")) or 0.0, _number(word.get("end")) or 0.0,
+                 _number(word.get("confidence")))
+            for word in item.get("words") or [] if isinstance(word, dict)
+        ]
+        segments.append(Segment(
+            text=item["text"],
+            start=_number(item.get("start")),
+            end=_number(item.get("end")),
+            confidence=_number(item.get("confidence")),
+            words=words,
+        ))
+
+    if not segments:
+        return TranscriptionResult(text=output.strip())
+    return TranscriptionResult(text=_join(segment.text for segment in segments), segments=segments, format="jsonl")
+
+
+def parse_capabilities(output: str) -> List[str]:
+    """
+    Result formats a transcriber offers.
+
+    Args:
+        output: Output of `--capabilities`
+
+    Returns:
+        Known formats it supports (always includes "text")
+    """
+    try:
+        offered = json.loads(output).get("formats", [])
+    except (ValueError, AttributeError):
+        offered = []
+    return ["text"] + [name for name in FORMATS if name != "text" and name in offered]
+
+
+def _shift(segment: Segment, offset: float, words: Optional[List[Word]] = None) -> Segment:
+    """Copy of a segment moved earlier by offset, optionally restricted to some of its words."""
+    words = segment.words if words is None else words
+    moved = [replace(word, start=max(word.start - offset, 0.0), end=max(word.end - offset, 0.0)) for word in words]
+    if words is segment.words:
+        start, end, text = segment.start, segment.end, segment.text
+    else:
+        start, end, text = words[0].start, words[-1].end, " ".join(word.word.strip() for word in words)
+    return replace(
+        segment,
+        text=text,
+        start=None if start is None else max(start - offset, 0.0),
+        end=None if end is None else max(end - offset, 0.0),
+        words=moved,
+    )
+
+
+def split_result(result: TranscriptionResult, starts: List[float]) -> List[TranscriptionResult]:
+    """
+    Split the result for several clips transcribed as one joined file.
+
+    Words go to the clip their middle falls in; segments without word
+    timings go whole, by their middle. Timings are made relative to each clip.
+
+    Args:
+        result: Result for the joined audio
+        starts: Start of each clip in the joined audio, ascending
+
+    Returns:
+        One result per clip
+    """
+    def owner(start: Optional[float], end: Optional[float]) -> int:
+        if start is None:
+            return 0
+        middle = (start + (end if end is not None else start)) / 2
+        return max(bisect.bisect_right(starts, middle) - 1, 0)
+
+    parts: List[List[Segment]] = [[] for _ in starts]
+    last = 0
+    for segment in result.segments:
+        timed = [word for word in segment.words if word.end > word.start]
+        if timed and len(timed) == len(segment.words):
+            groups: List[List[Word]] = []
+            owners: List[int] = []
+            for word in timed:
+                index = owner(word.start, word.end)
+                if not owners or owners[-1] != index:
+                    groups.append([])
+                    owners.append(index)
+                groups[-1].append(word)
+            for index, words in zip(owners, groups):
+                parts[index].append(_shift(segment, starts[index], words))
+            last = owners[-1]
+        else:
+            # Untimed segments stay with the clip before them
+            index = owner(segment.start, segment.end) if segment.start is not None else last
+            parts[index].append(_shift(segment, starts[index]))
+            last = index
+
+    return [
+        TranscriptionResult(text=_join(segment.text for segment in segments), segments=segments, format=result.format)
+        for segments in parts
+    ]
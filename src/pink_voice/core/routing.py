@@ -0,0 +1,154 @@
+"""
+Routing clips to transcription profiles.
+
+Each route names a profile and the extra arguments it passes to the
+transcriber (e.g. a small fast model for short commands, a large one for
+long dictation). The first route whose limits the clip fits is used; a
+route without limits matches everything:
+
+    [[routes]]
+    name = "fast"
+    max_seconds = 6
+    args = ["--model", "base.en"]
+
+    [[routes]]
+    name = "accurate"
+    args = ["--model", "large-v3"]
+
+Clip duration and speech time are measured by the recorder while
+recording (see dsp.SpeechActivity); for other files the WAV header gives
+the duration.
+"""
+
+import wave
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from pink_voice.config import config
+
+
+@dataclass(frozen=True)
+class ClipStats:
+    """What routing knows about a clip."""
+
+    duration: float
+    speech_seconds: Optional[float] = None  # None = not measured
+    rms_dbfs: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class Route:
+    """A transcription profile and the clips it takes."""
+
+    name: str
+    args: Tuple[str, ...] = ()
+    max_seconds: Optional[float] = None  # clip duration
+    max_speech_seconds: Optional[float] = None  # speech within the clip
+    min_rms_dbfs: Optional[float] = None  # quieter clips go to a later route
+
+    def matches(self, clip: ClipStats) -> bool:
+        """
+        Check whether the clip is within this route's limits.
+
+        Args:
+            clip: Clip statistics
+
+        Returns:
+            True if the route takes the clip
+        """
+        if self.max_seconds is not None and clip.duration > self.max_seconds:
+            return False
+        if self.max_speech_seconds is not None:
+            speech = clip.speech_seconds if clip.speech_seconds is not None else clip.duration
+            if speech > self.max_speech_seconds:
+                return False
+        if self.min_rms_dbfs is not None and clip.rms_dbfs is not None and clip.rms_dbfs < self.min_rms_dbfs:
+            return False
+        return True
+
+
+def _route_from_dict(entry: Dict[str, Any]) -> Route:
+    """
+    Build a route from a config entry.
+
+    Raises:
+        ValueError: If the entry has no name or a bad value
+    """
+    name = str(entry.get('name', '')).strip()
+    if not name:
+        raise ValueError("route without a name")
+
+    args = entry.get('args', [])
+    if isinstance(args, str):
+        args = args.split()
+
+    def limit(key: str) -> Optional[float]:
+        value = entry.get(key)
+        return None if value is None else float(value)
+
+    return Route(
+        name=name,
+        args=tuple(str(arg) for arg in args),
+        max_seconds=limit('max_seconds'),
+        max_speech_seconds=limit('max_speech_seconds'),
+        min_rms_dbfs=limit('min_rms_dbfs'),
+    )
+
+
+def configured_routes() -> List[Route]:
+    """
+    Routes from config, in order. Invalid entries are reported and skipped.
+
+    Returns:
+        Routes (empty = routing off)
+    """
+    routes: List[Route] = []
+    for entry in config.routes:
+        try:
+            routes.append(_route_from_dict(entry))
+        except (TypeError, ValueError) as e:
+            print(f"⚠️  Config: ignoring route {entry.get('name', '?')!r}: {e}", flush=True)
+    return routes
+
+
+def clip_stats(audio_path: str, recording=None) -> ClipStats:
+    """
+    Measure a clip.
+
+    Args:
+        audio_path: WAV file
+        recording: RecordingResult for this file, if it was just recorded
+
+    Returns:
+        Clip statistics
+    """
+    if recording is not None and recording.path == audio_path and recording.sample_rate:
+        return ClipStats(
+            duration=recording.frames / recording.sample_rate,
+            speech_seconds=recording.speech_seconds,
+            # 0.0 from recorders that didn't measure the level
+            rms_dbfs=recording.input_rms_dbfs if recording.input_rms_dbfs else None,
+        )
+
+    try:
+        with wave.open(audio_path, 'rb') as wav:
+            return ClipStats(duration=wav.getnframes() / wav.getframerate())
+    except (OSError, EOFError, wave.Error):
+        return ClipStats(duration=0.0)
+
+
+def select_route(clip: ClipStats, routes: Optional[List[Route]] = None) -> Optional[Route]:
+    """
+    Pick the first route that takes the clip.
+
+    Args:
+        clip: Clip statistics
+        routes: Routes to choose from (default: from config)
+
+    Returns:
+        Route, or None if routing is off or nothing matches
+    """
+    for route in configured_routes() if routes is None else routes:
+        if route.matches(clip):
+            return route
+    return None
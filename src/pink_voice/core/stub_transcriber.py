@@ -0,0 +1,154 @@
+"""
+Stub transcriber for offline testing.
+
+Speaks the pink-transcriber command-line protocol (`--health`,
+`--capabilities`, or an audio path with the text on stdout, plain or as
+JSON-line segments with `--format jsonl`, one or more per stretch of
+sound) without a model, so load tests
+and the relay can be exercised anywhere:
+
+    python -m pink_voice.core.stub_transcriber --latency 0.3 --workers 2 audio.wav
+
+With --workers, concurrent invocations share that many slots through lock
+files (POSIX only), like a daemon with a fixed worker pool, so the load
+test can find a saturation point.
+"""
+
+import argparse
+import array
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import wave
+from typing import List, Optional, Tuple
+
+
+def _acquire_slot(workers: int):
+    """Block until one of `workers` lock-file slots is free; returns the open lock file."""
+    import fcntl
+
+    lock_dir = os.path.join(tempfile.gettempdir(), 'pink-voice-stub')
+    os.makedirs(lock_dir, exist_ok=True)
+    while True:
+        for slot in range(workers):
+            handle = open(os.path.join(lock_dir, f'slot-{slot}.lock'), 'w')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle
+            except OSError:
+                handle.close()
+        time.sleep(0.005)
+
+
+def _sounds(audio_path: str, pause: float = 0.5) -> Tuple[float, List[Tuple[float, float]]]:
+    """
+    Duration of a WAV file and its stretches of sound, split at pauses (like a real model's segments).
+
+    16-bit audio only; anything else counts as one stretch of sound.
+    """
+    try:
+        with wave.open(audio_path, 'rb') as wav:
+            rate, width, channels = wav.getframerate(), wav.getsampwidth(), wav.getnchannels()
+            frames = wav.readframes(wav.getnframes())
+    except (OSError, EOFError, wave.Error):
+        return 0.0, []
+
+    duration = len(frames) / (rate * width * channels)
+    if width != 2:
+        return duration, [(0.0, duration)]
+
+    samples = array.array('h', frames)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+
+    # 10ms blocks louder than about -50 dBFS count as sound
+    block = max(rate * channels // 100, 1)
+    stretches: List[Tuple[float, float]] = []
+    for i in range(0, len(samples), block):
+        if max(map(abs, samples[i:i + block])) < 100:
+            continue
+        start, end = i / (rate * channels), min(i + block, len(samples)) / (rate * channels)
+        if stretches and start - stretches[-1][1] < pause:
+            stretches[-1] = (stretches[-1][0], end)
+        else:
+            stretches.append((start, end))
+    return duration, stretches
+
+
+def _segments(text: str, stretches: List[Tuple[float, float]], confidence: float) -> List[dict]:
+    """The text's sentences spread over each stretch of sound, words timed evenly within."""
+    sentences = [sentence.strip() + '.' for sentence in text.split('.') if sentence.strip()] or [text]
+    segments = []
+    for first, last in stretches:
+        span = (last - first) / len(sentences)
+        for index, sentence in enumerate(sentences):
+            start = first + index * span
+            words = sentence.split()
+            step = span / max(len(words), 1)
+            segments.append({
+                "start": round(start, 3),
+                "end": round(start + span, 3),
+                "text": sentence,
+                "confidence": confidence,
+                "words": [
+                    {"word": word, "start": round(start + i * step, 3), "end": round(start + (i + 1) * step, 3),
+                     "confidence": confidence}
+                    for i, word in enumerate(words)
+                ],
+            })
+    return segments
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the stub transcriber."""
+    parser = argparse.ArgumentParser(description='Stub pink-transcriber for offline tests')
+    parser.add_argument('--health', action='store_true', help='Exit 0 (service is healthy)')
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds per request')
+    parser.add_argument('--rtf', type=float, default=0.0, help='Extra seconds per second of audio')
+    parser.add_argument('--jitter', type=float, default=0.1, help='Random latency spread (fraction of latency)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail')
+    parser.add_argument('--workers', type=int, default=0, help='Concurrent requests served (0 = unlimited)')
+    parser.add_argument('--text', default='stub transcription', help='Text to print')
+    parser.add_argument('--capabilities', action='store_true', help='Print supported result formats')
+    parser.add_argument('--format', choices=['text', 'jsonl'], default='text', help='Result format')
+    parser.add_argument('--confidence', type=float, default=0.9, help='Segment confidence (jsonl)')
+    parser.add_argument('audio', nargs='?', help='Audio file')
+    args = parser.parse_args(argv)
+
+    if args.health:
+        return 0
+
+    if args.capabilities:
+        print(json.dumps({"formats": ["text", "jsonl"]}))
+        return 0
+
+    if not args.audio or not os.path.exists(args.audio):
+        print(f"Audio file not found: {args.audio}", file=sys.stderr)
+        return 1
+
+    duration, stretches = _sounds(args.audio)
+    slot = _acquire_slot(args.workers) if args.workers > 0 and os.name == 'posix' else None
+    try:
+        latency = args.latency + args.rtf * duration
+        time.sleep(max(latency * (1 + random.uniform(-args.jitter, args.jitter)), 0))
+    finally:
+        if slot:
+            slot.close()
+
+    if random.random() < args.error_rate:
+        print("Stub failure", file=sys.stderr)
+        return 1
+
+    if args.format == 'jsonl':
+        for segment in _segments(args.text, stretches, args.confidence):
+            print(json.dumps(segment))
+    else:
+        print(args.text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
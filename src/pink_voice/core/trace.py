@@ -0,0 +1,135 @@
+"""
+Session trace recorder.
+
+Opt-in (PINK_VOICE_TRACE=path): writes the timed event stream of a
+session as JSON lines, so a latency problem seen in the field can be
+replayed and profiled elsewhere (`pink-voice replay`):
+
+    {"t": 0.0, "event": "session", "platform": "linux", "settings": {...}}
+    {"t": 3.21, "event": "hotkey", "action": "prepare"}
+    {"t": 3.25, "event": "hotkey", "action": "trigger"}
+    {"t": 3.26, "event": "status", "status": "recording"}
+    {"t": 7.90, "event": "recording", "frames": 72000, "callbacks": [[3.31, 320], ...], ...}
+    {"t": 8.61, "event": "transcribe", "seconds": 0.69, "ok": true, ...}
+
+`t` is seconds since the trace started. Only the hotkey's own keys are
+logged, and transcripts are reduced to their length, so a trace can be
+shared without leaking what was typed or said. With tracing off, each
+event is one attribute check.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO
+
+from pink_voice.config import config
+
+# Settings recorded with the trace, used by the replay
+TRACED_SETTINGS = (
+    'hotkey', 'transport', 'warmup', 'sample_rate', 'capture_rate', 'latency_profile', 'input_channels',
+    'downmix', 'normalize_audio', 'normalize_target_dbfs', 'highpass_hz', 'noise_reduction_db', 'result_format',
+    'refine_below',
+)
+
+
+class TraceRecorder:
+    """Appends timed events to a JSON-lines file."""
+
+    def __init__(self) -> None:
+        """Initialize a recorder that is off until started."""
+        self._file: Optional[TextIO] = None
+        self._origin: float = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """True while a trace is being written."""
+        return self._file is not None
+
+    def start(self, path: str) -> None:
+        """
+        Start writing a new trace.
+
+        Args:
+            path: Output file (replaced if it exists)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._origin = time.monotonic()
+        self._file = open(path, 'w', encoding='utf-8')
+        self.event("session", platform=config.platform, started_at=time.time(),
+                   settings={name: getattr(config, name) for name in TRACED_SETTINGS})
+
+    def relative(self, monotonic: float) -> float:
+        """
+        Convert a time.monotonic() timestamp (from any process) to trace time.
+
+        Args:
+            monotonic: Timestamp
+
+        Returns:
+            Seconds since the trace started
+        """
+        return round(monotonic - self._origin, 6)
+
+    def event(self, event: str, **fields: Any) -> None:
+        """
+        Record an event (no-op when tracing is off).
+
+        Args:
+            event: Event name
+            **fields: JSON-serializable event data
+        """
+        if self._file is None:
+            return
+        line = json.dumps({"t": self.relative(time.monotonic()), "event": event, **fields})
+        with self._lock:
+            if self._file is not None:
+                # Flushed per event: the trace must survive the crash it may be about
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def stop(self) -> None:
+        """Close the trace file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+tracer = TraceRecorder()
+
+
+def start_tracing() -> None:
+    """Start the trace configured in config, if any."""
+    if not config.trace_path:
+        return
+    try:
+        tracer.start(config.trace_path)
+    except OSError as e:
+        print(f"⚠️  Trace not started: {e}", flush=True)
+        return
+    print(f"⚠️  Tracing session to {config.trace_path}", flush=True)
+
+
+def read_trace(path: str) -> List[Dict[str, Any]]:
+    """
+    Read a trace.
+
+    Args:
+        path: Trace file
+
+    Returns:
+        Events in order (a truncated last line is skipped)
+    """
+    events: List[Dict[str, Any]] = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+    return events
@@ -1,11 +1,84 @@
 """Transcription service."""
 
 import os
-import subprocess
-import sys
+import tempfile
+import threading
 import time
+from typing import Optional, Sequence
 
 from pink_voice.config import config
+from pink_voice.core.metrics import metrics
+from pink_voice.core.results import TranscriptionResult, parse_result
+from pink_voice.core.routing import clip_stats, select_route
+from pink_voice.core.trace import tracer
+from pink_voice.core.transports import create_transport
+
+# Audio around an uncertain segment sent along for re-transcription (timestamps are approximate)
+REFINE_PADDING = 0.25
+
+_transport = None
+_result_format: Optional[str] = None  # negotiated with the current transport
+
+# Speculative warm-up state (see TranscribeService.prepare)
+_warmup_lock = threading.Lock()
+_warmup_running: bool = False
+_prepared: bool = False
+
+
+def get_transport():
+    """Get the transport selected in config (created on first use)."""
+    global _transport
+    if _transport is None:
+        _transport = create_transport()
+    return _transport
+
+
+def reset_transport() -> None:
+    """Close the current transport; the next request creates one from the current config."""
+    global _transport, _result_format
+    transport, _transport = _transport, None
+    _result_format = None
+    if transport is not None:
+        transport.close()
+
+
+def result_format() -> str:
+    """
+    Result format to request: from config, or asked from the transcriber once per transport.
+
+    A transcriber that can't be reached also looks text-only, so "text" is
+    only remembered once a health check confirms the answer came from it;
+    until then every call asks again.
+
+    Returns:
+        "text" or "jsonl"
+    """
+    global _result_format
+    if config.result_format != "auto":
+        return config.result_format
+    if _result_format is None:
+        transport = get_transport()
+        offered = transport.capabilities(config.health_check_timeout)
+        answer = "jsonl" if "jsonl" in offered else "text"
+        if answer == "text" and not transport.health_check(config.health_check_timeout):
+            return answer
+        _result_format = answer
+        if config.verbose:
+            print(f"Transcriber result format: {_result_format}", flush=True)
+    return _result_format
+
+
+def _format_args(args: Sequence[str]) -> tuple:
+    """Transcriber args with the result format appended (plain text needs none)."""
+    return tuple(args) + (("--format", "jsonl") if result_format() == "jsonl" else ())
+
+
+def _traced_duration(audio_path: str, recording) -> Optional[float]:
+    """Clip duration for the trace, or None if the file can't be read (must not mask the real error)."""
+    try:
+        return round(clip_stats(audio_path, recording).duration, 3)
+    except Exception:
+        return None
 
 
 class TranscribeService:
@@ -19,29 +92,60 @@ class TranscribeService:
         Returns:
             True if service is healthy, False otherwise
         """
-        try:
-            if config.platform == "windows":
-                # Windows: use wsl bash -lc to load PATH
-                command = ['wsl', 'bash', '-lc', 'pink-transcriber --health']
-            else:
-                command = config.transcribe_command + ['--health']
-
-            result: subprocess.CompletedProcess = subprocess.run(
-                command,
-                capture_output=True,
-                timeout=config.health_check_timeout
-            )
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+        started = time.perf_counter()
+        healthy = get_transport().health_check(config.health_check_timeout)
+
+        metrics.observe("health_check_seconds", time.perf_counter() - started)
+        metrics.inc("health_checks_total", result="ok" if healthy else "fail")
+        return healthy
+
+    @staticmethod
+    def prepare() -> None:
+        """
+        Warm up the transcriber in the background while the user is speaking.
+
+        Sends a health ping through the transport so the backend (and, with the
+        relay, the connection) is awake by the time the recording is sent.
+        Returns immediately; at most one warm-up runs at a time.
+        """
+        global _warmup_running, _prepared
+
+        with _warmup_lock:
+            _prepared = True
+            if _warmup_running:
+                return
+            _warmup_running = True
+
+        def warm_up() -> None:
+            global _warmup_running
+            started = time.perf_counter()
+            try:
+                healthy = get_transport().health_check(config.health_check_timeout)
+                if healthy:
+                    result_format()
+            except Exception:
+                healthy = False
+            finally:
+                with _warmup_lock:
+                    _warmup_running = False
+
+            elapsed = time.perf_counter() - started
+            tracer.event("warmup", seconds=round(elapsed, 6), ok=healthy)
+            metrics.observe("warmup_seconds", elapsed)
+            metrics.inc("warmups_total", result="ok" if healthy else "fail")
+            if config.verbose:
+                print(f"Transcriber warm-up: {elapsed * 1000:.0f}ms ({'ok' if healthy else 'failed'})", flush=True)
+
+        threading.Thread(target=warm_up, daemon=True).start()
 
     @staticmethod
-    def transcribe(audio_path: str) -> str:
+    def transcribe(audio_path: str, recording=None) -> str:
         """
         Transcribe audio file to text.
 
         Args:
             audio_path: Absolute path to audio file
+            recording: RecordingResult for the file, if it was just recorded
 
         Returns:
             Transcribed text
@@ -49,32 +153,140 @@ class TranscribeService:
         Raises:
             RuntimeError: If transcription fails
         """
-        transcribe_path = config.convert_path_for_transcribe(audio_path)
+        return TranscribeService.transcribe_result(audio_path, recording).text
 
-        if config.platform == "windows":
-            command = ['wsl', 'bash', '-lc', f'pink-transcriber {transcribe_path}']
-        else:
-            command = config.transcribe_command + [transcribe_path]
+    @staticmethod
+    def transcribe_result(audio_path: str, recording=None,
+                          args: Optional[Sequence[str]] = None) -> TranscriptionResult:
+        """
+        Transcribe audio file, with segment timings and confidence if the transcriber provides them.
 
-        if os.getenv('VERBOSE') == '1':
+        The clip is routed to the first configured profile that takes it
+        (see core/routing.py); without routes every clip is sent as is.
+        With refine_below set, uncertain segments are transcribed again.
+
+        Args:
+            audio_path: Absolute path to audio file
+            recording: RecordingResult for the file, if it was just recorded
+                (its duration and speech time are used for routing)
+            args: Transcriber arguments to use instead of routing
+
+        Returns:
+            Transcription result
+
+        Raises:
+            RuntimeError: If transcription fails
+        """
+        route = None
+        if args is None and config.routes:
+            clip = clip_stats(audio_path, recording)
+            route = select_route(clip)
+            if config.verbose:
+                speech = f", {clip.speech_seconds:.1f}s speech" if clip.speech_seconds is not None else ""
+                print(f"Route: {route.name if route else 'default'} ({clip.duration:.1f}s{speech})", flush=True)
+
+        if config.verbose:
             print("Transcribing...", flush=True)
 
-        result: subprocess.CompletedProcess = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            encoding='utf-8'
-        )
+        global _prepared
+        with _warmup_lock:
+            warmed, _prepared = _prepared, False
 
-        if result.returncode != 0:
-            raise RuntimeError(f"Transcription failed: {result.stderr}")
+        started = time.perf_counter()
+        result: Optional[TranscriptionResult] = None
+        error = ""
+        try:
+            output = get_transport().transcribe(audio_path, _format_args(route.args if route else args or ()))
+            result = parse_result(output)
+        except Exception as e:
+            metrics.inc("transcriptions_total", result="failure")
+            error = str(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            if tracer.enabled:
+                # Lengths only: traces must not carry what was said
+                tracer.event(
+                    "transcribe",
+                    seconds=round(elapsed, 6),
+                    ok=result is not None,
+                    error=error.strip()[-200:],
+                    audio_seconds=_traced_duration(audio_path, recording),
+                    route=route.name if route else None,
+                    format=result.format if result else None,
+                    chars=len(result.text) if result else 0,
+                    segments=len(result.segments) if result else 0,
+                    warmed=warmed,
+                )
+            metrics.observe("transcription_seconds", elapsed)
+            # Separate histograms show what the warm-up saves
+            metrics.observe("transcription_warm_seconds" if warmed else "transcription_cold_seconds", elapsed)
+            if route:
+                metrics.observe("transcription_route_seconds", elapsed, route=route.name)
+                metrics.inc("transcription_routes_total", route=route.name)
+        metrics.inc("transcriptions_total", result="success")
+
+        if config.verbose:
+            print(f"Result ({elapsed * 1000:.0f}ms, {'warmed up' if warmed else 'cold'}): {result.text}", flush=True)
+
+        if config.refine_below > 0:
+            TranscribeService.refine(audio_path, result, config.refine_below)
+
+        return result
+
+    @staticmethod
+    def refine(audio_path: str, result: TranscriptionResult, threshold: float) -> int:
+        """
+        Transcribe uncertain segments again from their stretch of audio.
+
+        Each segment below the threshold is cut out (with a little padding)
+        and sent with refine_args; the new text replaces the segment unless
+        the transcriber is even less sure of it. Failures keep the original.
+
+        Args:
+            audio_path: WAV file the result came from
+            result: Result to update in place
+            threshold: Confidence below which a segment is re-transcribed
+
+        Returns:
+            Number of segments replaced
+        """
+        from pink_voice.core.wav import cut
 
-        text = result.stdout.strip()
+        replaced = 0
+        for index in result.low_confidence(threshold):
+            segment = result.segments[index]
+            fd, span_path = tempfile.mkstemp(prefix='pink-voice-refine-', suffix='.wav')
+            os.close(fd)
+            started = time.perf_counter()
+            try:
+                cut(audio_path, segment.start - REFINE_PADDING, segment.end + REFINE_PADDING, span_path)
+                retry = parse_result(get_transport().transcribe(span_path, _format_args(config.refine_args)))
+            except Exception as e:
+                metrics.inc("transcription_refines_total", result="failure")
+                if config.verbose:
+                    print(f"⚠️  Re-transcribing segment {index} failed: {e}", flush=True)
+                continue
+            finally:
+                metrics.observe("transcription_refine_seconds", time.perf_counter() - started)
+                tracer.event("refine", seconds=round(time.perf_counter() - started, 6))
+                os.unlink(span_path)
 
-        if os.getenv('VERBOSE') == '1':
-            print(f"Result: {text}", flush=True)
+            confidences = [s.confidence for s in retry.segments if s.confidence is not None]
+            confidence = sum(confidences) / len(confidences) if confidences else None
+            if not retry.text or (confidence is not None and confidence < segment.confidence):
+                metrics.inc("transcription_refines_total", result="kept")
+                continue
 
-        return text
+            if config.verbose:
+                print(f"Refined segment {index} ({segment.confidence:.2f}): "
+                      f"{segment.text.strip()!r} -> {retry.text!r}", flush=True)
+            result.replace_segment(index, retry.text)
+            if confidence is not None:
+                segment.confidence = confidence
+            metrics.inc("transcription_refines_total", result="replaced")
+            replaced += 1
+        return replaced
 
     @staticmethod
     def wait_for_service() -> bool:
@@ -0,0 +1,606 @@
+"""
+Transports: how requests reach pink-transcriber.
+
+CommandTransport runs the transcriber CLI for every request.
+RelayTransport talks to a persistent relay (see wsl_relay.py) over
+localhost TCP and sends the audio bytes directly.
+MultiTransport spreads requests over several endpoints with retries and
+hedging.
+"""
+
+import collections
+import json
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Deque, List, Optional, Sequence
+
+from pink_voice.config import config
+from pink_voice.core.metrics import metrics
+from pink_voice.core.results import FORMATS, parse_capabilities
+from pink_voice.core.routing import configured_routes
+from pink_voice.core.wsl_relay import recv_message, send_message
+
+
+class CommandTransport:
+    """Runs the transcriber command as a subprocess."""
+
+    def __init__(self, command: List[str]) -> None:
+        """
+        Initialize transport.
+
+        Args:
+            command: Transcriber command (e.g. ['pink-transcriber'])
+        """
+        self.command: List[str] = command
+
+    def _build(self, args: List[str]) -> List[str]:
+        if config.platform == "windows" and self.command[:1] == ['wsl']:
+            # Windows: use wsl bash -lc to load PATH
+            return ['wsl', 'bash', '-lc', ' '.join(self.command[1:] + args)]
+        return self.command + args
+
+    def health_check(self, timeout: float) -> bool:
+        """
+        Check if the transcriber is available.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            True if service is healthy
+        """
+        try:
+            result: subprocess.CompletedProcess = subprocess.run(
+                self._build(['--health']),
+                capture_output=True,
+                timeout=timeout
+            )
+            return result.returncode == 0
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            return False
+
+    def capabilities(self, timeout: float) -> List[str]:
+        """
+        Ask the transcriber which result formats it supports.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            Supported formats ("text" only if it doesn't know --capabilities)
+        """
+        try:
+            result: subprocess.CompletedProcess = subprocess.run(
+                self._build(['--capabilities']),
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                timeout=timeout
+            )
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            return ["text"]
+        return parse_capabilities(result.stdout) if result.returncode == 0 else ["text"]
+
+    def transcribe(self, audio_path: str, args: Sequence[str] = ()) -> str:
+        """
+        Transcribe audio file.
+
+        Args:
+            audio_path: Absolute path to audio file
+            args: Extra transcriber arguments (route profile)
+
+        Returns:
+            Raw transcriber output
+
+        Raises:
+            RuntimeError: If transcription fails
+        """
+        transcribe_path = config.convert_path_for_transcribe(audio_path)
+
+        try:
+            result: subprocess.CompletedProcess = subprocess.run(
+                self._build([*args, transcribe_path]),
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                timeout=config.transcribe_timeout or None
+            )
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"Transcription timed out after {config.transcribe_timeout:g}s")
+
+        if result.returncode != 0:
+            raise RuntimeError(f"Transcription failed: {result.stderr}")
+
+        return result.stdout
+
+    def close(self) -> None:
+        """Nothing to release (one subprocess per request)."""
+        pass
+
+
+class RelayTransport:
+    """
+    Sends audio to a persistent relay over TCP.
+
+    The relay is launched on first use if nothing is listening (inside WSL
+    on Windows, as a local process elsewhere). Connections are kept open
+    and reused, so a request costs one round trip.
+    """
+
+    def __init__(self, host: str, port: int, launch_command: Optional[List[str]] = None,
+                 fallback: Optional[CommandTransport] = None, connect_timeout: float = 15.0,
+                 client: str = "", token: str = "") -> None:
+        """
+        Initialize transport.
+
+        Args:
+            host: Relay host
+            port: Relay port
+            launch_command: Command that starts the relay reading its source
+                from stdin (None = never launch, connect only)
+            fallback: Transport to use if the relay can't be reached
+            connect_timeout: Seconds to wait for a freshly launched relay
+            client: Name sent with requests (a gateway schedules and reports per client)
+            token: Shared secret sent with requests (required by a gateway)
+        """
+        self.host: str = host
+        self.port: int = port
+        self.launch_command: Optional[List[str]] = launch_command
+        self.fallback: Optional[CommandTransport] = fallback
+        self.connect_timeout: float = connect_timeout
+        self.client: str = client
+        self.token: str = token
+        self._idle: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._relay: Optional[subprocess.Popen] = None
+
+    def _launch(self) -> None:
+        """Start the relay, feeding it this package's relay source."""
+        source = Path(__file__).with_name('wsl_relay.py').read_bytes()
+        self._relay = subprocess.Popen(
+            self.launch_command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=None if config.verbose else subprocess.DEVNULL
+        )
+        self._relay.stdin.write(source)
+        self._relay.stdin.close()
+
+        if config.verbose:
+            print(f"Started transcription relay on port {self.port}", flush=True)
+
+    def _open(self) -> socket.socket:
+        """New connection, launching the relay if nothing is listening."""
+        try:
+            return socket.create_connection((self.host, self.port), timeout=1.0)
+        except OSError:
+            if not self.launch_command:
+                raise
+
+        with self._lock:
+            if self._relay is None or self._relay.poll() is not None:
+                self._launch()
+
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                return socket.create_connection((self.host, self.port), timeout=1.0)
+            except OSError:
+                if time.monotonic() > deadline or (self._relay and self._relay.poll() is not None):
+                    raise
+                time.sleep(0.1)
+
+    def _request(self, header: dict, payload: bytes = b'', timeout: Optional[float] = None) -> dict:
+        with self._lock:
+            pooled = self._idle.pop() if self._idle else None
+
+        if pooled is not None:
+            try:
+                return self._exchange(pooled, header, payload, timeout)
+            except socket.timeout:
+                # The relay is there but slow: sending the request again would only wait twice
+                raise
+            except (OSError, ValueError):
+                # Stale: the relay exited (idle timeout) or restarted since this connection was made,
+                # so the other pooled connections are dead too. Retry once on a fresh one.
+                self.close()
+
+        return self._exchange(self._open(), header, payload, timeout)
+
+    def _exchange(self, sock: socket.socket, header: dict, payload: bytes, timeout: Optional[float]) -> dict:
+        """One request/reply on a connection, which goes back to the pool afterwards."""
+        if self.token:
+            header = dict(header, token=self.token)
+        try:
+            sock.settimeout(timeout)
+            send_message(sock, header, payload)
+            reply, _ = recv_message(sock)
+        except (OSError, ValueError):
+            sock.close()
+            raise
+
+        with self._lock:
+            self._idle.append(sock)
+        return reply
+
+    def health_check(self, timeout: float) -> bool:
+        """
+        Check if the transcriber behind the relay is available.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            True if service is healthy
+        """
+        try:
+            return bool(self._request({'op': 'health', 'timeout': timeout}, timeout=timeout + 1).get('ok'))
+        except (OSError, ValueError):
+            if self.fallback:
+                return self.fallback.health_check(timeout)
+            return False
+
+    def capabilities(self, timeout: float) -> List[str]:
+        """
+        Ask the transcriber behind the relay which result formats it supports.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            Supported formats ("text" only for older relays and transcribers)
+        """
+        try:
+            reply = self._request({'op': 'capabilities', 'timeout': timeout}, timeout=timeout + 1)
+        except (OSError, ValueError):
+            if self.fallback:
+                return self.fallback.capabilities(timeout)
+            return ["text"]
+        if not reply.get('ok'):
+            return ["text"]
+        offered = reply.get('formats') or []
+        return [name for name in FORMATS if name == "text" or name in offered]
+
+    def transcribe(self, audio_path: str, args: Sequence[str] = ()) -> str:
+        """
+        Transcribe audio file by sending its bytes to the relay.
+
+        Args:
+            audio_path: Path to audio file
+            args: Extra transcriber arguments (route profile)
+
+        Returns:
+            Raw transcriber output
+
+        Raises:
+            RuntimeError: If transcription fails
+        """
+        with open(audio_path, 'rb') as f:
+            payload = f.read()
+
+        try:
+            header = {'op': 'transcribe', 'suffix': Path(audio_path).suffix, 'args': list(args)}
+            if self.client:
+                header['client'] = self.client
+            reply = self._request(header, payload, timeout=config.relay_timeout)
+        except (OSError, ValueError) as e:
+            if self.fallback:
+                if config.verbose:
+                    print(f"⚠️  Relay unavailable ({e}), using command transport", flush=True)
+                return self.fallback.transcribe(audio_path, args)
+            raise RuntimeError(f"Transcription relay unavailable: {e}")
+
+        if not reply.get('ok'):
+            raise RuntimeError(f"Transcription failed: {reply.get('error', '')}")
+        return reply.get('text', '')
+
+    def close(self) -> None:
+        """Close idle connections (the relay keeps running for the next instance)."""
+        with self._lock:
+            for sock in self._idle:
+                sock.close()
+            self._idle = []
+
+
+class _Endpoint:
+    """One backend of a MultiTransport and its recent latencies."""
+
+    WINDOW = 50
+
+    def __init__(self, name: str, transport) -> None:
+        self.name: str = name
+        self.transport = transport
+        self.latencies: Deque[float] = collections.deque(maxlen=self.WINDOW)
+        self.failures: int = 0  # consecutive
+
+    def p95(self) -> Optional[float]:
+        """95th percentile of recent successful requests (None until there are enough)."""
+        if len(self.latencies) < 10:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def score(self) -> float:
+        """Lower is better: median latency, pushed back by consecutive failures."""
+        median = sorted(self.latencies)[len(self.latencies) // 2] if self.latencies else 0.0
+        return median + 10.0 * self.failures
+
+
+class MultiTransport:
+    """
+    Sends each request to the best of several endpoints.
+
+    A failed request is retried on another endpoint after a jittered
+    exponential backoff, within a retry budget. If a request runs past the
+    endpoint's p95 latency, a hedged copy goes to the next endpoint and the
+    first successful reply wins (the slower request finishes in the
+    background and is discarded). An attempt ends when every copy has
+    failed or the attempt timeout has passed; copies still running then
+    count as failed and are abandoned.
+    """
+
+    def __init__(self, endpoints: List[_Endpoint], retries: int = 2, backoff: float = 0.2,
+                 hedge: bool = True, hedge_delay: float = 3.0, timeout: float = 300.0) -> None:
+        """
+        Initialize transport.
+
+        Args:
+            endpoints: Endpoints in order of preference
+            retries: Extra attempts after a failure
+            backoff: Base backoff delay in seconds (doubles per retry, full jitter)
+            hedge: Send a second copy of slow requests to another endpoint
+            hedge_delay: Hedge delay until an endpoint has enough latency samples
+            timeout: Seconds per attempt, hedged copy included (0 = no limit)
+        """
+        self.endpoints: List[_Endpoint] = endpoints
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.hedge: bool = hedge and len(endpoints) > 1
+        self.hedge_delay: float = hedge_delay
+        self.timeout: float = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Request threads, started on first use (again after close())."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2 * len(self.endpoints) + 2,
+                                                    thread_name_prefix='transcribe')
+            return self._executor
+
+    def _ranked(self, exclude: List[_Endpoint]) -> List[_Endpoint]:
+        with self._lock:
+            ranked = sorted(self.endpoints, key=lambda endpoint: endpoint.score())
+        fresh = [endpoint for endpoint in ranked if endpoint not in exclude]
+        # Everything failed already: try again in the same order
+        return fresh or ranked
+
+    def _call(self, endpoint: _Endpoint, audio_path: str, args: Sequence[str]) -> str:
+        started = time.perf_counter()
+        try:
+            text = endpoint.transport.transcribe(audio_path, args)
+        except Exception:
+            with self._lock:
+                endpoint.failures += 1
+            raise
+        with self._lock:
+            endpoint.failures = 0
+            endpoint.latencies.append(time.perf_counter() - started)
+        return text
+
+    def health_check(self, timeout: float) -> bool:
+        """
+        Check if any endpoint is available.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            True if at least one endpoint is healthy
+        """
+        pool = self._pool()
+        futures = [pool.submit(e.transport.health_check, timeout) for e in self.endpoints]
+        for future in futures:
+            try:
+                if future.result(timeout=timeout + 1):
+                    return True
+            except Exception:
+                pass
+        return False
+
+    def capabilities(self, timeout: float) -> List[str]:
+        """
+        Result formats every endpoint supports (a request may go to any of them).
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            Supported formats
+        """
+        pool = self._pool()
+        futures = [pool.submit(e.transport.capabilities, timeout) for e in self.endpoints]
+        common = list(FORMATS)
+        for future in futures:
+            try:
+                offered = future.result(timeout=timeout + 1)
+            except Exception:
+                offered = ["text"]
+            common = [name for name in common if name in offered]
+        return common or ["text"]
+
+    def transcribe(self, audio_path: str, args: Sequence[str] = ()) -> str:
+        """
+        Transcribe audio file, retrying and hedging across endpoints.
+
+        Args:
+            audio_path: Path to audio file
+            args: Extra transcriber arguments (route profile)
+
+        Returns:
+            Raw transcriber output
+
+        Raises:
+            RuntimeError: If every attempt failed
+        """
+        tried: List[_Endpoint] = []
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                metrics.inc("transcription_retries_total")
+                time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+
+            ranked = self._ranked(tried)
+            primary = ranked[0]
+            tried.append(primary)
+            deadline = time.monotonic() + self.timeout if self.timeout > 0 else None
+            running = {self._pool().submit(self._call, primary, audio_path, args): primary}
+
+            hedge_after = primary.p95() or self.hedge_delay
+            hedging = self.hedge and (deadline is None or hedge_after < self.timeout)
+            done, _ = wait(running, timeout=hedge_after) if hedging else (set(), set())
+
+            if not done and hedging:
+                backup = next((e for e in ranked[1:] if e not in tried), None)
+                if backup:
+                    if config.verbose:
+                        print(f"Hedging: {primary.name} slower than {hedge_after:.2f}s, also asking {backup.name}",
+                              flush=True)
+                    tried.append(backup)
+                    # A fresh pool if the transport was closed meanwhile
+                    running[self._pool().submit(self._call, backup, audio_path, args)] = backup
+                    metrics.inc("transcription_hedges_total")
+
+            pending: set = set(running)
+            while pending:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    last_error = self._abandon([running[future] for future in pending])
+                    break
+                for future in done:
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        last_error = e
+                        if config.verbose:
+                            print(f"⚠️  {running[future].name} failed: {e}", flush=True)
+                        continue
+                    if len(running) > 1:
+                        metrics.inc("transcription_hedge_wins_total",
+                                    winner="hedge" if running[future] is not primary else "primary")
+                    return text
+
+        raise RuntimeError(f"Transcription failed on all endpoints: {last_error}")
+
+    def _abandon(self, endpoints: List[_Endpoint]) -> Exception:
+        """Count endpoints still running at the attempt deadline as failed; returns the error to report."""
+        names = ', '.join(endpoint.name for endpoint in endpoints)
+        with self._lock:
+            for endpoint in endpoints:
+                endpoint.failures += 1
+        metrics.inc("transcription_timeouts_total", len(endpoints))
+        if config.verbose:
+            print(f"⚠️  {names} did not answer within {self.timeout:g}s", flush=True)
+        return TimeoutError(f"{names} did not answer within {self.timeout:g}s")
+
+    def close(self) -> None:
+        """Close all endpoints and stop the request threads (restarted if the transport is used again)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            # Requests still in flight (a losing hedge) finish on their own
+            executor.shutdown(wait=False)
+        for endpoint in self.endpoints:
+            endpoint.transport.close()
+
+
+def _endpoint_transport(spec: str):
+    """
+    Transport for an endpoint: 'relay://host:port' or a transcriber command.
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    if spec.startswith('relay://'):
+        host, _, port = spec[len('relay://'):].rpartition(':')
+        if not port.isdigit() or not 0 < int(port) < 65536:
+            raise ValueError("expected relay://host:port")
+        return RelayTransport(host or '127.0.0.1', int(port), client=socket.gethostname(),
+                              token=config.gateway_token)
+    if not spec.split():
+        raise ValueError("empty command")
+    return CommandTransport(spec.split())
+
+
+def _endpoints() -> List[_Endpoint]:
+    """Endpoints from config. Invalid entries are reported and skipped."""
+    endpoints: List[_Endpoint] = []
+    for spec in config.endpoints:
+        try:
+            endpoints.append(_Endpoint(spec, _endpoint_transport(spec)))
+        except ValueError as e:
+            print(f"⚠️  Config: ignoring endpoint {spec!r}: {e}", flush=True)
+    return endpoints
+
+
+def _relay_profiles() -> List[List[str]]:
+    """Transcriber args this client sends besides --format: each route's, and refine_args."""
+    profiles = [list(route.args) for route in configured_routes()]
+    if config.refine_args:
+        profiles.append(list(config.refine_args))
+    return [profile for profile in profiles if profile]
+
+
+def _relay_launch_command(transcribe_command: List[str]) -> List[str]:
+    """Command that runs the relay script read from stdin."""
+    args = ['--port', str(config.relay_port), '--idle-timeout', str(config.relay_idle_timeout)]
+    for profile in _relay_profiles():
+        args += ['--profile', json.dumps(profile)]
+
+    if transcribe_command[:1] == ['wsl']:
+        # One login shell for the relay's lifetime, to pick up PATH
+        transcriber = ' '.join(transcribe_command[1:])
+        return ['wsl', 'bash', '-lc', f"exec python3 - {shlex.join(args)} --transcriber '{transcriber}'"]
+
+    return [sys.executable, '-', *args, '--transcriber', ' '.join(transcribe_command)]
+
+
+def create_transport():
+    """
+    Create the transport selected in config.
+
+    Returns:
+        CommandTransport, RelayTransport, or MultiTransport with several endpoints
+    """
+    endpoints = _endpoints()
+    if endpoints:
+        return MultiTransport(
+            endpoints,
+            retries=config.retries,
+            backoff=config.retry_backoff,
+            hedge=config.hedge,
+            hedge_delay=config.hedge_delay,
+            timeout=config.transcribe_timeout
+        )
+
+    command = CommandTransport(config.transcribe_command)
+
+    if config.transport == 'relay':
+        return RelayTransport(
+            '127.0.0.1',
+            config.relay_port,
+            launch_command=_relay_launch_command(config.transcribe_command),
+            fallback=command
+        )
+
+    return command
@@ -0,0 +1,104 @@
+"""
+Streaming WAV writer.
+
+The header is written up front with placeholder sizes, PCM is appended as
+it arrives and the sizes are patched in on close, so audio never has to
+be joined into one array before it is saved.
+"""
+
+import struct
+import wave
+from typing import BinaryIO, Optional, Union
+
+import numpy as np
+
+HEADER_BYTES = 44
+
+
+def _header(sample_rate: int, channels: int, sample_width: int, data_bytes: int) -> bytes:
+    """Canonical 44-byte PCM WAV header."""
+    block_align = channels * sample_width
+    return (
+        b'RIFF' + struct.pack('<I', 36 + data_bytes) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate, sample_rate * block_align,
+                                block_align, 8 * sample_width)
+        + b'data' + struct.pack('<I', data_bytes)
+    )
+
+
+class WavWriter:
+    """Writes int16 PCM to a WAV file block by block."""
+
+    def __init__(self, path: str, sample_rate: int, channels: int = 1, sample_width: int = 2) -> None:
+        """
+        Create the file and write a placeholder header.
+
+        Args:
+            path: Output path
+            sample_rate: Sample rate in Hz
+            channels: Number of interleaved channels
+            sample_width: Bytes per sample
+        """
+        self.path: str = path
+        self.sample_rate: int = sample_rate
+        self.channels: int = channels
+        self.sample_width: int = sample_width
+        self.data_bytes: int = 0
+        self._file: Optional[BinaryIO] = open(path, 'wb')
+        self._file.write(_header(sample_rate, channels, sample_width, 0))
+
+    @property
+    def frames(self) -> int:
+        """Frames written so far."""
+        return self.data_bytes // (self.channels * self.sample_width)
+
+    def write(self, samples: Union[np.ndarray, bytes]) -> None:
+        """
+        Append samples.
+
+        Args:
+            samples: int16 array (interleaved if multi-channel) or raw PCM bytes
+        """
+        data = samples if isinstance(samples, (bytes, bytearray, memoryview)) else samples.astype('<i2', copy=False)
+        self.data_bytes += self._file.write(data)
+
+    def close(self) -> None:
+        """Patch the header sizes and close the file."""
+        if self._file is None:
+            return
+        # RIFF chunks are padded to an even size
+        if self.data_bytes % 2:
+            self._file.write(b'\x00')
+        self._file.seek(0)
+        self._file.write(_header(self.sample_rate, self.channels, self.sample_width, self.data_bytes))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "WavWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def cut(audio_path: str, start: float, end: float, path: str) -> float:
+    """
+    Copy a stretch of a WAV file into a new file.
+
+    Args:
+        audio_path: Source WAV
+        start: Start in seconds (clamped to the file)
+        end: End in seconds (clamped to the file)
+        path: Output path
+
+    Returns:
+        Seconds copied
+    """
+    with wave.open(audio_path, 'rb') as source:
+        rate = source.getframerate()
+        first = min(max(int(start * rate), 0), source.getnframes())
+        last = min(max(int(end * rate), first), source.getnframes())
+        source.setpos(first)
+        with WavWriter(path, rate, source.getnchannels(), source.getsampwidth()) as writer:
+            writer.write(source.readframes(last - first))
+    return (last - first) / rate
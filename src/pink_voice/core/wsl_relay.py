@@ -0,0 +1,270 @@
+"""
+Transcription relay.
+
+A small persistent server that accepts audio bytes over TCP and runs
+pink-transcriber on them. On Windows it runs inside WSL, so each utterance
+skips the `wsl bash -lc` login shell and the /mnt/c file bridge.
+
+This file is standalone (stdlib only): the client pipes it into
+`python3 -` inside WSL. It also runs locally as a loopback stand-in.
+
+Protocol (both directions): 4-byte big-endian header length, JSON header,
+then `size` bytes of payload if the header has a "size" field. Headers over
+MAX_HEADER_BYTES and payloads over MAX_PAYLOAD_BYTES are refused.
+
+Clients can't pass arbitrary transcriber arguments: besides --format, only
+the argument lists given to the relay with --profile at start-up are
+accepted, anything else is dropped.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+_HEADER = struct.Struct('>I')
+
+MAX_HEADER_BYTES = 64 * 1024
+
+# An hour of 16kHz 16-bit stereo is ~230MB
+MAX_PAYLOAD_BYTES = 256 * 1024 * 1024
+
+_SUFFIX = re.compile(r'\.[A-Za-z0-9]{1,8}')
+
+_FORMATS = ('text', 'jsonl')
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(sock: socket.socket, header: dict, payload: bytes = b'') -> None:
+    """
+    Send one message.
+
+    Args:
+        sock: Connected socket
+        header: JSON-serializable header
+        payload: Optional binary payload
+    """
+    if payload:
+        header = dict(header, size=len(payload))
+    data = json.dumps(header).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(data)) + data + payload)
+
+
+def recv_message(sock: socket.socket, max_size: int = MAX_PAYLOAD_BYTES) -> Tuple[dict, bytes]:
+    """
+    Receive one message.
+
+    Args:
+        sock: Connected socket
+        max_size: Largest payload accepted
+
+    Returns:
+        Header and payload (empty if none)
+
+    Raises:
+        ValueError: If the header is malformed or a length is over its limit
+            (the connection can't be resynchronized and should be closed)
+    """
+    (length,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    if length > MAX_HEADER_BYTES:
+        raise ValueError(f"Header of {length} bytes is over the limit")
+    header = json.loads(_recv_exactly(sock, length).decode('utf-8'))
+    if not isinstance(header, dict):
+        raise ValueError("Header is not an object")
+
+    size = header.get('size') or 0
+    if not isinstance(size, int) or isinstance(size, bool) or not 0 <= size <= max_size:
+        raise ValueError(f"Invalid payload size: {size!r}")
+    payload = _recv_exactly(sock, size) if size else b''
+    return header, payload
+
+
+def safe_suffix(suffix: object) -> str:
+    """File suffix for received audio: the client's if it is a plain extension, else '.wav'."""
+    return suffix if isinstance(suffix, str) and _SUFFIX.fullmatch(suffix) else '.wav'
+
+
+def _split_format(args: List[str]) -> Tuple[List[str], List[str]]:
+    """Split a known '--format X' pair off client args: (other args, format args)."""
+    for i, arg in enumerate(args[:-1]):
+        if arg == '--format' and args[i + 1] in _FORMATS:
+            return args[:i] + args[i + 2:], args[i:i + 2]
+    return args, []
+
+
+class _RelayHandler(socketserver.BaseRequestHandler):
+    """Serves requests on one client connection until it closes."""
+
+    def handle(self) -> None:
+        server: RelayServer = self.server
+        while True:
+            try:
+                header, payload = recv_message(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+
+            server.touch()
+            try:
+                reply = server.dispatch(header, payload)
+            except Exception as e:
+                reply = {'ok': False, 'error': str(e)}
+            send_message(self.request, reply)
+
+
+class RelayServer(socketserver.ThreadingTCPServer):
+    """Relay server running the transcriber CLI on received audio."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str, port: int, transcriber: List[str], idle_timeout: float = 0,
+                 profiles: Iterable[Sequence[str]] = ()) -> None:
+        """
+        Initialize relay server.
+
+        Args:
+            host: Address to bind
+            port: Port to bind
+            transcriber: Transcriber command (e.g. ['pink-transcriber'])
+            idle_timeout: Exit after this many seconds without requests (0 = never)
+            profiles: Transcriber argument lists clients may pass
+        """
+        super().__init__((host, port), _RelayHandler)
+        self.transcriber: List[str] = transcriber
+        self.idle_timeout: float = idle_timeout
+        self.profiles: Set[Tuple[str, ...]] = {tuple(profile) for profile in profiles}
+        self._last_request: float = time.monotonic()
+
+    def touch(self) -> None:
+        """Record request activity (for the idle timeout)."""
+        self._last_request = time.monotonic()
+
+    def client_args(self, args: object) -> List[str]:
+        """
+        Transcriber args of a request: --format plus a configured profile's, or none.
+
+        Args:
+            args: Args the client sent
+
+        Returns:
+            Args to pass to the transcriber
+        """
+        if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+            return []
+        args, format_args = _split_format(args)
+        if args and tuple(args) not in self.profiles:
+            print(f"Dropping transcriber args that match no profile: {' '.join(args)}", file=sys.stderr)
+            args = []
+        return args + format_args
+
+    def dispatch(self, header: dict, payload: bytes) -> dict:
+        """
+        Handle one request.
+
+        Args:
+            header: Request header ('op' plus op-specific fields)
+            payload: Audio bytes for 'transcribe'
+
+        Returns:
+            Reply header
+        """
+        op = header.get('op')
+
+        if op == 'ping':
+            return {'ok': True}
+
+        if op == 'health':
+            result = subprocess.run(self.transcriber + ['--health'], capture_output=True,
+                                    timeout=header.get('timeout', 10))
+            return {'ok': result.returncode == 0}
+
+        if op == 'capabilities':
+            result = subprocess.run(self.transcriber + ['--capabilities'], capture_output=True, text=True,
+                                    encoding='utf-8', timeout=header.get('timeout', 10))
+            if result.returncode != 0:
+                return {'ok': False, 'error': result.stderr}
+            try:
+                return {'ok': True, 'formats': json.loads(result.stdout).get('formats', [])}
+            except (ValueError, AttributeError):
+                return {'ok': False, 'error': "Invalid capabilities"}
+
+        if op == 'transcribe':
+            fd, path = tempfile.mkstemp(suffix=safe_suffix(header.get('suffix')))
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(payload)
+                result = subprocess.run(
+                    self.transcriber + self.client_args(header.get('args', [])) + [path],
+                    capture_output=True, text=True, encoding='utf-8'
+                )
+            finally:
+                os.unlink(path)
+
+            if result.returncode != 0:
+                return {'ok': False, 'error': result.stderr}
+            return {'ok': True, 'text': result.stdout}
+
+        return {'ok': False, 'error': f"Unknown op: {op}"}
+
+    def serve_until_idle(self) -> None:
+        """Serve requests until the idle timeout expires."""
+        if self.idle_timeout > 0:
+            def watchdog() -> None:
+                while time.monotonic() - self._last_request < self.idle_timeout:
+                    time.sleep(min(self.idle_timeout, 5))
+                self.shutdown()
+
+            threading.Thread(target=watchdog, daemon=True).start()
+
+        self.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the relay server."""
+    parser = argparse.ArgumentParser(description='pink-transcriber relay')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--transcriber', default='pink-transcriber',
+                        help='Transcriber command (resolved on PATH once at start-up)')
+    parser.add_argument('--idle-timeout', type=float, default=0)
+    parser.add_argument('--profile', action='append', default=[], type=json.loads,
+                        help='JSON list of transcriber args clients may pass (repeatable)')
+    args = parser.parse_args(argv)
+
+    command = args.transcriber.split()
+    command[0] = shutil.which(command[0]) or command[0]
+
+    try:
+        server = RelayServer(args.host, args.port, command, args.idle_timeout, args.profile)
+    except OSError as e:
+        # Another relay already owns the port - it will serve our clients
+        print(f"Relay not started: {e}", file=sys.stderr)
+        return 1
+
+    with server:
+        server.serve_until_idle()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
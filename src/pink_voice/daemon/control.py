@@ -0,0 +1,302 @@
+"""
+Local control API.
+
+Lets scripts and editor plugins drive Pink Voice without synthesizing
+keystrokes. Listens on a Unix socket (TCP on 127.0.0.1 on Windows) and
+speaks JSON lines: one request object per line, one or more response
+objects per line.
+
+Requests:
+    {"cmd": "start"}                 start recording
+    {"cmd": "stop", "wait": true}    stop; with wait, reply with the transcript
+    {"cmd": "status"}                current status
+    {"cmd": "last"}                  last transcript (with "segments" if the transcriber sends timings)
+    {"cmd": "subscribe"}             stream status/transcript/error events
+    {"cmd": "diag", "action": "stacks"}
+                                     diagnostics in both processes (see core/diagnostics.py)
+
+The Unix socket is owner-only. A TCP port can be reached by every local
+user, so over TCP each request must also carry the token the server
+writes to <data dir>/control.token at start-up ("token": "...");
+send_command adds it.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import threading
+from typing import Optional
+
+from pink_voice.config import config
+
+
+def control_address() -> str:
+    """
+    Address of the control server.
+
+    Returns:
+        Unix socket path, or "127.0.0.1:<port>" on Windows
+    """
+    if config.platform == "windows":
+        return f"127.0.0.1:{config.control_port}"
+    return os.path.join(config.data_dir, "control.sock")
+
+
+def _is_tcp(address: str) -> bool:
+    return ':' in address and not address.startswith('/')
+
+
+def _token_path() -> str:
+    return os.path.join(config.data_dir, "control.token")
+
+
+def _write_token() -> str:
+    """Create a fresh token in a file only this user can read."""
+    token = secrets.token_hex(32)
+    path = _token_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+    # On Windows the mode only sets read-only; the file inherits the user profile's owner-only ACL
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+    return token
+
+
+def _read_token() -> str:
+    with open(_token_path(), encoding='utf-8') as f:
+        return f.read().strip()
+
+
+class ControlServer:
+    """Asynchronous control server running on its own event loop thread."""
+
+    def __init__(self, app, address: Optional[str] = None) -> None:
+        """
+        Initialize control server.
+
+        Args:
+            app: BaseUI instance to control
+            address: Unix socket path or host:port (default: control_address())
+        """
+        self.app = app
+        self.address: str = address or control_address()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._subscribers: set = set()
+        self._token: Optional[str] = None
+
+    def start(self) -> None:
+        """
+        Start serving in a background thread.
+
+        Raises:
+            OSError: If the socket can't be bound
+        """
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        errors: list = []
+
+        def run() -> None:
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.loop.run_until_complete(self._start_server())
+            except OSError as e:
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            self.loop.run_forever()
+            self.loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait(timeout=5)
+        if errors:
+            raise errors[0]
+
+        self.app.add_listener(self._on_event)
+
+        if config.verbose:
+            print(f"Control API listening on {self.address}", flush=True)
+
+    def stop(self) -> None:
+        """Stop serving."""
+        self.app.remove_listener(self._on_event)
+        if self.loop and self._server and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close(), self.loop)
+            self._thread.join(timeout=5)
+        try:
+            os.unlink(_token_path() if self._is_tcp() else self.address)
+        except OSError:
+            pass
+
+    def _is_tcp(self) -> bool:
+        return _is_tcp(self.address)
+
+    async def _close(self) -> None:
+        """Close the server and open connections, then stop the loop."""
+        self._server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.stop()
+
+    async def _start_server(self) -> None:
+        if self._is_tcp():
+            self._token = _write_token()
+            host, port = self.address.rsplit(':', 1)
+            self._server = await asyncio.start_server(self._handle, host, int(port))
+            return
+
+        os.makedirs(os.path.dirname(self.address), exist_ok=True)
+        # Only one instance runs (singleton), so an existing socket is stale
+        try:
+            os.unlink(self.address)
+        except OSError:
+            pass
+        self._server = await asyncio.start_unix_server(self._handle, self.address)
+        os.chmod(self.address, 0o600)
+
+    def _on_event(self, event: dict) -> None:
+        """Forward UI events (from any thread) to subscribers."""
+        if self.loop is None:
+            return
+        for queue in list(self._subscribers):
+            self.loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one client connection."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                    cmd = request.get('cmd')
+                except (ValueError, AttributeError):
+                    await self._send(writer, {"ok": False, "error": "invalid request"})
+                    continue
+
+                token = str(request.get('token', '')).encode('utf-8')
+                if self._token is not None and not hmac.compare_digest(token, self._token.encode('utf-8')):
+                    await self._send(writer, {"ok": False, "error": "invalid token"})
+                    break
+
+                if cmd == 'subscribe':
+                    await self._subscribe(writer)
+                    break
+
+                await self._send(writer, await self._dispatch(cmd, request))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, cmd: Optional[str], request: dict) -> dict:
+        loop = asyncio.get_running_loop()
+
+        if cmd == 'status':
+            return {
+                "ok": True,
+                "status": self.app.status,
+                "recording": self.app.recorder.is_recording(),
+                "processing": self.app.is_processing,
+                "queued": len(self.app.queue) if self.app.queue is not None else 0,
+            }
+
+        if cmd == 'last':
+            return {"ok": True, **(self.app.last_transcript or {"text": None})}
+
+        if cmd == 'start':
+            # Blocking UI work runs off the event loop
+            started = await loop.run_in_executor(None, self.app.request_start)
+            return {"ok": started, "status": self.app.status}
+
+        if cmd == 'stop':
+            events: asyncio.Queue = asyncio.Queue()
+            if request.get('wait'):
+                self._subscribers.add(events)
+            try:
+                stopped = await loop.run_in_executor(None, self.app.request_stop)
+                if not stopped or not request.get('wait'):
+                    return {"ok": stopped, "status": self.app.status}
+
+                while True:
+                    event = await events.get()
+                    # Transcripts of queued recordings can arrive in between
+                    if event["event"] == "transcript" and not event.get("queued"):
+                        return {"ok": True, "text": event["text"]}
+                    if event["event"] == "error":
+                        return {"ok": False, "error": event["error"], "queued": event.get("queued", False)}
+                    if event["event"] == "status" and event["status"] == "idle":
+                        return {"ok": True, "text": None}
+            finally:
+                self._subscribers.discard(events)
+
+        if cmd == 'diag':
+            from pink_voice.core.diagnostics import ACTIONS, run_action
+            action = request.get('action')
+            if action not in ACTIONS:
+                return {"ok": False, "error": f"unknown diag action: {action} (one of {', '.join(ACTIONS)})"}
+            seconds = request.get('seconds')
+            # Profile stops and memory snapshots can take a while
+            result = await loop.run_in_executor(None, run_action, action, seconds)
+            worker = self.app.recorder.diagnose(action, seconds)
+            return {"ok": True, **result, "recorder": worker}
+
+        return {"ok": False, "error": f"unknown command: {cmd}"}
+
+    async def _subscribe(self, writer: asyncio.StreamWriter) -> None:
+        events: asyncio.Queue = asyncio.Queue()
+        self._subscribers.add(events)
+        try:
+            await self._send(writer, {"ok": True, "status": self.app.status})
+            while True:
+                await self._send(writer, await events.get())
+        finally:
+            self._subscribers.discard(events)
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, message: dict) -> None:
+        writer.write(json.dumps(message).encode('utf-8') + b'\n')
+        await writer.drain()
+
+
+def send_command(request: dict, address: Optional[str] = None):
+    """
+    Send a request to the running instance and yield responses.
+
+    Args:
+        request: Request object
+        address: Server address (default: control_address())
+
+    Returns:
+        Iterator of response objects (one, or a stream for subscribe)
+    """
+    import socket
+
+    address = address or control_address()
+    if _is_tcp(address):
+        request = {**request, 'token': _read_token()}
+        host, port = address.rsplit(':', 1)
+        sock = socket.create_connection((host, int(port)))
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address)
+
+    with sock, sock.makefile('rb') as stream:
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        for line in stream:
+            yield json.loads(line)
+            if request.get('cmd') != 'subscribe':
+                return
@@ -1,60 +1,135 @@
-"""Hotkey listener for Ctrl+Q."""
+"""Global hotkey listener (Ctrl+Q by default, see config.hotkey)."""
 
-import os
-import sys
 import threading
-from typing import Callable, Optional
+from typing import Callable, FrozenSet, Optional, Set, Tuple
 
 from pynput import keyboard
 
 from pink_voice.config import config
+from pink_voice.core.trace import tracer
+
+# pynput key names -> modifier
+_MODIFIERS = {
+    'ctrl': 'ctrl', 'ctrl_l': 'ctrl', 'ctrl_r': 'ctrl',
+    'shift': 'shift', 'shift_l': 'shift', 'shift_r': 'shift',
+    'alt': 'alt', 'alt_l': 'alt', 'alt_r': 'alt', 'alt_gr': 'alt',
+    'cmd': 'cmd', 'cmd_l': 'cmd', 'cmd_r': 'cmd',
+}
+
+_ALIASES = {'control': 'ctrl', 'option': 'alt', 'command': 'cmd', 'super': 'cmd', 'win': 'cmd'}
+
+
+def parse_hotkey(spec: str) -> Tuple[FrozenSet[str], str]:
+    """
+    Parse a hotkey like "ctrl+q" or "ctrl+shift+space".
+
+    Args:
+        spec: Modifiers and a key joined with '+'
+
+    Returns:
+        Required modifiers and the key name
+
+    Raises:
+        ValueError: If the hotkey has no key
+    """
+    parts = [_ALIASES.get(part, part) for part in spec.lower().replace(' ', '').split('+') if part]
+    modifiers = frozenset(part for part in parts if part in _MODIFIERS.values())
+    keys = [part for part in parts if part not in _MODIFIERS.values()]
+    if len(keys) != 1:
+        raise ValueError(f"Invalid hotkey: {spec!r}")
+    return modifiers, keys[0]
+
+
+def format_hotkey(spec: str) -> str:
+    """
+    Format a hotkey for display ("ctrl+q" -> "Ctrl+Q").
+
+    Args:
+        spec: Hotkey as in config
+
+    Returns:
+        Display string
+    """
+    return '+'.join(part.upper() if len(part) == 1 else part.capitalize() for part in spec.split('+'))
+
+
+def _key_name(key) -> str:
+    """Name of a pynput key: 'q', 'space', 'f9', 'ctrl_l', ..."""
+    char = getattr(key, 'char', None)
+    if char:
+        # Ctrl+letter arrives as a control character on some platforms ('\x11' for Q)
+        if len(char) == 1 and ord(char) < 32:
+            return chr(ord(char) + 96)
+        return char.lower()
+    name = getattr(key, 'name', None)
+    return name if name else str(key).replace('Key.', '')
 
 
 class HotkeyListener:
-    """Listens for Ctrl+Q hotkey combination."""
+    """Listens for the configured hotkey combination."""
 
-    def __init__(self, on_trigger: Callable[[], None]) -> None:
+    def __init__(self, on_trigger: Callable[[], None],
+                 on_prepare: Optional[Callable[[], None]] = None) -> None:
         """
         Initialize hotkey listener.
 
         Args:
             on_trigger: Callback function to call when hotkey is triggered
+            on_prepare: Called (on the listener thread, must return quickly) when
+                the last of the hotkey's modifiers goes down, to warm up ahead of the key
         """
         self.on_trigger: Callable[[], None] = on_trigger
+        self.on_prepare: Optional[Callable[[], None]] = on_prepare
         self.listener: Optional[keyboard.Listener] = None
-        self.ctrl_is_held: bool = False
+        self.held: Set[str] = set()
         self.hotkey_triggered: bool = False
+        self._spec: str = ""
+        self._hotkey: Tuple[FrozenSet[str], str] = (frozenset({'ctrl'}), 'q')
+
+    def _current_hotkey(self) -> Tuple[FrozenSet[str], str]:
+        """Hotkey from config, re-parsed when the setting changes."""
+        if config.hotkey != self._spec:
+            self._spec = config.hotkey
+            try:
+                self._hotkey = parse_hotkey(self._spec)
+            except ValueError as e:
+                print(f"⚠️  {e}, keeping {format_hotkey('+'.join(sorted(self._hotkey[0]) + [self._hotkey[1]]))}",
+                      flush=True)
+        return self._hotkey
 
     def start(self) -> None:
         """Start listening for hotkey presses."""
-        if os.getenv('VERBOSE') == '1':
-            print("Listening for Ctrl+Q", flush=True)
+        self._current_hotkey()
+        if config.verbose:
+            print(f"Listening for {format_hotkey(config.hotkey)}", flush=True)
 
         def on_press(key: keyboard.Key) -> None:
-            try:
-                key_name: str = key.char if hasattr(key, 'char') else str(key)
-            except AttributeError:
-                key_name = str(key)
-
-            if key_name in ('Key.ctrl_l', 'Key.ctrl_r', 'Key.ctrl'):
-                self.ctrl_is_held = True
+            name = _key_name(key)
+            if name in _MODIFIERS:
+                modifier = _MODIFIERS[name]
+                pressed = modifier not in self.held
+                self.held.add(modifier)
+                # Once per hold, and only when the hotkey's whole modifier set is down
+                modifiers = self._hotkey[0]
+                if self.on_prepare and pressed and modifier in modifiers and modifiers <= self.held:
+                    tracer.event("hotkey", action="prepare")
+                    self.on_prepare()
                 return
 
-            if (key_name == 'q' or key_name == '\x11') and self.ctrl_is_held and not self.hotkey_triggered:
+            modifiers, hotkey = self._current_hotkey()
+            if name == hotkey and modifiers <= self.held and not self.hotkey_triggered:
                 self.hotkey_triggered = True
+                tracer.event("hotkey", action="trigger")
                 threading.Thread(target=self.on_trigger, daemon=True).start()
 
         def on_release(key: keyboard.Key) -> None:
-            try:
-                key_name: str = key.char if hasattr(key, 'char') else str(key)
-            except AttributeError:
-                key_name = str(key)
-
-            if key_name in ('Key.ctrl_l', 'Key.ctrl_r', 'Key.ctrl'):
-                self.ctrl_is_held = False
+            name = _key_name(key)
+            if name in _MODIFIERS:
+                self.held.discard(_MODIFIERS[name])
 
-            # Reset trigger on 'q' OR '\x11' release
-            if key_name == 'q' or key_name == '\x11':
+            # Reset trigger when the hotkey's key is released
+            if name == self._hotkey[1] and self.hotkey_triggered:
+                tracer.event("hotkey", action="release")
                 self.hotkey_triggered = False
 
         self.listener = keyboard.Listener(
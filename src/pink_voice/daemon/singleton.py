@@ -6,7 +6,7 @@ import sys
 import os
 import psutil
 
-from pink_voice.config import VERBOSE_MODE, SINGLETON_IDENTIFIERS
+from pink_voice.config import SINGLETON_IDENTIFIERS, config
 
 
 def _find_root_process(proc: psutil.Process, excluded_pids: list[int]) -> psutil.Process:
@@ -100,7 +100,7 @@ def ensure_single_instance(process_name: str) -> None:
 
     excluded_pids = [current_pid] + parent_chain
 
-    if VERBOSE_MODE:
+    if config.verbose:
         print(f"[Singleton] Current PID: {current_pid}, Parent chain: {parent_chain}")
         print(f"[Singleton] Looking for processes with identifiers: {SINGLETON_IDENTIFIERS}")
 
@@ -152,7 +152,7 @@ def ensure_single_instance(process_name: str) -> None:
             if not is_target:
                 continue
 
-            if VERBOSE_MODE:
+            if config.verbose:
                 print(f"[Singleton] Found target process PID {proc.info['pid']} (name: {process_name}): {cmdline}")
 
             # Find root of this process tree (use existing proc object to avoid race condition)
@@ -160,11 +160,11 @@ def ensure_single_instance(process_name: str) -> None:
 
             # Skip if already killed this root
             if root.pid in killed_roots:
-                if VERBOSE_MODE:
+                if config.verbose:
                     print(f"[Singleton]   -> Root PID {root.pid} already killed, skipping")
                 continue
 
-            if VERBOSE_MODE:
+            if config.verbose:
                 try:
                     root_cmdline = ' '.join(root.cmdline()) if root.cmdline() else 'N/A'
                     print(f"[Singleton]   -> Root process PID {root.pid}: {root_cmdline}")
@@ -172,17 +172,17 @@ def ensure_single_instance(process_name: str) -> None:
                     print(f"[Singleton]   -> Root process PID {root.pid}")
 
             # Kill entire tree from root
-            killed = _kill_process_tree(root, VERBOSE_MODE)
+            killed = _kill_process_tree(root, config.verbose)
             killed_count += killed
             killed_roots.add(root.pid)
 
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
             pass
         except Exception as e:
-            if VERBOSE_MODE:
+            if config.verbose:
                 print(f"[Singleton] Error: {e}")
 
-    if killed_count > 0 and VERBOSE_MODE:
+    if killed_count > 0 and config.verbose:
         print(f"[Singleton] Total killed: {killed_count} process(es)")
-    elif VERBOSE_MODE:
+    elif config.verbose:
         print(f"[Singleton] No existing instances found")
@@ -55,12 +55,28 @@ sys.stderr.close()
 sys.stderr = _original_stderr
 
 from pink_voice.config import config
+from pink_voice.core.diagnostics import install_signal_handlers
 from pink_voice.core.transcribe import TranscribeService
-from pink_voice.daemon.hotkeys import HotkeyListener
+from pink_voice.daemon.hotkeys import HotkeyListener, format_hotkey
 from pink_voice.daemon.singleton import ensure_single_instance
 import multiprocessing
 
 
+def _start_control_server(app):
+    """Start the local control API if enabled."""
+    if not config.control_enabled:
+        return None
+
+    from pink_voice.daemon.control import ControlServer
+    control = ControlServer(app)
+    try:
+        control.start()
+    except OSError as e:
+        print(f"⚠️  Control API not started: {e}", flush=True)
+        return None
+    return control
+
+
 def main() -> None:
     """Main entry point."""
     # Required for PyInstaller/multiprocessing on macOS/Windows
@@ -78,9 +94,24 @@ def main() -> None:
     except Exception:
         pass
 
+    # Subcommands run standalone and must not kill the running instance.
+    # Other arguments (e.g. -psn_... from the macOS launcher) start the app as usual.
+    from pink_voice.commands import COMMANDS, run_command
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(run_command(sys.argv[1], sys.argv[2:]))
+
     # Ensure only one instance runs
     ensure_single_instance('pink-voice')
 
+    from pink_voice.core.metrics import start_exporters
+    start_exporters()
+
+    from pink_voice.core.trace import start_tracing
+    start_tracing()
+
+    # Apply config file edits without a restart
+    config.watch()
+
     try:
         # Check service BEFORE creating app
         if config.ui_mode == "headless":
@@ -109,7 +140,7 @@ def main() -> None:
         # Request microphone permission upfront
         try:
             import sounddevice as sd
-            stream = sd.InputStream(samplerate=config.sample_rate, channels=1, dtype='int16')
+            stream = sd.InputStream(samplerate=config.capture_rate or None, channels=1, dtype='int16')
             stream.start()
             stream.stop()
             stream.close()
@@ -120,20 +151,24 @@ def main() -> None:
         if config.ui_mode == "macos":
             from pink_voice.ui.macos import MacOSUI
             app = MacOSUI()
+            control = _start_control_server(app)
+            install_signal_handlers('main', forward=app.recorder.diagnose)
 
             # Setup hotkey listener
-            hotkey_listener = HotkeyListener(on_trigger=app.toggle_recording)
+            hotkey_listener = HotkeyListener(on_trigger=app.toggle_recording, on_prepare=app.prepare)
             hotkey_listener.start()
 
             print("\n" + "="*50, flush=True)
             print("   🎙️  Pink Voice (macOS)", flush=True)
             print("="*50, flush=True)
-            print("\n✅ Ready! Listening for Ctrl+Q", flush=True)
-            print("Press Ctrl+Q to start/stop recording", flush=True)
+            print(f"\n✅ Ready! Listening for {format_hotkey(config.hotkey)}", flush=True)
+            print(f"Press {format_hotkey(config.hotkey)} to start/stop recording", flush=True)
             print("Press Ctrl+C to quit\n", flush=True)
 
             def signal_handler(sig: int, frame) -> None:
                 hotkey_listener.stop()
+                if control:
+                    control.stop()
                 app.cleanup()
                 os._exit(0)
 
@@ -144,19 +179,25 @@ def main() -> None:
                 app.run()
             finally:
                 hotkey_listener.stop()
+                if control:
+                    control.stop()
                 app.cleanup()
                 os._exit(0)
 
         else:
             from pink_voice.ui.headless import HeadlessUI
             app = HeadlessUI()
+            control = _start_control_server(app)
+            install_signal_handlers('main', forward=app.recorder.diagnose)
 
             # Setup hotkey listener
-            hotkey_listener = HotkeyListener(on_trigger=app.toggle_recording)
+            hotkey_listener = HotkeyListener(on_trigger=app.toggle_recording, on_prepare=app.prepare)
             hotkey_listener.start()
 
             def signal_handler(sig: int, frame) -> None:
                 hotkey_listener.stop()
+                if control:
+                    control.stop()
                 app.cleanup()
                 os._exit(0)
 
@@ -167,6 +208,8 @@ def main() -> None:
                 app.run()
             finally:
                 hotkey_listener.stop()
+                if control:
+                    control.stop()
                 app.cleanup()
                 os._exit(0)
 
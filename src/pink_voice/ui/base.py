@@ -3,13 +3,46 @@
 import os
 import sys
 import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from dataclasses import asdict
+from typing import Callable, List, Optional, Set
 
 from pink_voice.config import config
 from pink_voice.daemon.hotkeys import HotkeyListener
+from pink_voice.core.archive import RecordingArchive, open_archive
+from pink_voice.core.idle import IdleMonitor
+from pink_voice.core.jobqueue import JobQueue, QueuedJob, open_queue
+from pink_voice.core.metrics import metrics
+from pink_voice.core.postprocess import RuleEngine, get_rule_engine
 from pink_voice.core.recorder import AudioRecorder
-from pink_voice.core.transcribe import TranscribeService
+from pink_voice.core.trace import tracer
+from pink_voice.core.transcribe import TranscribeService, get_transport, reset_transport
+
+
+# Config settings by how a live change is applied
+RECORDER_SETTINGS = {  # config setting -> AudioRecorder argument
+    'sample_rate': 'sample_rate',
+    'capture_rate': 'capture_rate',
+    'latency_profile': 'latency_profile',
+    'xrun_recovery': 'xrun_recovery',
+    'input_device': 'device',
+    'input_channels': 'channels',
+    'downmix': 'downmix',
+    'normalize_audio': 'normalize',
+    'normalize_target_dbfs': 'target_rms_dbfs',
+    'highpass_hz': 'highpass_hz',
+    'noise_reduction_db': 'noise_reduction_db',
+    'recorder_stall_timeout': 'stall_timeout',
+}
+TRANSPORT_SETTINGS = {
+    'transport', 'transcribe_command', 'relay_port', 'relay_idle_timeout',
+    'endpoints', 'retries', 'retry_backoff', 'hedge', 'hedge_delay', 'transcribe_timeout',
+}
+RESTART_SETTINGS = {
+    'ui_mode', 'data_dir', 'archive_enabled', 'archive_retention_days', 'archive_max_mb', 'queue_enabled',
+    'control_enabled', 'control_port', 'metrics_port', 'statsd_address', 'trace_path',
+}
 
 
 class BaseUI(ABC):
@@ -17,51 +50,208 @@ class BaseUI(ABC):
 
     def __init__(self) -> None:
         """Initialize base UI components."""
-        self.recorder: AudioRecorder = AudioRecorder(sample_rate=config.sample_rate)
+        self.recorder: AudioRecorder = AudioRecorder(
+            spill_dir=os.path.join(config.data_dir, "spill"),
+            **self._recorder_settings()
+        )
+        self.recorder.on_stall = self._on_recorder_stall
         self.is_processing: bool = False
+        # Start/stop transitions come from the hotkey, control clients and the recorder watchdog
+        self._transition_lock: threading.Lock = threading.Lock()
+        self.idle: IdleMonitor = IdleMonitor(
+            self.recorder,
+            config.idle_timeout,
+            is_busy=lambda: self.is_processing,
+            on_idle=lambda: get_transport().close()
+        )
+        self.idle.start()
+        self.archive: Optional[RecordingArchive] = open_archive()
+        self.rules: RuleEngine = get_rule_engine()
+
+        # Recordings that failed to transcribe, retried when the service is back
+        self.queue: Optional[JobQueue] = open_queue()
+        self._queue_monitor: Optional[threading.Thread] = None
+        self._queue_lock: threading.Lock = threading.Lock()
+        # The retry thread waits for run(): it reports through the subclass's UI
+        self._queue_started: bool = False
+
+        # State and events for scripted control (see daemon/control.py)
+        self.status: str = "idle"
+        self.last_transcript: Optional[dict] = None
+        self._listeners: List[Callable[[dict], None]] = []
+
+        config.add_listener(self._on_config_change)
+        self._recover_spills()
 
     @abstractmethod
     def toggle_recording(self) -> None:
         """Toggle recording on/off. Platform-specific implementation."""
         pass
 
-    def _start_recording(self) -> None:
-        """Start audio recording."""
-        if self.recorder.start_recording():
-            self.update_status("recording")
-            self.play_sound("start")
+    @staticmethod
+    def _recorder_settings() -> dict:
+        """AudioRecorder settings from config."""
+        settings = {argument: getattr(config, name) for name, argument in RECORDER_SETTINGS.items()}
+        settings['device'] = settings['device'] or None
+        return settings
+
+    def _on_config_change(self, changed: Set[str]) -> None:
+        """Apply a reloaded config file (called from the watcher thread)."""
+        recorder_changes = changed & RECORDER_SETTINGS.keys()
+        if recorder_changes:
+            # Only the changed settings, so e.g. a device picked in the menu is kept.
+            # Takes effect with the next recording.
+            settings = self._recorder_settings()
+            self.recorder.configure(**{
+                RECORDER_SETTINGS[name]: settings[RECORDER_SETTINGS[name]] for name in recorder_changes
+            })
+
+        if changed & TRANSPORT_SETTINGS:
+            reset_transport()
+
+        if 'queue_max_mb' in changed and self.queue is not None:
+            self.queue.max_bytes = config.queue_max_mb * 1024 * 1024
+
+        if 'idle_timeout' in changed:
+            self.idle.timeout = config.idle_timeout
+            self.idle.start()
+
+        # Hotkey, verbose, prefix, rules and queue retry settings are read at use time
+        needs_restart = changed & RESTART_SETTINGS
+        if needs_restart:
+            print(f"⚠️  Restart Pink Voice to apply: {', '.join(sorted(needs_restart))}", flush=True)
+
+    def prepare(self) -> None:
+        """Hotkey modifiers pressed: warm up if idle (must return quickly)."""
+        self.idle.prepare()
+
+    def request_start(self) -> bool:
+        """
+        Start recording if idle (scripted control).
+
+        Returns:
+            True if recording started
+        """
+        return self._start_recording() and self.recorder.is_recording()
+
+    def request_stop(self) -> bool:
+        """
+        Stop recording and transcribe (scripted control).
+
+        Returns:
+            True if a recording was stopped
+        """
+        return self._stop_recording()
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """
+        Register a callback for status/transcript/error events.
+
+        Args:
+            listener: Called with an event dict from arbitrary threads
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[dict], None]) -> None:
+        """Unregister an event callback."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, event: dict) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception:
+                pass
 
-    def _stop_recording(self) -> None:
-        """Stop audio recording and start transcription."""
-        self.is_processing = True
+    def _set_status(self, status: str) -> None:
+        """Update UI status and notify listeners."""
+        self.status = status
+        tracer.event("status", status=status)
+        self.update_status(status)
+        self._emit({"event": "status", "status": status})
+
+    def _start_recording(self) -> bool:
+        """
+        Start audio recording unless busy.
+
+        Returns:
+            True if recording started
+        """
+        with self._transition_lock:
+            if self.is_processing or self.recorder.is_started():
+                return False
+            self.idle.wake()
+            if not self.recorder.start_recording():
+                return False
+            # Wake the transcriber while the user speaks
+            if config.warmup:
+                TranscribeService.prepare()
+            self._set_status("recording")
+        self.play_sound("start")
+        return True
+
+    def _stop_recording(self) -> bool:
+        """
+        Stop audio recording and start transcription, unless another caller already did.
+
+        Returns:
+            True if this call stopped the recording
+        """
+        with self._transition_lock:
+            if self.is_processing or not self.recorder.is_started():
+                return False
+            self.is_processing = True
 
         # Stop recording FIRST
         audio_path: Optional[str] = self.recorder.stop_recording()
 
         # Then update UI
         self.play_sound("stop")
-        self.update_status("transcribing")
+        self._set_status("transcribing")
 
         threading.Thread(target=self._process_recording, args=(audio_path,), daemon=True).start()
+        return True
+
+    def _on_recorder_stall(self) -> None:
+        """Recorder watchdog fired: stop now and transcribe what was captured."""
+        if self.is_processing or not self.recorder.is_started():
+            return
+
+        self.show_notification("Recording stopped", "Audio device stopped responding")
+        self._stop_recording()
 
     def _process_recording(self, audio_path: Optional[str]) -> None:
         """Process recorded audio: transcribe and copy to clipboard."""
         if not audio_path:
-            self.update_status("idle")
             self.is_processing = False
+            self._set_status("idle")
             return
 
         try:
-            text: str = TranscribeService.transcribe(audio_path)
-
-            if not text:
-                text = "[No speech detected]"
+            try:
+                result = TranscribeService.transcribe_result(audio_path, self.recorder.last_result)
+            except Exception as e:
+                # Only a failed transcription is kept for a retry
+                error_msg: str = str(e)
+                queued = self._queue_recording(audio_path, error_msg)
+                self.on_transcription_error(error_msg)
+                self._emit({"event": "error", "error": error_msg, "queued": queued})
+                if queued:
+                    self.show_notification("Transcription failed", "Saved, will retry when the service is back")
+                else:
+                    self.show_notification("Error", f"Transcription failed: {error_msg}")
+                return
 
-            # Prepend prefix if configured
-            if config.transcription_prefix:
-                text = config.transcription_prefix + text
+            self._archive_recording(audio_path, result.text)
+            text: str = self._finish_text(result.text)
 
+            self.last_transcript = {"text": text, "at": time.time()}
+            if result.segments:
+                # Raw transcriber segments (before rules and prefix), for tools that align text to audio
+                self.last_transcript["segments"] = [asdict(segment) for segment in result.segments]
             self.on_transcription_success(text)
+            self._emit({"event": "transcript", "text": text})
             self.play_sound("done")
             self.copy_to_clipboard(text)
             self.show_notification(
@@ -69,17 +259,172 @@ class BaseUI(ABC):
                 text[:100] + ("..." if len(text) > 100 else "")
             )
         except Exception as e:
-            error_msg: str = str(e)
+            # Delivery (clipboard, notification, ...) failed after a good transcription:
+            # queueing it would transcribe and deliver it again later
+            error_msg = f"Transcribed, but delivery failed: {e}"
             self.on_transcription_error(error_msg)
-            self.show_notification("Error", f"Transcription failed: {error_msg}")
+            self._emit({"event": "error", "error": error_msg, "queued": False})
         finally:
             try:
                 os.unlink(audio_path)
             except Exception:
                 pass
 
-            self.update_status("idle")
             self.is_processing = False
+            self.idle.touch()
+            self._set_status("idle")
+
+    def _finish_text(self, text: str) -> str:
+        """Apply rules, the empty-result placeholder and the prefix to a transcript."""
+        if text:
+            text = self._apply_rules(text)
+
+        if not text:
+            text = "[No speech detected]"
+
+        # Prepend prefix if configured
+        if config.transcription_prefix:
+            text = config.transcription_prefix + text
+        return text
+
+    def _queue_recording(self, audio_path: str, error: str) -> bool:
+        """
+        Keep a recording that failed to transcribe for a later retry.
+
+        Returns:
+            True if the recording was queued (and moved away from audio_path)
+        """
+        if self.queue is None:
+            return False
+
+        try:
+            job = self.queue.add(audio_path, error)
+        except OSError as e:
+            print(f"⚠️  Could not queue recording: {e}", flush=True)
+            return False
+
+        metrics.inc("queue_jobs_total", result="queued")
+        if config.verbose:
+            print(f"Queued recording {job.id} ({len(self.queue)} waiting)", flush=True)
+        self._watch_queue()
+        return True
+
+    def _recover_spills(self) -> None:
+        """Queue audio that a crash of the previous run left in the recorder's spill files."""
+        for audio_path in self.recorder.salvage_orphaned_spills():
+            if self._queue_recording(audio_path, "Recovered after a crash"):
+                print("⚠️  Recovered a recording from the previous run, it will be transcribed", flush=True)
+            else:
+                print(f"⚠️  Recovered a recording from the previous run: {audio_path}", flush=True)
+
+    def _start_queue(self) -> None:
+        """Start retrying queued jobs; called by run() once the UI is set up."""
+        self._queue_started = True
+        self._watch_queue()
+
+    def _watch_queue(self) -> None:
+        """Start the retry thread if jobs are waiting and it isn't running."""
+        if self.queue is None or not self._queue_started:
+            return
+        with self._queue_lock:
+            if self._queue_monitor and self._queue_monitor.is_alive():
+                return
+            self._queue_monitor = threading.Thread(target=self._run_queue_monitor, daemon=True)
+            self._queue_monitor.start()
+
+    def _run_queue_monitor(self) -> None:
+        """Check the service while jobs wait; drain the queue once it answers."""
+        while True:
+            with self._queue_lock:
+                jobs = []
+                for job in self.queue.pending():
+                    if job.attempts < config.queue_max_attempts:
+                        jobs.append(job)
+                    else:
+                        # Left over from a run that stopped before moving it out
+                        self._give_up(job)
+                if not jobs:
+                    self._queue_monitor = None
+                    return
+
+            time.sleep(config.queue_retry_interval)
+            # Live dictation comes first
+            if self.is_processing or self.recorder.is_recording():
+                continue
+            if TranscribeService.health_check():
+                self._drain_queue(jobs)
+
+    def _drain_queue(self, jobs: List[QueuedJob]) -> None:
+        """Transcribe queued jobs oldest first; stop at the first failure."""
+        if config.verbose:
+            print(f"Transcription service is back, retrying {len(jobs)} queued recording(s)", flush=True)
+
+        for job in jobs:
+            if self.is_processing or self.recorder.is_recording():
+                return
+
+            audio_path = self.queue.audio_path(job)
+            try:
+                text = TranscribeService.transcribe(audio_path)
+            except Exception as e:
+                self.queue.record_failure(job, str(e))
+                metrics.inc("queue_jobs_total", result="retry_failed")
+                if job.attempts >= config.queue_max_attempts:
+                    self._give_up(job)
+                return
+
+            self._archive_recording(audio_path, text)
+            self.queue.remove(job)
+            metrics.inc("queue_jobs_total", result="delivered")
+            self._deliver_queued(job, self._finish_text(text))
+
+    def _give_up(self, job: QueuedJob) -> None:
+        """Move a job that keeps failing out of the queue and tell the user."""
+        try:
+            path = self.queue.fail(job)
+        except OSError as e:
+            print(f"⚠️  Could not move queued recording {job.id} out of the queue: {e}", flush=True)
+            return
+
+        metrics.inc("queue_jobs_total", result="failed")
+        recorded = time.strftime('%H:%M', time.localtime(job.created_at))
+        print(f"⚠️  Giving up on queued recording {job.id} after {job.attempts} tries: {job.last_error}", flush=True)
+        self._emit({"event": "error", "error": job.last_error, "queued": False, "recorded_at": job.created_at})
+        self.show_notification(f"Dictation from {recorded} failed", f"Gave up after {job.attempts} tries, audio kept in {path}")
+
+    def _deliver_queued(self, job: QueuedJob, text: str) -> None:
+        """Report a transcript of a queued recording (the clipboard is left alone)."""
+        recorded = time.strftime('%H:%M', time.localtime(job.created_at))
+        self.last_transcript = {"text": text, "at": time.time(), "recorded_at": job.created_at}
+        self.on_transcription_success(text)
+        self._emit({"event": "transcript", "text": text, "queued": True, "recorded_at": job.created_at})
+        self.show_notification(
+            f"Dictation from {recorded}",
+            text[:100] + ("..." if len(text) > 100 else "")
+        )
+
+    def _apply_rules(self, text: str) -> str:
+        """Apply post-processing rules from the rules file."""
+        try:
+            self.rules = get_rule_engine()
+            return self.rules.apply(text)
+        except Exception as e:
+            if config.verbose:
+                print(f"⚠️  Text rules failed: {e}", flush=True)
+            return text
+
+    def _archive_recording(self, audio_path: str, text: str) -> None:
+        """Store recording in the local archive (if enabled) before the WAV is deleted."""
+        if not self.archive:
+            return
+
+        try:
+            entry_id = self.archive.add(audio_path, text)
+            if config.verbose:
+                print(f"Archived recording #{entry_id}", flush=True)
+        except Exception as e:
+            if config.verbose:
+                print(f"⚠️  Archive failed: {e}", flush=True)
 
     @abstractmethod
     def update_status(self, status: str) -> None:
@@ -149,5 +494,4 @@ class BaseUI(ABC):
 
     def cleanup(self) -> None:
         """Cleanup resources before exit."""
-        if self.recorder.is_recording():
-            self.recorder.stop_recording()
+        self.recorder.shutdown()
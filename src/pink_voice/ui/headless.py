@@ -1,10 +1,10 @@
 """Pink Voice headless UI for Windows/Linux."""
 
-import os
 import signal
 import sys
 
 from pink_voice.config import config
+from pink_voice.daemon.hotkeys import format_hotkey
 from pink_voice.ui.base import BaseUI
 
 
@@ -21,18 +21,19 @@ class HeadlessUI(BaseUI):
         if self.is_processing:
             return
 
-        if self.recorder.is_recording():
+        # A recording whose process died is stopped too, to salvage its audio
+        if self.recorder.is_started():
             self._stop_recording()
         else:
             self._start_recording()
 
     def update_status(self, status: str) -> None:
         """Update status (print only in VERBOSE mode)."""
-        if os.getenv('VERBOSE') != '1':
+        if not config.verbose:
             return
 
         status_map = {
-            "recording": "🎙️  Recording... (press Ctrl+Q to stop)",
+            "recording": f"🎙️  Recording... (press {format_hotkey(config.hotkey)} to stop)",
             "transcribing": "⏳ Transcribing...",
         }
         message = status_map.get(status)
@@ -50,6 +51,7 @@ class HeadlessUI(BaseUI):
     def run(self) -> None:
         """Run the headless app (block until interrupted)."""
         self._running = True
+        self._start_queue()
 
         def signal_handler(sig: int, frame) -> None:
             self._running = False
@@ -62,8 +64,8 @@ class HeadlessUI(BaseUI):
         print("\n" + "="*50, flush=True)
         print("   🎙️  Pink Voice (Headless)", flush=True)
         print("="*50, flush=True)
-        print("\n✅ Ready! Listening for Ctrl+Q", flush=True)
-        print("Press Ctrl+Q to start recording", flush=True)
+        print(f"\n✅ Ready! Listening for {format_hotkey(config.hotkey)}", flush=True)
+        print(f"Press {format_hotkey(config.hotkey)} to start recording", flush=True)
         print("Press Ctrl+C to quit\n", flush=True)
 
         try:
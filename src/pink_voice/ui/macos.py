@@ -1,13 +1,13 @@
 """Pink Voice macOS menu bar application."""
 
-import os
-import sys
 import threading
 from pathlib import Path
 
 import rumps
 
 from pink_voice.config import config
+from pink_voice.core.recorder import list_input_devices
+from pink_voice.daemon.hotkeys import format_hotkey
 from pink_voice.ui.base import BaseUI
 
 
@@ -32,13 +32,26 @@ class MacOSUI(BaseUI, rumps.App):
             callback=self._menu_toggle_recording
         )
 
-        self.menu = [self.recording_button]
+        # Device list is read once at startup; selection applies to the next recording
+        self.device_menu: rumps.MenuItem = rumps.MenuItem("Input Device")
+        for name in ["Default"] + list_input_devices():
+            item = rumps.MenuItem(name, callback=self._menu_select_device)
+            item.state = int(name == (config.input_device or "Default"))
+            self.device_menu.add(item)
 
+        self.menu = [self.recording_button, self.device_menu]
 
     def _menu_toggle_recording(self, _: rumps.MenuItem) -> None:
         """Handle menu item click."""
         self.toggle_recording()
 
+    def _menu_select_device(self, sender: rumps.MenuItem) -> None:
+        """Handle input device selection."""
+        for item in self.device_menu.values():
+            item.state = 0
+        sender.state = 1
+        self.recorder.set_input_device(None if sender.title == "Default" else sender.title)
+
     def toggle_recording(self) -> None:
         """
         Toggle recording on/off.
@@ -46,7 +59,8 @@ class MacOSUI(BaseUI, rumps.App):
         if self.is_processing:
             return
 
-        if self.recorder.is_recording():
+        # A recording whose process died is stopped too, to salvage its audio
+        if self.recorder.is_started():
             self._stop_recording()
         else:
             self._start_recording()
@@ -61,9 +75,9 @@ class MacOSUI(BaseUI, rumps.App):
         self.recording_button.title = status_map.get(status, "Start Recording")
 
         # Print status to console in VERBOSE mode
-        if os.getenv('VERBOSE') == '1':
+        if config.verbose:
             console_status_map = {
-                "recording": "🎙️  Recording... (press Ctrl+Q to stop)",
+                "recording": f"🎙️  Recording... (press {format_hotkey(config.hotkey)} to stop)",
                 "transcribing": "⏳ Transcribing...",
             }
             message = console_status_map.get(status)
@@ -80,4 +94,5 @@ class MacOSUI(BaseUI, rumps.App):
 
     def run(self) -> None:
         """Run the macOS app."""
+        self._start_queue()
         rumps.App.run(self)
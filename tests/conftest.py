@@ -0,0 +1,74 @@
+"""
+Shared fixtures.
+
+Tests run offline: the transcriber is the stub (core/stub_transcriber.py)
+and servers listen on loopback ports picked by the OS. The data directory
+points at a temporary one before pink_voice is imported, so a developer's
+~/.pink-voice config and queue are never touched.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pytest
+
+os.environ['PINK_VOICE_DATA_DIR'] = tempfile.mkdtemp(prefix='pink-voice-tests-')
+os.environ.pop('PINK_VOICE_CONFIG', None)
+
+from pink_voice.config import config  # noqa: E402
+from pink_voice.core import stub_transcriber  # noqa: E402
+from pink_voice.core.transcribe import reset_transport  # noqa: E402
+from pink_voice.core.wav import WavWriter  # noqa: E402
+
+SAMPLE_RATE = 16000
+
+
+def stub_command(*args: str) -> list:
+    """Stub transcriber command line (run as a script: it is stdlib-only and pink_voice may not be installed)."""
+    return [sys.executable, stub_transcriber.__file__, '--latency', '0', '--jitter', '0', *args]
+
+
+@pytest.fixture
+def stub_service(monkeypatch):
+    """Use the stub as the transcriber for the test, with a fresh transport."""
+    monkeypatch.setattr(config, 'transcribe_command', stub_command())
+    monkeypatch.setattr(config, 'transport', 'command')
+    monkeypatch.setattr(config, 'endpoints', [])
+    monkeypatch.setattr(config, 'routes', [])
+    monkeypatch.setattr(config, 'result_format', 'auto')
+    reset_transport()
+    yield config.transcribe_command
+    reset_transport()
+
+
+@pytest.fixture
+def make_wav(tmp_path):
+    """Write a 16kHz mono WAV of tone bursts; returns its path."""
+    def make(seconds: float = 1.0, name: str = 'clip.wav', frequency: float = 440.0) -> str:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        samples = (8000 * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+        path = str(tmp_path / name)
+        with WavWriter(path, SAMPLE_RATE) as writer:
+            writer.write(samples)
+        return path
+
+    return make
+
+
+@pytest.fixture
+def serve():
+    """Run a socketserver on a background thread; shut down after the test."""
+    servers = []
+
+    def start(server):
+        servers.append(server)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server.server_address[1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
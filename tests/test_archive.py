@@ -0,0 +1,151 @@
+"""Recording archive and `pink-voice history`."""
+
+import os
+import wave
+
+import pytest
+
+from pink_voice.commands import history
+from pink_voice.config import config
+from pink_voice.core import archive as archive_module
+from pink_voice.core.archive import RecordingArchive
+
+
+@pytest.fixture
+def archive(tmp_path):
+    opened = RecordingArchive(str(tmp_path / 'archive'))
+    yield opened
+    opened.close()
+
+
+def test_add_and_read_back(archive, make_wav, tmp_path):
+    path = make_wav(0.5)
+    entry = archive.get(archive.add(path, 'hello world'))
+
+    assert entry.text == 'hello world'
+    assert entry.duration == pytest.approx(0.5)
+
+    exported = str(tmp_path / 'exported.wav')
+    archive.export_wav(entry, exported)
+    with wave.open(path, 'rb') as original, wave.open(exported, 'rb') as copy:
+        assert copy.getparams() == original.getparams()
+        assert copy.readframes(copy.getnframes()) == original.readframes(original.getnframes())
+
+
+@pytest.mark.parametrize('fts', [True, False])
+def test_search(archive, make_wav, fts):
+    if not fts:
+        archive._fts = False
+    path = make_wav(0.1)
+    first = archive.add(path, 'send the quarterly report')
+    second = archive.add(path, 'report the bug "quickly"')
+    archive.add(path, 'lunch at noon')
+
+    assert [entry.id for entry in archive.search('report')] == [second, first]
+    assert [entry.id for entry in archive.search('quart')] == [first]
+    assert [entry.id for entry in archive.search('report bug')] == [second]
+    assert [entry.id for entry in archive.search('"quickly"')] == [second]
+    assert len(archive.search('', limit=2)) == 2
+    assert archive.search('nothing') == []
+
+
+def test_update_text_is_searchable(archive, make_wav):
+    entry_id = archive.add(make_wav(0.1), 'old words')
+    archive.update_text(entry_id, 'new words')
+
+    assert archive.search('old') == []
+    assert [entry.id for entry in archive.search('new')] == [entry_id]
+
+
+def test_small_size_cap_evicts_oldest_entries(tmp_path, make_wav):
+    # 16KB of audio per entry, 100KB cap
+    archive = RecordingArchive(str(tmp_path / 'archive'), max_bytes=100_000)
+    path = make_wav(0.5)
+    ids = [archive.add(path, f'entry {i}') for i in range(10)]
+
+    total = sum(segment.stat().st_size for segment in archive.segments_dir.glob('*.pcm'))
+    assert total <= 100_000
+    assert archive.get(ids[0]) is None
+    assert archive.get(ids[-1]) is not None
+    assert archive.search('entry', limit=20)[0].id == ids[-1]
+    archive.close()
+
+
+def test_expired_entries_are_evicted(tmp_path, make_wav, monkeypatch):
+    archive = RecordingArchive(str(tmp_path / 'archive'), retention_days=1)
+    now = archive_module.time.time()
+    monkeypatch.setattr(archive_module.time, 'time', lambda: now - 2 * 86400)
+    old = archive.add(make_wav(0.1), 'old')
+    monkeypatch.setattr(archive_module.time, 'time', lambda: now)
+    new = archive.add(make_wav(0.1), 'new')
+
+    assert archive.get(old) is None
+    assert archive.get(new) is not None
+    archive.close()
+
+
+def test_reopening_keeps_entries_and_appends(tmp_path, make_wav):
+    root = str(tmp_path / 'archive')
+    archive = RecordingArchive(root)
+    first = archive.add(make_wav(0.2), 'before restart')
+    archive.close()
+
+    archive = RecordingArchive(root)
+    second = archive.add(make_wav(0.2), 'after restart')
+
+    assert second > first
+    assert [entry.text for entry in archive.search('restart')] == ['after restart', 'before restart']
+    assert len(archive.read_pcm(archive.get(first))) == archive.get(first).length
+    archive.close()
+
+
+@pytest.fixture
+def history_archive(tmp_path, monkeypatch, make_wav):
+    """Archive in a temporary data dir, as `pink-voice history` opens it."""
+    monkeypatch.setattr(config, 'data_dir', str(tmp_path))
+    monkeypatch.setattr(config, 'archive_enabled', True)
+    archive = archive_module.open_archive()
+    ids = [archive.add(make_wav(0.5), text) for text in ('first note', 'second note')]
+    archive.close()
+    return ids
+
+
+def test_history_lists_and_searches(history_archive, capsys):
+    assert history.run(['sec']) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    assert lines[0].startswith(f'#{history_archive[1]} ') and lines[0].endswith('second note')
+
+    assert history.run([]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 2
+
+
+def test_history_export(history_archive, tmp_path, capsys):
+    path = str(tmp_path / 'out.wav')
+    assert history.run(['--export', str(history_archive[0]), path]) == 0
+    assert os.path.getsize(path) > 0
+
+    assert history.run(['--export', '999', path]) == 1
+    assert 'No entry #999' in capsys.readouterr().err
+
+
+def test_history_retranscribe(history_archive, stub_service, capsys):
+    assert history.run(['--retranscribe', str(history_archive[0])]) == 0
+    assert capsys.readouterr().out.startswith('stub transcription')
+
+    assert history.run(['stub']) == 0
+    assert 'stub transcription' in capsys.readouterr().out
+
+
+def test_history_retranscribe_without_audio(history_archive, tmp_path, capsys):
+    for segment in (tmp_path / 'archive' / 'segments').glob('*.pcm'):
+        segment.unlink()
+
+    assert history.run(['--retranscribe', str(history_archive[0])]) == 1
+    assert 'is not available' in capsys.readouterr().err
+
+
+def test_history_with_archive_disabled(monkeypatch, capsys):
+    monkeypatch.setattr(config, 'archive_enabled', False)
+    assert history.run([]) == 1
+    assert 'Archive is disabled' in capsys.readouterr().err
@@ -0,0 +1,121 @@
+"""Config file parsing, environment overrides and reloading."""
+
+import os
+
+import pytest
+
+from pink_voice.config import LATENCY_PROFILES, Config
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    """Point the config at a file in tmp_path (not created); returns its path."""
+    path = tmp_path / 'config.toml'
+    monkeypatch.setenv('PINK_VOICE_CONFIG', str(path))
+    return path
+
+
+def test_latency_profile_from_file(config_file):
+    config_file.write_text('[audio]\nlatency_profile = "power-saver"\n')
+    assert Config().latency_profile == 'power-saver'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('low-latency', 'low-latency'),
+    ('LOW-LATENCY', 'low-latency'),
+    ('turbo', 'balanced'),
+])
+def test_latency_profile_from_env(config_file, monkeypatch, value, expected):
+    config_file.write_text('latency_profile = "power-saver"\n')
+    monkeypatch.setenv('PINK_VOICE_LATENCY_PROFILE', value)
+    assert Config().latency_profile == expected
+
+
+def test_latency_profiles_are_ordered_by_block_size():
+    blocks = [profile.block_seconds for profile in LATENCY_PROFILES.values()]
+    assert blocks == sorted(blocks)
+
+
+def test_tables_only_group_settings(config_file):
+    config_file.write_text('verbose = true\n[audio]\nsample_rate = 24000\n[backend]\nretries = 4\n')
+    loaded = Config()
+    assert (loaded.verbose, loaded.sample_rate, loaded.retries) == (True, 24000, 4)
+
+
+def test_wrong_types_and_unknown_keys_are_reported_and_ignored(config_file, capsys):
+    config_file.write_text(
+        'sample_rate = "fast"\n'
+        'hedge = 1\n'
+        'hedge_delay = 2\n'
+        'transcribe_command = ["pink-transcriber", "--model", "tiny.en"]\n'
+        'colour = "pink"\n'
+    )
+    loaded = Config()
+    out = capsys.readouterr().out
+
+    assert loaded.sample_rate == 16000
+    assert "'sample_rate' has the wrong type (str)" in out
+    # Booleans must be booleans
+    assert loaded.hedge is True
+    assert "'hedge' has the wrong type (int)" in out
+    # Integers are fine where a float is expected
+    assert loaded.hedge_delay == 2.0
+    assert loaded.transcribe_command == ["pink-transcriber", "--model", "tiny.en"]
+    assert "unknown setting 'colour'" in out
+
+
+def test_invalid_file_falls_back_to_defaults(config_file, capsys):
+    config_file.write_text('sample_rate = \n')
+    assert Config().sample_rate == 16000
+    assert 'Config file not loaded' in capsys.readouterr().out
+
+
+def test_environment_overrides_the_file(config_file, monkeypatch):
+    config_file.write_text('sample_rate = 24000\nhedge = false\nhotkey = "f9"\nretry_backoff = 0.5\n')
+    monkeypatch.setenv('PINK_VOICE_SAMPLE_RATE', '48000')
+    monkeypatch.setenv('PINK_VOICE_HEDGE', 'yes')
+    monkeypatch.setenv('PINK_VOICE_HOTKEY', 'Ctrl+Shift+Space')
+    monkeypatch.setenv('PINK_VOICE_RETRY_BACKOFF', 'soon')
+
+    loaded = Config()
+    assert loaded.sample_rate == 48000
+    assert loaded.hedge is True
+    assert loaded.hotkey == 'ctrl+shift+space'
+    # An unparsable value keeps the file's
+    assert loaded.retry_backoff == 0.5
+
+
+def test_reload_reports_changes_to_listeners(config_file):
+    config_file.write_text('sample_rate = 16000\n')
+    loaded = Config()
+    seen = []
+    loaded.add_listener(seen.append)
+
+    assert loaded.reload_if_changed() == set()
+
+    config_file.write_text('sample_rate = 24000\nhotkey = "f9"\n')
+    # Make sure the change is seen on filesystems with coarse timestamps
+    os.utime(config_file, (loaded._mtime + 10, loaded._mtime + 10))
+    assert loaded.reload_if_changed() == {'sample_rate', 'hotkey'}
+    assert (loaded.sample_rate, loaded.hotkey) == (24000, 'f9')
+    assert seen == [{'sample_rate', 'hotkey'}]
+
+    config_file.unlink()
+    assert loaded.reload_if_changed() == {'sample_rate', 'hotkey'}
+    assert loaded.sample_rate == 16000
+
+
+def test_failing_listener_does_not_stop_the_others(config_file, capsys):
+    loaded = Config()
+    seen = []
+
+    def broken(changed):
+        raise RuntimeError("boom")
+
+    loaded.add_listener(broken)
+    loaded.add_listener(seen.append)
+    config_file.write_text('verbose = true\n')
+
+    assert loaded.reload() == {'verbose'}
+    assert seen == [{'verbose'}]
+    assert 'Applying config change failed: boom' in capsys.readouterr().out
@@ -0,0 +1,199 @@
+"""Control API over a Unix socket and over TCP with its token, against a fake app."""
+
+import json
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+
+import pytest
+
+from pink_voice.config import config
+from pink_voice.daemon.control import ControlServer, send_command
+
+
+class FakeRecorder:
+    def is_recording(self) -> bool:
+        return False
+
+    def diagnose(self, action, seconds=None) -> bool:
+        return False
+
+
+class FakeApp:
+    """The parts of BaseUI the control server uses; stop() finishes with `outcome` events."""
+
+    def __init__(self) -> None:
+        self.status = "idle"
+        self.is_processing = False
+        self.queue = None
+        self.last_transcript = None
+        self.recorder = FakeRecorder()
+        self.outcome = [{"event": "transcript", "text": "hello"}]
+        self._listeners = []
+
+    def add_listener(self, listener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener) -> None:
+        self._listeners.remove(listener)
+
+    def emit(self, event: dict) -> None:
+        for listener in list(self._listeners):
+            listener(event)
+
+    def request_start(self) -> bool:
+        self.status = "recording"
+        return True
+
+    def request_stop(self) -> bool:
+        self.status = "transcribing"
+
+        def finish() -> None:
+            for event in self.outcome:
+                self.emit(event)
+            self.status = "idle"
+
+        threading.Timer(0.05, finish).start()
+        return True
+
+
+@pytest.fixture
+def data_dir(monkeypatch):
+    # Short path: Unix socket paths are limited to ~100 bytes
+    path = tempfile.mkdtemp(prefix='pv-')
+    monkeypatch.setattr(config, 'data_dir', path)
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def app():
+    return FakeApp()
+
+
+@pytest.fixture
+def control(app, data_dir):
+    """Start a control server; returns its address."""
+    servers = []
+
+    def start(address: str) -> str:
+        server = ControlServer(app, address)
+        server.start()
+        servers.append(server)
+        return address
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def request(address: str, **fields) -> dict:
+    return next(send_command(fields, address))
+
+
+unix_only = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix sockets")
+
+
+@unix_only
+def test_unix_socket_is_owner_only(control, data_dir):
+    address = control(os.path.join(data_dir, 'control.sock'))
+    assert stat.S_IMODE(os.stat(address).st_mode) == 0o600
+    assert request(address, cmd='status') == {
+        "ok": True, "status": "idle", "recording": False, "processing": False, "queued": 0,
+    }
+
+
+@unix_only
+def test_stale_socket_is_replaced(control, data_dir):
+    address = os.path.join(data_dir, 'control.sock')
+    with open(address, 'w'):
+        pass
+    control(address)
+    assert request(address, cmd='status')['ok']
+
+
+@unix_only
+def test_commands(control, data_dir, app):
+    address = control(os.path.join(data_dir, 'control.sock'))
+
+    assert request(address, cmd='last') == {"ok": True, "text": None}
+    app.last_transcript = {"text": "earlier", "segments": []}
+    assert request(address, cmd='last') == {"ok": True, "text": "earlier", "segments": []}
+
+    assert request(address, cmd='start') == {"ok": True, "status": "recording"}
+    assert request(address, cmd='stop', wait=True) == {"ok": True, "text": "hello"}
+    assert request(address, cmd='dance') == {"ok": False, "error": "unknown command: dance"}
+    assert not request(address, cmd='diag', action='format-disk')['ok']
+
+
+@unix_only
+def test_stop_and_wait_reports_errors(control, data_dir, app):
+    address = control(os.path.join(data_dir, 'control.sock'))
+    app.outcome = [
+        {"event": "transcript", "text": "from the queue", "queued": True},
+        {"event": "error", "error": "service down", "queued": True},
+    ]
+    assert request(address, cmd='stop', wait=True) == {"ok": False, "error": "service down", "queued": True}
+
+
+@unix_only
+def test_subscribe_streams_events(control, data_dir, app):
+    address = control(os.path.join(data_dir, 'control.sock'))
+    events = send_command({'cmd': 'subscribe'}, address)
+
+    assert next(events) == {"ok": True, "status": "idle"}
+    app.emit({"event": "status", "status": "recording"})
+    assert next(events) == {"event": "status", "status": "recording"}
+    events.close()
+
+
+@unix_only
+def test_invalid_request_keeps_the_connection(control, data_dir):
+    address = control(os.path.join(data_dir, 'control.sock'))
+    with socket.socket(socket.AF_UNIX) as sock, sock.makefile('rb') as stream:
+        sock.connect(address)
+        sock.sendall(b'not json\n{"cmd": "status"}\n')
+        assert json.loads(stream.readline()) == {"ok": False, "error": "invalid request"}
+        assert json.loads(stream.readline())['ok']
+
+
+def test_tcp_needs_the_token(control, data_dir):
+    address = control(f'127.0.0.1:{free_port()}')
+    token_path = os.path.join(data_dir, 'control.token')
+    if os.name != 'nt':
+        assert stat.S_IMODE(os.stat(token_path).st_mode) == 0o600
+
+    # send_command reads the token file
+    assert request(address, cmd='status')['ok']
+
+    host, port = address.rsplit(':', 1)
+    for token in (None, '', 'guess'):
+        with socket.create_connection((host, int(port))) as sock, sock.makefile('rb') as stream:
+            message = {'cmd': 'start'} if token is None else {'cmd': 'start', 'token': token}
+            sock.sendall(json.dumps(message).encode() + b'\n')
+            assert json.loads(stream.readline()) == {"ok": False, "error": "invalid token"}
+            # The connection is closed after a bad token
+            assert stream.readline() == b''
+
+
+def test_token_changes_per_start_and_is_removed_on_stop(app, data_dir):
+    token_path = os.path.join(data_dir, 'control.token')
+    tokens = []
+    for _ in range(2):
+        server = ControlServer(app, f'127.0.0.1:{free_port()}')
+        server.start()
+        with open(token_path, encoding='utf-8') as f:
+            tokens.append(f.read())
+        server.stop()
+        assert not os.path.exists(token_path)
+
+    assert tokens[0] != tokens[1]
@@ -0,0 +1,142 @@
+"""On-demand diagnostics: stack dumps, the sampling profiler, memory snapshots and the signal handlers."""
+
+import os
+import signal
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from pink_voice.config import config
+from pink_voice.core import diagnostics
+from pink_voice.core.diagnostics import SamplingProfiler, dump_stacks, run_action
+
+
+@pytest.fixture(autouse=True)
+def diagnostics_dir(tmp_path, monkeypatch):
+    """Files go to a temporary data dir; fresh profiler and memory state per test."""
+    monkeypatch.setattr(config, 'data_dir', str(tmp_path))
+    monkeypatch.setattr(diagnostics, '_role', 'main')
+    monkeypatch.setattr(diagnostics, 'profiler', SamplingProfiler(interval=0.001))
+    monkeypatch.setattr(diagnostics, '_last_snapshot', None)
+    yield tmp_path / 'diagnostics'
+    diagnostics.profiler.stop()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+@pytest.fixture
+def parked():
+    """Three threads waiting in the same place."""
+    release = threading.Event()
+
+    def parked_worker() -> None:
+        release.wait(10)
+
+    threads = [threading.Thread(target=parked_worker, name=f'parked-{i}') for i in range(3)]
+    for thread in threads:
+        thread.start()
+    yield threads
+    release.set()
+    for thread in threads:
+        thread.join()
+
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_identical_stacks_are_grouped(parked, diagnostics_dir):
+    path = dump_stacks()
+    assert dump_stacks() != path
+
+    assert os.path.dirname(path) == str(diagnostics_dir)
+    assert os.path.basename(path).startswith(f'stacks-main-{os.getpid()}-')
+    text = open(path, encoding='utf-8').read()
+    assert "\n## 3 x parked-0, parked-1, parked-2\n" in text
+    assert "parked_worker (test_diagnostics.py:" in text
+    # The dumping thread itself is left out
+    assert "dump_stacks (diagnostics.py:" not in text
+
+
+def test_profile_runs_for_its_time(parked, capsys):
+    assert run_action('profile', seconds=0.2) == {"file": None, "message": "Profiling for 0.2s"}
+    assert run_action('profile')["message"] == "Profiler already running"
+
+    assert wait_until(lambda: not diagnostics.profiler.running)
+    path = diagnostics.profiler.last_path
+    lines = open(path, encoding='utf-8').read().splitlines()
+    assert any(line.startswith('parked-0;') and 'parked_worker (test_diagnostics.py:' in line for line in lines)
+    _, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+    assert f"written to {path}" in capsys.readouterr().out
+
+
+def test_profile_stop_writes_at_once(parked):
+    assert run_action('profile-stop') == {"file": None, "message": "Profiler not running"}
+
+    run_action('profile', seconds=60)
+    started = time.monotonic()
+    reply = run_action('profile-stop')
+    assert time.monotonic() - started < 5
+    assert reply["file"] and os.path.exists(reply["file"])
+    assert not diagnostics.profiler.running
+
+
+def test_memory_snapshots_compare_with_the_previous_one():
+    assert run_action('memory') == {"file": None, "message": "Memory tracing started, ask again for a snapshot"}
+    assert tracemalloc.is_tracing()
+
+    first = run_action('memory')["file"]
+    held = [bytearray(1000) for _ in range(100)]
+    second = run_action('memory')["file"]
+    assert held
+    # Taken within the same second, but not overwritten
+    assert first != second
+
+    assert "Top 25 allocation sites" in open(first, encoding='utf-8').read()
+    assert "Growth since memory-main-" in open(second, encoding='utf-8').read()
+    # The raw snapshot is kept next to the report
+    assert os.path.exists(os.path.splitext(second)[0] + '.tracemalloc')
+
+    assert run_action('memory-stop')["message"] == "Memory tracing stopped"
+    assert not tracemalloc.is_tracing()
+    assert run_action('memory-stop')["message"] == "Memory tracing not running"
+
+
+def test_unknown_action():
+    with pytest.raises(ValueError):
+        run_action('format-disk')
+
+
+def test_background_failures_are_reported(capsys):
+    diagnostics.request('format-disk')
+    assert wait_until(lambda: "Diagnostics 'format-disk' failed" in capsys.readouterr().out)
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGUSR1'), reason="needs SIGUSR1/SIGUSR2")
+def test_signals_run_and_forward_actions(diagnostics_dir):
+    previous = {sig: signal.getsignal(sig) for sig in (signal.SIGUSR1, signal.SIGUSR2)}
+    forwarded = []
+    try:
+        diagnostics.install_signal_handlers('main', forward=lambda action, seconds: forwarded.append(action))
+
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert wait_until(lambda: diagnostics_dir.exists() and list(diagnostics_dir.glob('stacks-main-*.txt')))
+
+        os.kill(os.getpid(), signal.SIGUSR2)
+        assert wait_until(lambda: diagnostics.profiler.running)
+        os.kill(os.getpid(), signal.SIGUSR2)
+        assert wait_until(lambda: list(diagnostics_dir.glob('profile-main-*.folded')))
+
+        assert wait_until(lambda: sorted(forwarded) == ['profile', 'profile-stop', 'stacks'])
+        assert wait_until(lambda: not any(t.name == 'pink-voice-diagnostics' for t in threading.enumerate()))
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
@@ -0,0 +1,158 @@
+"""Recorder pipeline DSP stages."""
+
+import numpy as np
+import pytest
+
+from pink_voice.core.dsp import (Downmixer, HighPassFilter, LoudnessNormalizer, SpectralGate, SpeechActivity,
+                                 StreamingResampler, resample_poly)
+
+RATE = 16000
+
+
+def _tone(seconds: float, frequency: float, rate: int = RATE, amplitude: float = 8000.0) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+
+
+def _rms(samples: np.ndarray) -> float:
+    return float(np.sqrt(np.mean(samples.astype(np.float64) ** 2)))
+
+
+def _blocks(samples: np.ndarray, size: int = 480):
+    for start in range(0, len(samples), size):
+        yield samples[start:start + size]
+
+
+@pytest.mark.parametrize('src_rate', [44100, 48000])
+def test_streaming_resampler_matches_whole_recording(src_rate):
+    rng = np.random.default_rng(0)
+    audio = rng.integers(-8000, 8000, int(1.3 * src_rate)).astype(np.int16)
+    resampler = StreamingResampler(src_rate, RATE)
+
+    streamed = np.concatenate([resampler.process(block) for block in _blocks(audio, 1024)] + [resampler.flush()])
+    whole = StreamingResampler._to_int16(resample_poly(audio, RATE, src_rate))
+
+    np.testing.assert_array_equal(streamed, whole)
+
+
+def test_streaming_resampler_output_does_not_depend_on_block_size():
+    rng = np.random.default_rng(4)
+    audio = rng.integers(-8000, 8000, 48000).astype(np.int16)
+    outputs = []
+    for size in (1, 480, 4096, 48000):
+        resampler = StreamingResampler(48000, RATE)
+        outputs.append(np.concatenate([resampler.process(block) for block in _blocks(audio, size)]
+                                      + [resampler.flush()]))
+
+    assert len(outputs[0]) == 16000
+    for output in outputs[1:]:
+        np.testing.assert_array_equal(output, outputs[0])
+
+
+
+def test_downmixer_mean():
+    block = np.array([[100, 300], [-100, -301]], dtype=np.int16)
+    np.testing.assert_array_equal(Downmixer(2).process(block), [200, -201])
+    np.testing.assert_array_equal(Downmixer(1).process(block[:, :1]), [100, -100])
+
+
+def test_downmixer_beamform_aligns_delayed_channel():
+    rng = np.random.default_rng(1)
+    source = rng.integers(-8000, 8000, RATE).astype(np.int16)
+    delay = 5
+    # Channel 1 hears the source 5 samples later than channel 0
+    stereo = np.stack([source, np.concatenate((np.zeros(delay, np.int16), source[:-delay]))], axis=1)
+    mixer = Downmixer(2, mode='beamform', sample_rate=RATE, max_delay_seconds=0.001, estimate_seconds=0.25)
+
+    out = np.concatenate([mixer.process(block) for block in _blocks(stereo)])
+
+    assert list(mixer.delays) == [0, delay]
+    # Once aligned, both channels add up to the (delayed) source itself
+    np.testing.assert_allclose(out[RATE // 2:], source[RATE // 2 - delay:-delay], atol=1)
+
+
+def test_high_pass_filter_removes_dc_and_keeps_speech_band():
+    hpf = HighPassFilter(RATE, 80.0)
+    dc = np.full(RATE, 5000, dtype=np.int16)
+    assert abs(np.concatenate([hpf.process(block) for block in _blocks(dc)])[-1000:]).max() < 50
+
+    hpf = HighPassFilter(RATE, 80.0)
+    tone = _tone(1.0, 1000.0)
+    out = np.concatenate([hpf.process(block) for block in _blocks(tone)])
+    assert _rms(out[1000:]) == pytest.approx(_rms(tone), rel=0.02)
+
+
+def test_loudness_normalizer_reaches_target_and_respects_ceiling():
+    quiet = (_tone(1.0, 440.0, amplitude=500.0) + 200).astype(np.int16)
+    normalizer = LoudnessNormalizer(target_rms_dbfs=-20.0, max_gain_db=30.0)
+    for block in _blocks(quiet):
+        normalizer.observe(block)
+    assert normalizer.dc_offset == pytest.approx(200, abs=1)
+
+    pages = [quiet.copy()]
+    normalizer.apply(pages)
+
+    assert float(np.mean(pages[0])) == pytest.approx(0, abs=2)
+    assert 20 * np.log10(_rms(pages[0]) / 32768) == pytest.approx(-20.0, abs=0.5)
+
+    loud = _tone(1.0, 440.0, amplitude=30000.0)
+    normalizer = LoudnessNormalizer(target_rms_dbfs=-3.0)
+    normalizer.observe(loud)
+    pages = [loud.copy()]
+    normalizer.apply(pages)
+    assert np.abs(pages[0]).max() <= normalizer.ceiling
+
+
+def test_loudness_normalizer_caps_gain_on_silence():
+    silence = np.zeros(RATE, dtype=np.int16)
+    silence[::100] = 1
+    normalizer = LoudnessNormalizer(max_gain_db=20.0)
+    normalizer.observe(silence)
+    normalizer.apply([silence.copy()])
+    assert normalizer.gain == pytest.approx(10.0)
+
+
+def test_speech_activity_counts_loud_stretches():
+    rng = np.random.default_rng(3)
+    audio = rng.normal(0, 30, 3 * RATE)
+    audio[RATE:2 * RATE] += _tone(1.0, 300.0)
+    meter = SpeechActivity(RATE)
+    for block in _blocks(audio.astype(np.int16), 333):
+        meter.observe(block)
+
+    assert meter.speech_seconds == pytest.approx(1.0, abs=0.05)
+
+
+def _dominant_hz(samples: np.ndarray, rate: int) -> float:
+    spectrum = np.abs(np.fft.rfft(samples.astype(np.float64)))
+    return float(np.argmax(spectrum) * rate / len(samples))
+
+
+def test_resample_poly_length_and_frequency():
+    tone = _tone(1.0, 440.0, rate=48000)
+    out = resample_poly(tone, 1, 3)
+
+    assert len(out) == 16000
+    assert _dominant_hz(out, RATE) == pytest.approx(440.0, abs=1.0)
+    assert _rms(out[1000:-1000]) == pytest.approx(_rms(tone), rel=0.01)
+
+
+def test_resample_poly_removes_frequencies_above_the_new_nyquist():
+    out = resample_poly(_tone(1.0, 12000.0, rate=48000), 1, 3)
+    assert _rms(out[1000:-1000]) < 0.01 * 8000
+
+
+def test_spectral_gate_keeps_length_and_lowers_noise():
+    rng = np.random.default_rng(2)
+    noise = rng.normal(0, 300, 2 * RATE)
+    audio = noise.copy()
+    audio[RATE:] += _tone(1.0, 500.0)
+    audio = audio.astype(np.int16)
+    gate = SpectralGate(RATE, reduction_db=12.0)
+
+    out = np.concatenate([gate.process(block) for block in _blocks(audio)] + [gate.flush()])
+
+    assert len(out) == len(audio)
+    # Noise-only half is attenuated, the tone survives
+    assert _rms(out[RATE // 2:RATE]) < 0.5 * _rms(audio[RATE // 2:RATE])
+    assert _rms(out[RATE + 1000:]) == pytest.approx(_rms(audio[RATE + 1000:]), rel=0.1)
@@ -0,0 +1,197 @@
+"""Gateway over loopback (token, batching, scheduling, failures, timeouts) and splitting of batched results."""
+
+import re
+import threading
+
+import pytest
+
+from pink_voice.config import config
+from pink_voice.core import gateway
+from pink_voice.core.gateway import GatewayServer, MicroBatcher, jain_index
+from pink_voice.core.metrics import metrics
+from pink_voice.core.results import Segment, TranscriptionResult, Word, split_result
+from pink_voice.core.transports import RelayTransport
+
+TOKEN = 'test-token'
+
+
+def _counter(name: str) -> float:
+    match = re.search(rf'^pink_voice_{name} (\S+)$', metrics.render_prometheus(), re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+@pytest.fixture
+def start_gateway(stub_service, serve):
+    """Start a loopback gateway; returns a factory of clients for it."""
+    def start(**batcher) -> tuple:
+        server = GatewayServer('127.0.0.1', 0, MicroBatcher(**batcher), TOKEN)
+        port = serve(server)
+
+        def client(name: str, token: str = TOKEN) -> RelayTransport:
+            return RelayTransport('127.0.0.1', port, client=name, token=token)
+
+        return server, client
+
+    return start
+
+
+def test_requests_need_the_token(start_gateway, make_wav):
+    _, client = start_gateway()
+
+    assert client('a').health_check(5)
+    assert not client('a', token='wrong').health_check(5)
+    assert not client('a', token='').health_check(5)
+    with pytest.raises(RuntimeError, match='invalid token'):
+        client('a', token='wrong').transcribe(make_wav())
+
+
+def test_server_needs_a_token():
+    with pytest.raises(ValueError):
+        GatewayServer('127.0.0.1', 0, MicroBatcher(), '')
+
+
+def test_transcribe(start_gateway, make_wav):
+    _, client = start_gateway()
+    assert client('a').transcribe(make_wav()) == 'stub transcription.'
+
+
+def test_concurrent_requests_share_one_batch(start_gateway, make_wav):
+    _, client = start_gateway(window=1.0, max_batch=3)
+    paths = [make_wav(1.0, f'clip{i}.wav') for i in range(3)]
+    batches, batched = _counter('gateway_batches_total'), _counter('gateway_batched_requests_total')
+
+    replies = [None] * 3
+
+    def send(i: int) -> None:
+        replies[i] = client(f'client-{i}').transcribe(paths[i], ['--format', 'jsonl'])
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    # Each client gets its own clip's segment back, with timings relative to its clip
+    assert all('"text": "stub transcription."' in reply for reply in replies)
+    assert all('"start": 0.0' in reply for reply in replies)
+    assert _counter('gateway_batches_total') - batches == 1
+    assert _counter('gateway_batched_requests_total') - batched == 3
+
+
+def test_unknown_args_are_dropped(stub_service, monkeypatch):
+    monkeypatch.setattr(config, 'routes', [{'name': 'fast', 'max_seconds': 6, 'args': '--model base.en'}])
+    server = GatewayServer('127.0.0.1', 0, MicroBatcher(), TOKEN)
+    try:
+        assert server.profile_args(('--model', 'base.en')) == ('--model', 'base.en')
+        assert server.profile_args(('--model', 'other')) == ()
+        assert server.profile_args(('--output', '/etc/passwd')) == ()
+        assert server.profile_args(()) == ()
+    finally:
+        server.server_close()
+
+
+def test_client_names_past_the_limit_share_other(stub_service, monkeypatch):
+    monkeypatch.setattr(gateway, 'MAX_CLIENTS', 2)
+    server = GatewayServer('127.0.0.1', 0, MicroBatcher(), TOKEN)
+    try:
+        assert [server.client_name(name) for name in ('a', 'b', 'c', 'a', 'd')] == ['a', 'b', 'other', 'a', 'other']
+    finally:
+        server.server_close()
+
+
+def _job(client: str) -> gateway.GatewayJob:
+    return gateway.GatewayJob(client, b'')
+
+
+def test_batches_take_clients_in_turn():
+    batcher = MicroBatcher(max_batch=1)
+    # Holding the lock keeps the workers out while the queues are filled and drained here
+    with batcher._cond:
+        for client, count in (('busy', 3), ('quiet', 1)):
+            batcher._queues[client] = gateway.collections.deque(_job(client) for _ in range(count))
+        order = [batcher._fill(batching=False)[0].client for _ in range(4)]
+
+    assert order == ['busy', 'quiet', 'busy', 'busy']
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    """Unbatched MicroBatcher with one worker, transcribing every job to "hi"."""
+    monkeypatch.setattr(config, 'result_format', 'text')
+
+    def make(**options) -> MicroBatcher:
+        batcher = MicroBatcher(window=0, **options)
+        batcher._transcribe = lambda batch: [TranscriptionResult('hi') for _ in batch]
+        return batcher
+
+    return make
+
+
+def test_worker_survives_a_failed_batch(batcher, capsys):
+    batcher = batcher()
+    record_wait = batcher._record_wait
+
+    def broken(client: str, wait: float) -> None:
+        batcher._record_wait = record_wait
+        raise KeyError('boom')
+
+    batcher._record_wait = broken
+    assert batcher.submit(_job('a')) == {'ok': False, 'error': "'boom'"}
+    assert "Gateway batch failed: 'boom'" in capsys.readouterr().out
+    assert batcher.submit(_job('a')) == {'ok': True, 'text': 'hi'}
+
+
+def test_requests_time_out(batcher):
+    batcher = batcher(timeout=0.2)
+    release = threading.Event()
+    batcher._transcribe = lambda batch: release.wait(10) and [TranscriptionResult('late') for _ in batch]
+    replies = []
+    # The first job stalls the only worker, the second never leaves the queue
+    threads = [threading.Thread(target=lambda: replies.append(batcher.submit(_job('a')))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert replies == [{'ok': False, 'error': 'No transcript within 0.2s'}] * 2
+    assert batcher._queues == {}
+    assert 'pink_voice_gateway_timeouts_total{client="a"}' in metrics.render_prometheus()
+    release.set()
+
+
+def test_jain_index():
+    assert jain_index([]) == 1.0
+    assert jain_index([2.0, 2.0, 2.0]) == pytest.approx(1.0)
+    assert jain_index([1.0, 0.0, 0.0, 0.0]) == pytest.approx(0.25)
+
+
+def _words(*timings) -> list:
+    return [Word(word, start, end) for word, start, end in timings]
+
+
+def test_split_result_by_word_timings():
+    # Clips at 0s and 3s; the transcriber merged the end of one and the start of the next into a segment
+    merged = Segment('one two three four', 0.2, 4.0,
+                     words=_words(('one', 0.2, 0.6), ('two', 0.7, 1.5), ('three', 3.1, 3.5), ('four', 3.6, 4.0)))
+    result = TranscriptionResult('one two three four', [merged], format='jsonl')
+
+    first, second = split_result(result, [0.0, 3.0])
+
+    assert first.text == 'one two'
+    assert second.text == 'three four'
+    assert (second.segments[0].start, second.segments[0].end) == pytest.approx((0.1, 1.0))
+    assert second.segments[0].words[0].start == pytest.approx(0.1)
+    assert first.format == second.format == 'jsonl'
+
+
+def test_split_result_untimed_segments():
+    result = TranscriptionResult('a b c', [
+        Segment('a', 0.5, 1.0),
+        Segment('b'),  # no timings: stays with the clip before it
+        Segment('c', 3.2, 3.8),
+    ], format='jsonl')
+
+    first, second, third = split_result(result, [0.0, 3.0, 6.0])
+
+    assert (first.text, second.text, third.text) == ('a b', 'c', '')
+    assert second.segments[0].start == pytest.approx(0.2)
@@ -0,0 +1,107 @@
+"""Hotkey parsing and the listener's key handling, with a fake pynput listener."""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+try:
+    from pink_voice.daemon import hotkeys
+except ImportError:
+    # pynput needs a display server
+    pytest.skip("pynput not available", allow_module_level=True)
+
+from pink_voice.config import config
+from pink_voice.daemon.hotkeys import HotkeyListener, format_hotkey, parse_hotkey
+
+
+@pytest.mark.parametrize('spec, modifiers, key', [
+    ('ctrl+q', {'ctrl'}, 'q'),
+    ('Ctrl + Shift + Space', {'ctrl', 'shift'}, 'space'),
+    ('command+option+d', {'cmd', 'alt'}, 'd'),
+    ('win+h', {'cmd'}, 'h'),
+    ('f9', set(), 'f9'),
+])
+def test_parse_hotkey(spec, modifiers, key):
+    assert parse_hotkey(spec) == (frozenset(modifiers), key)
+
+
+@pytest.mark.parametrize('spec', ['', 'ctrl', 'ctrl+shift', 'ctrl+a+b'])
+def test_hotkey_needs_exactly_one_key(spec):
+    with pytest.raises(ValueError):
+        parse_hotkey(spec)
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('ctrl+q', 'Ctrl+Q'),
+    ('ctrl+shift+space', 'Ctrl+Shift+Space'),
+    ('f9', 'F9'),
+])
+def test_format_hotkey(spec, expected):
+    assert format_hotkey(spec) == expected
+
+
+def key(char=None, name=None):
+    return SimpleNamespace(char=char, name=name)
+
+
+@pytest.mark.parametrize('pressed, expected', [
+    (key(char='Q'), 'q'),
+    # Ctrl+Q arrives as a control character on some platforms
+    (key(char='\x11'), 'q'),
+    (key(name='ctrl_l'), 'ctrl_l'),
+    (key(name='space'), 'space'),
+])
+def test_key_names(pressed, expected):
+    assert hotkeys._key_name(pressed) == expected
+
+
+class FakeListener:
+    """Captures the callbacks pynput would call."""
+
+    def __init__(self, on_press, on_release) -> None:
+        self.press, self.release = on_press, on_release
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+@pytest.fixture
+def listener(monkeypatch):
+    """Started HotkeyListener for ctrl+shift+space; records triggers and prepares."""
+    monkeypatch.setattr(hotkeys.keyboard, 'Listener', FakeListener)
+    monkeypatch.setattr(config, 'hotkey', 'ctrl+shift+space')
+    triggered = threading.Semaphore(0)
+    prepared = []
+    listener = HotkeyListener(triggered.release, on_prepare=lambda: prepared.append(True))
+    listener.triggered, listener.prepared = triggered, prepared
+    listener.start()
+    return listener
+
+
+def test_hotkey_triggers_once_per_press(listener):
+    fake = listener.listener
+    fake.press(key(name='ctrl_l'))
+    fake.press(key(name='space'))
+    assert listener.prepared == []
+    fake.press(key(name='shift_r'))
+    assert listener.prepared == [True]
+
+    fake.press(key(name='space'))
+    # Key repeat while held
+    fake.press(key(name='space'))
+    assert listener.triggered.acquire(timeout=1)
+    assert not listener.triggered.acquire(timeout=0.1)
+
+    fake.release(key(name='space'))
+    fake.press(key(name='space'))
+    assert listener.triggered.acquire(timeout=1)
+
+
+def test_invalid_hotkey_keeps_the_previous_one(listener, monkeypatch, capsys):
+    monkeypatch.setattr(config, 'hotkey', 'ctrl+shift')
+    assert listener._current_hotkey() == (frozenset({'ctrl', 'shift'}), 'space')
+    assert 'keeping Ctrl+Shift+Space' in capsys.readouterr().out
@@ -0,0 +1,121 @@
+"""Idle mode: releasing the standby recorder and the back-off of speculative warm-ups."""
+
+import threading
+import time
+
+import pytest
+
+try:
+    import sounddevice  # noqa: F401
+except (ImportError, OSError):
+    pytest.skip("sounddevice/PortAudio not available", allow_module_level=True)
+
+from pink_voice.core import idle as idle_module
+from pink_voice.core.idle import IdleMonitor
+
+
+class FakeRecorder:
+    """Counts standby spawns and releases."""
+
+    process = None
+
+    def __init__(self) -> None:
+        self.spawned = threading.Semaphore(0)
+        self.released = 0
+        self.recording = False
+
+    def ensure_standby(self) -> None:
+        self.spawned.release()
+
+    def release_standby(self) -> bool:
+        self.released += 1
+        return True
+
+    def is_recording(self) -> bool:
+        return self.recording
+
+
+TIMEOUT = 0.4
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    """Running monitor with a 0.4s timeout and a 0.2s grace for unused warm-ups."""
+    monkeypatch.setattr(idle_module, 'PREPARE_GRACE', 0.2)
+    closed = []
+    monitor = IdleMonitor(FakeRecorder(), TIMEOUT, on_idle=lambda: closed.append(True))
+    monitor.closed = closed
+    monitor.start()
+    return monitor
+
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_goes_idle_after_the_timeout(monitor):
+    assert not monitor.idle
+    # The footprint is measured last
+    assert wait_until(lambda: monitor.last_footprint)
+    assert monitor.idle
+    assert monitor.recorder.released == 1
+    assert monitor.closed == [True]
+    assert set(monitor.last_footprint) == {'main', 'recorder', 'total'}
+
+
+def test_stays_awake_while_busy(monitor):
+    monitor.recorder.recording = True
+    time.sleep(TIMEOUT * 2)
+    assert not monitor.idle
+
+
+def test_prepare_is_a_no_op_while_awake(monitor):
+    monitor.prepare()
+    assert not monitor.recorder.spawned.acquire(timeout=0.1)
+
+
+def test_unused_warm_up_backs_off(monitor):
+    assert wait_until(lambda: monitor.idle)
+
+    monitor.prepare()
+    assert not monitor.idle
+    assert monitor.recorder.spawned.acquire(timeout=1)
+
+    # Released again after the grace period, not the full timeout
+    started = time.monotonic()
+    assert wait_until(lambda: monitor.idle)
+    assert time.monotonic() - started < TIMEOUT
+
+    # Modifiers held for other shortcuts are ignored for one timeout...
+    monitor.prepare()
+    assert monitor.idle
+    assert not monitor.recorder.spawned.acquire(timeout=0.1)
+
+    # ...then warm-ups work again
+    assert wait_until(lambda: time.monotonic() >= monitor._prepare_blocked_until)
+    monitor.prepare()
+    assert not monitor.idle
+    assert monitor.recorder.spawned.acquire(timeout=1)
+
+
+def test_used_warm_up_does_not_back_off(monitor):
+    assert wait_until(lambda: monitor.idle)
+
+    monitor.prepare()
+    # The hotkey followed: a recording started
+    monitor.wake()
+    assert wait_until(lambda: monitor.idle)
+
+    monitor.prepare()
+    assert not monitor.idle
+
+
+def test_no_timeout_means_never_idle():
+    monitor = IdleMonitor(FakeRecorder(), 0)
+    monitor.start()
+    assert monitor._thread is None
@@ -0,0 +1,81 @@
+"""Durable queue of recordings waiting for transcription."""
+
+import pytest
+
+from pink_voice.core import jobqueue
+from pink_voice.core.jobqueue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / 'queue'))
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """Factory of small audio files to queue."""
+    count = [0]
+
+    def make(size: int = 100) -> str:
+        count[0] += 1
+        path = tmp_path / f'recording-{count[0]}.wav'
+        path.write_bytes(b'\x00' * size)
+        return str(path)
+
+    return make
+
+
+def test_jobs_are_kept_oldest_first(queue, recording):
+    first = queue.add(recording(), 'down')
+    second = queue.add(recording())
+
+    assert [job.id for job in queue.pending()] == [first.id, second.id]
+    assert queue.pending()[0].last_error == 'down'
+    assert len(queue) == 2
+
+
+def test_queue_survives_reopening(queue, recording):
+    job = queue.add(recording())
+    queue.record_failure(job, 'still down')
+
+    reopened = JobQueue(str(queue.root))
+    (pending,) = reopened.pending()
+    assert (pending.id, pending.attempts, pending.last_error) == (job.id, 1, 'still down')
+
+
+def test_remove(queue, recording):
+    job = queue.add(recording())
+    queue.remove(job)
+
+    assert queue.pending() == []
+    assert list(queue.root.iterdir()) == []
+
+
+def test_orphans_are_adopted_and_stray_metadata_removed(queue, recording):
+    (queue.root / 'orphan.wav').write_bytes(b'\x00')
+    (queue.root / 'stray.json').write_text('{}')
+
+    assert [job.id for job in queue.pending()] == ['orphan']
+    assert (queue.root / 'orphan.json').exists()
+    assert not (queue.root / 'stray.json').exists()
+
+
+def test_oldest_jobs_are_dropped_over_the_cap(tmp_path, recording):
+    queue = JobQueue(str(tmp_path / 'queue'), max_bytes=250)
+    jobs = [queue.add(recording(100)) for _ in range(3)]
+
+    assert [job.id for job in queue.pending()] == [job.id for job in jobs[1:]]
+
+
+def test_failed_jobs_leave_the_queue(queue, recording, monkeypatch):
+    monkeypatch.setattr(jobqueue, 'FAILED_KEEP', 2)
+    jobs = [queue.add(recording()) for _ in range(3)]
+
+    paths = [queue.fail(job) for job in jobs]
+
+    assert queue.pending() == []
+    failed = queue.root / 'failed'
+    # Only the newest FAILED_KEEP are kept
+    assert sorted(path.name for path in failed.glob('*.wav')) == [f'{job.id}.wav' for job in jobs[1:]]
+    assert sorted(path.name for path in failed.glob('*.json')) == [f'{job.id}.json' for job in jobs[1:]]
+    assert paths[-1] == str(failed / f'{jobs[-1].id}.wav')
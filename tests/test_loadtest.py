@@ -0,0 +1,117 @@
+"""pink-voice loadtest: steps, saturation detection and an offline end-to-end run."""
+
+import json
+import os
+import random
+import threading
+import time
+
+import pytest
+
+import pink_voice
+from pink_voice.commands import loadtest
+from pink_voice.commands.loadtest import _percentile, _run_step, _saturated
+
+SRC = os.path.dirname(os.path.dirname(pink_voice.__file__))
+
+
+def _sleeper(seconds: float, fail_every: int = 0):
+    """send() that takes a fixed time and fails every fail_every-th call."""
+    calls = [0]
+    lock = threading.Lock()
+
+    def send(client: int, path: str) -> None:
+        with lock:
+            calls[0] += 1
+            call = calls[0]
+        time.sleep(seconds)
+        if fail_every and call % fail_every == 0:
+            raise RuntimeError("Transcription failed: busy\nstub: out of workers")
+
+    return send
+
+
+def _step(error_rate=0.0, arrival_rate=10.0, throughput=10.0, completed=50, p50=0.1, p95=0.2) -> dict:
+    return {
+        "error_rate": error_rate,
+        "arrival_rate": arrival_rate,
+        "throughput": throughput,
+        "completed": completed,
+        "latency_seconds": {"p50": p50, "p95": p95},
+    }
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 11)]
+    assert _percentile([], 0.5) == 0.0
+    assert _percentile(values, 0.0) == 1.0
+    assert _percentile(values, 0.5) == 6.0
+    assert _percentile(values, 0.95) == 10.0
+    assert _percentile(values, 1.0) == 10.0
+
+
+def test_closed_loop_step():
+    step = _run_step(['a.wav'], 0, 4, 8, random.Random(0), _sleeper(0.05))
+
+    assert (step["requests"], step["completed"], step["errors"]) == (8, 8, 0)
+    assert step["arrival_rate"] == 0.0
+    # Two rounds of four concurrent requests
+    assert step["duration_seconds"] == pytest.approx(0.1, abs=0.05)
+    assert step["latency_seconds"]["p50"] == pytest.approx(0.05, abs=0.03)
+    assert _saturated(step, step) is None
+
+
+def test_open_loop_step_counts_errors_by_message():
+    step = _run_step(['a.wav', 'b.wav'], 50.0, 8, 20, random.Random(0), _sleeper(0.01, fail_every=4))
+
+    assert (step["requests"], step["completed"], step["errors"]) == (20, 15, 5)
+    assert step["error_rate"] == 0.25
+    assert step["error_messages"] == {"stub: out of workers": 5}
+    assert step["arrival_rate"] == pytest.approx(50.0, rel=0.5)
+
+
+def test_step_reports_per_client_latency_and_fairness():
+    step = _run_step(['a.wav'], 0, 4, 8, random.Random(0), _sleeper(0.01), clients=2)
+
+    assert set(step["clients"]) == {"client-0", "client-1"}
+    assert step["clients"]["client-0"]["completed"] == 4
+    assert step["fairness"] == pytest.approx(1.0, abs=0.2)
+
+
+def test_saturation_reasons():
+    baseline = _step()
+
+    assert _saturated(baseline, baseline) is None
+    assert "error rate" in _saturated(_step(error_rate=0.1), baseline)
+    assert "throughput" in _saturated(_step(throughput=5.0), baseline)
+    assert "p95 latency" in _saturated(_step(p95=0.5), baseline)
+    # The first step is never compared with its own median
+    slow_start = _step(p95=0.5)
+    assert _saturated(slow_start, slow_start) is None
+
+
+def test_open_loop_detects_saturation():
+    # One slot serving 20ms requests can't keep up with 200 arrivals per second
+    send = _sleeper(0.02)
+    baseline = _run_step(['a.wav'], 5.0, 1, 5, random.Random(0), send)
+    overloaded = _run_step(['a.wav'], 200.0, 1, 40, random.Random(0), send)
+
+    assert _saturated(baseline, baseline) is None
+    assert _saturated(overloaded, baseline) is not None
+
+
+def test_stub_run_end_to_end(stub_service, monkeypatch, tmp_path, capsys):
+    # The stub runs as `python -m pink_voice.core.stub_transcriber`
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join(filter(None, [SRC, os.environ.get('PYTHONPATH')])))
+    output = tmp_path / 'report.json'
+
+    code = loadtest.run(['--stub', '--stub-latency', '0', '--stub-workers', '0', '--rate', '0',
+                         '-c', '2', '-n', '4', '-o', str(output)])
+
+    assert code == 0
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert json.loads(capsys.readouterr().out) == report
+    (step,) = report["steps"]
+    assert (step["completed"], step["errors"]) == (4, 0)
+    assert report["transport"] == "command"
+    assert report["saturation"] is None
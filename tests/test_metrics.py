@@ -0,0 +1,55 @@
+"""Prometheus rendering and StatsD naming."""
+
+from pink_voice.core.metrics import MetricsRegistry, StatsdEmitter
+
+
+def test_counters_and_gauges():
+    registry = MetricsRegistry()
+    registry.inc('recordings_total')
+    registry.inc('recordings_total', 2)
+    registry.inc('transcriptions_total', result='success')
+    registry.inc('transcriptions_total', 0, result='failure')
+    registry.set('gateway_queue_depth', 3, client='a')
+
+    text = registry.render_prometheus()
+
+    assert '# HELP pink_voice_recordings_total Recordings stopped with audio' in text
+    assert '# TYPE pink_voice_recordings_total counter' in text
+    assert 'pink_voice_recordings_total 3\n' in text
+    assert 'pink_voice_transcriptions_total{result="success"} 1\n' in text
+    # Incrementing by zero creates no series
+    assert 'result="failure"' not in text
+    assert '# TYPE pink_voice_gateway_queue_depth gauge' in text
+    assert 'pink_voice_gateway_queue_depth{client="a"} 3\n' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    for seconds in (0.01, 0.3, 0.3, 100.0):
+        registry.observe('transcription_seconds', seconds)
+
+    text = registry.render_prometheus()
+
+    assert 'pink_voice_transcription_seconds_bucket{le="0.05"} 1\n' in text
+    assert 'pink_voice_transcription_seconds_bucket{le="0.25"} 1\n' in text
+    assert 'pink_voice_transcription_seconds_bucket{le="0.5"} 3\n' in text
+    assert 'pink_voice_transcription_seconds_bucket{le="60"} 3\n' in text
+    assert 'pink_voice_transcription_seconds_bucket{le="+Inf"} 4\n' in text
+    assert 'pink_voice_transcription_seconds_sum 100.610000\n' in text
+    assert 'pink_voice_transcription_seconds_count 4\n' in text
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc('gateway_requests_total', client='evil"} 1\npink_voice_forged 1 \\', result='ok')
+
+    lines = registry.render_prometheus().splitlines()
+
+    assert not any(line.startswith('pink_voice_forged') for line in lines)
+    assert 'pink_voice_gateway_requests_total{client="evil\\"} 1\\npink_voice_forged 1 \\\\",result="ok"} 1' in lines
+
+
+def test_statsd_paths_cannot_forge_metrics():
+    assert StatsdEmitter._path('gateway_requests', {'result': 'ok', 'client': 'a.b:1|c\n'}) == \
+        'pink_voice.gateway_requests.a_b_1_c_.ok'
+    assert StatsdEmitter._path('recordings', {'client': ''}) == 'pink_voice.recordings._'
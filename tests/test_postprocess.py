@@ -0,0 +1,79 @@
+"""Transcript post-processing rules."""
+
+import os
+
+import pytest
+
+from pink_voice.core.postprocess import RuleEngine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return RuleEngine(str(tmp_path / 'rules.txt'))
+
+
+def test_phrases_match_whole_words_case_insensitively(engine):
+    engine.load(['comma => ,', 'pink voice => Pink Voice'])
+
+    assert engine.apply('PINK   voice is fun comma right') == 'Pink Voice is fun , right'
+    assert engine.apply('commander pinkvoice') == 'commander pinkvoice'
+
+
+def test_longer_phrase_wins(engine):
+    engine.load(['new => NEW', 'new line => \\n', 'new line please => <br>'])
+
+    assert engine.apply('new line please') == '<br>'
+    assert engine.apply('a new line') == 'a \n'
+    assert engine.apply('new lines') == 'NEW lines'
+
+
+def test_regex_rules_run_after_phrases_in_file_order(engine):
+    engine.load([
+        'comma => ,',
+        're: \\s+([,.;:!?]) => \\1',
+        're: ,(\\S) => , \\1',
+    ])
+
+    assert engine.apply('yes comma no comma maybe') == 'yes, no, maybe'
+
+
+def test_invalid_lines_are_skipped(engine, capsys):
+    engine.load(['# comment', '', 'no arrow here', 're: ( => x', 'ok => fine'])
+
+    assert engine.rule_count == 1
+    assert engine.apply('ok') == 'fine'
+    assert 'rules:3' in capsys.readouterr().out
+
+
+def test_rules_file_is_reloaded_when_it_changes(engine):
+    engine.reload_if_changed()
+    assert engine.rule_count == 0
+
+    with open(engine.path, 'w', encoding='utf-8') as f:
+        f.write('hello => hi\n')
+    engine.reload_if_changed()
+    assert engine.apply('hello there') == 'hi there'
+
+    with open(engine.path, 'w', encoding='utf-8') as f:
+        f.write('hello => hey\n')
+    stat = os.stat(engine.path)
+    os.utime(engine.path, (stat.st_atime, stat.st_mtime + 10))
+    engine.reload_if_changed()
+    assert engine.apply('hello there') == 'hey there'
+
+    os.unlink(engine.path)
+    engine.reload_if_changed()
+    assert engine.rule_count == 0
+
+
+@pytest.mark.parametrize('rules, text, expected', [
+    # 'İ' matches 'i' case-insensitively but lowercases to 'i̇'
+    (['i => I'], 'İ think i can', 'İ think I can'),
+    # 'S' matches 'ſ' (long s) case-insensitively but lowercases to 's'
+    (['ſ => s'], 'S x ſ', 's x s'),
+    (['straße => Strasse'], 'STRASSE straße', 'STRASSE Strasse'),
+    (['ǆ => dz'], 'ǅ ǆ Ǆ', 'dz dz dz'),
+])
+def test_case_insensitive_matches_beyond_lowercase(engine, rules, text, expected):
+    engine.load(rules)
+    assert engine.apply(text) == expected
@@ -0,0 +1,321 @@
+"""AudioRecorder bookkeeping against a fake recorder process, and the recorder's page buffer."""
+
+import os
+import queue
+import threading
+import time
+import wave
+
+import numpy as np
+import pytest
+
+try:
+    import sounddevice  # noqa: F401
+except (ImportError, OSError):
+    pytest.skip("sounddevice/PortAudio not available", allow_module_level=True)
+
+from pink_voice.config import LATENCY_PROFILES, config
+from pink_voice.core import recorder as recorder_module
+from pink_voice.core.metrics import MetricsRegistry
+from pink_voice.core.recorder import AudioRecorder
+from pink_voice.core.recorder_process import (HEARTBEAT_FRAMES, HEARTBEAT_SIZE, HEARTBEAT_TICKS, PcmBuffer,
+                                              RecordingResult)
+
+
+class FakeProcess:
+    """Stands in for the recorder process: alive until terminated."""
+
+    pid = 0
+
+    def __init__(self) -> None:
+        self.alive = True
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def terminate(self) -> None:
+        self.alive = False
+
+    kill = terminate
+
+    def join(self, timeout=None) -> None:
+        pass
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Fresh metrics registry for the recorder module."""
+    registry = MetricsRegistry()
+    monkeypatch.setattr(recorder_module, 'metrics', registry)
+    return registry
+
+
+@pytest.fixture
+def recorder():
+    """Recorder without a standby process; arm() puts it in the recording state."""
+    recorder = AudioRecorder(prewarm=False, stall_timeout=0.2, stream_start_timeout=0.3)
+    yield recorder
+    recorder._watchdog_stop.set()
+
+
+def arm(recorder: AudioRecorder) -> FakeProcess:
+    """Make the recorder look like it is recording with a fake process."""
+    recorder.process = FakeProcess()
+    recorder.command_queue = queue.Queue()
+    recorder.result_queue = queue.Queue()
+    recorder._heartbeat = [0.0] * HEARTBEAT_SIZE
+    recorder._recording = True
+    return recorder.process
+
+
+@pytest.mark.parametrize('page_frames, sizes', [
+    (4, [3, 3, 3]),
+    (4, [4, 4]),
+    (4, [10]),
+    (1000, [7, 1, 300]),
+])
+def test_pcm_buffer_keeps_samples_in_order(page_frames, sizes):
+    buffer = PcmBuffer(page_frames)
+    samples = np.arange(sum(sizes), dtype=np.int16)
+    offset = 0
+    for size in sizes:
+        buffer.append(samples[offset:offset + size])
+        offset += size
+
+    assert buffer.frames == len(samples)
+    assert len(buffer.pages) == -(-len(samples) // page_frames)
+    np.testing.assert_array_equal(np.concatenate(list(buffer.chunks())), samples)
+
+
+def test_pcm_buffer_never_moves_recorded_audio():
+    buffer = PcmBuffer(4)
+    buffer.append(np.ones(4, dtype=np.int16))
+    first = buffer.pages[0]
+    buffer.append(np.ones(6, dtype=np.int16))
+
+    assert buffer.pages[0] is first
+    assert all(np.shares_memory(chunk, page) for chunk, page in zip(buffer.chunks(), buffer.pages))
+
+
+def test_empty_pcm_buffer():
+    buffer = PcmBuffer(0)
+    buffer.append(np.array([], dtype=np.int16))
+    assert buffer.frames == 0
+    assert list(buffer.chunks()) == []
+
+
+@pytest.mark.parametrize('name', list(LATENCY_PROFILES))
+def test_settings_carry_the_latency_profile(recorder, name):
+    recorder.configure(latency_profile=name)
+    profile = recorder._settings().latency_profile
+    assert profile is LATENCY_PROFILES[name]
+    # A page holds many callback blocks
+    assert profile.page_seconds > 100 * profile.block_seconds
+
+
+def test_unknown_recorder_setting_is_refused(recorder):
+    with pytest.raises(ValueError, match='block_size'):
+        recorder.configure(block_size=256)
+
+
+def test_xrun_totals():
+    result = RecordingResult(path='', sample_rate=16000, capture_rate=48000, frames=16000 * 30,
+                             overflows=[0, 960], underflows=[480], cpu_seconds=0.25)
+    assert result.xruns == 3
+    assert result.cpu_per_minute == pytest.approx(0.5)
+    assert RecordingResult(path='', sample_rate=16000, capture_rate=0, frames=0).cpu_per_minute == 0.0
+
+
+def stopped_with(recorder: AudioRecorder, result: RecordingResult) -> str:
+    """Stop an armed recorder whose process sends `result`."""
+    arm(recorder)
+    recorder.result_queue.put(result)
+    return recorder.stop_recording()
+
+
+def test_xruns_are_counted(recorder, registry):
+    result = RecordingResult(path='clip.wav', sample_rate=16000, capture_rate=16000, frames=16000,
+                             overflows=[0, 512], underflows=[1024])
+
+    assert stopped_with(recorder, result) == 'clip.wav'
+
+    text = registry.render_prometheus()
+    assert 'pink_voice_xruns_total{kind="overflow"} 2\n' in text
+    assert 'pink_voice_xruns_total{kind="underflow"} 1\n' in text
+    assert recorder.last_result is result
+    assert not recorder.is_started()
+
+
+@pytest.mark.parametrize('recovery, before, after', [
+    (True, 'low-latency', 'balanced'),
+    (True, 'balanced', 'power-saver'),
+    (True, 'power-saver', 'power-saver'),
+    (False, 'low-latency', 'low-latency'),
+])
+def test_overflows_move_to_larger_buffers(recorder, registry, recovery, before, after):
+    recorder.configure(latency_profile=before, xrun_recovery=recovery)
+    stopped_with(recorder, RecordingResult(path='clip.wav', sample_rate=16000, capture_rate=16000,
+                                           frames=16000, overflows=[0]))
+    assert recorder.latency_profile == after
+
+
+def test_underflows_alone_keep_the_profile(recorder, registry):
+    recorder.configure(latency_profile='low-latency', xrun_recovery=True)
+    stopped_with(recorder, RecordingResult(path='clip.wav', sample_rate=16000, capture_rate=16000,
+                                           frames=16000, underflows=[0]))
+    assert recorder.latency_profile == 'low-latency'
+
+
+class Heartbeat:
+    """Ticks (and optionally delivers frames) like a live recorder process until stopped."""
+
+    def __init__(self, heartbeat: list, frames: bool = True, frames_until: float = float('inf')) -> None:
+        self.heartbeat = heartbeat
+        self.frames = frames
+        self.frames_until = time.monotonic() + frames_until
+        self.ticking = True
+        self._stop = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(0.02):
+            if self.ticking:
+                self.heartbeat[HEARTBEAT_TICKS] += 1
+            if self.frames and time.monotonic() < self.frames_until:
+                self.heartbeat[HEARTBEAT_FRAMES] += 320
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+@pytest.fixture
+def watch(recorder, registry, monkeypatch, capsys):
+    """Run the watchdog on an armed recorder; returns (process, heartbeat, wait for stall)."""
+    monkeypatch.setattr(config, 'verbose', True)
+    stalled = threading.Event()
+    recorder.on_stall = stalled.set
+    stop = threading.Event()
+    beats = []
+
+    def start(**heartbeat):
+        process = arm(recorder)
+        beat = Heartbeat(recorder._heartbeat, **heartbeat)
+        beats.append(beat)
+        started = time.monotonic()
+        threading.Thread(target=recorder._watchdog, args=(stop,), daemon=True).start()
+
+        def wait(timeout: float):
+            """Seconds until the stall and the reason printed, or None."""
+            if not stalled.wait(timeout):
+                return None
+            return time.monotonic() - started, capsys.readouterr().out
+
+        return process, beat, wait
+
+    yield start
+    stop.set()
+    for beat in beats:
+        beat.stop()
+
+
+def test_healthy_recording_is_left_alone(watch, recorder):
+    _, _, wait = watch()
+    assert wait(1.0) is None
+    assert recorder.restarts == 0
+
+
+def test_stuck_driver_is_detected(watch, recorder, registry):
+    _, _, wait = watch(frames_until=0.2)
+    seconds, out = wait(2.0)
+    assert 'no audio for' in out
+    assert recorder.restarts == 1
+    assert 'pink_voice_recorder_restarts_total 1\n' in registry.render_prometheus()
+
+
+def test_device_gets_time_to_open(watch, recorder):
+    _, _, wait = watch(frames=False)
+    seconds, out = wait(2.0)
+    assert seconds >= recorder.stream_start_timeout
+    assert 'no audio for' in out
+
+
+def test_dead_process_is_detected(watch):
+    process, _, wait = watch()
+    time.sleep(0.1)
+    process.alive = False
+    seconds, out = wait(1.0)
+    assert 'recorder process died' in out
+
+
+def test_unresponsive_process_is_detected(watch):
+    _, beat, wait = watch()
+    time.sleep(0.1)
+    beat.ticking = False
+    seconds, out = wait(1.0)
+    assert 'not responding' in out
+
+
+def test_stop_gives_up_when_the_process_stops_ticking(recorder, registry):
+    arm(recorder)
+    recorder._heartbeat[HEARTBEAT_TICKS] = 5
+
+    started = time.monotonic()
+    assert recorder.stop_recording() is None
+    # Well under the 30s cap
+    assert time.monotonic() - started < 2
+    assert recorder.restarts == 1
+    assert recorder.process is None
+
+
+def read_wav(path: str):
+    with wave.open(path, 'rb') as wav:
+        return wav.getframerate(), np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+
+
+def test_crashed_recording_is_salvaged_at_its_own_rate(recorder, registry, tmp_path, monkeypatch):
+    recorder.spill_dir = str(tmp_path)
+    monkeypatch.setattr(recorder, '_spawn_worker', lambda: arm(recorder))
+    recorder.configure(sample_rate=24000)
+    assert recorder.start_recording()
+
+    samples = np.arange(2400, dtype=np.int16)
+    with open(recorder._spill_path, 'wb') as spill:
+        spill.write(samples.tobytes())
+    # A config reload while recording applies to the next recording only
+    recorder.configure(sample_rate=16000)
+    recorder.process.alive = False
+
+    path = recorder.stop_recording()
+    try:
+        assert recorder.last_result.salvaged
+        rate, salvaged = read_wav(path)
+        assert rate == 24000
+        np.testing.assert_array_equal(salvaged, samples)
+        assert os.listdir(tmp_path) == []
+    finally:
+        os.unlink(path)
+
+
+def test_spills_left_by_a_crash_are_salvaged(recorder, tmp_path):
+    recorder.spill_dir = str(tmp_path)
+    samples = np.arange(1000, dtype=np.int16)
+    (tmp_path / 'pink-voice-48000hz-a1b2.pcm').write_bytes(samples.tobytes() + b'\x01')
+    (tmp_path / 'pink-voice-16000hz-empty.pcm').write_bytes(b'')
+    (tmp_path / 'pink-voice-0hz-bad.pcm').write_bytes(samples.tobytes())
+    (tmp_path / 'notes.txt').write_text('not a spill')
+
+    paths = recorder.salvage_orphaned_spills()
+    try:
+        assert len(paths) == 1
+        rate, salvaged = read_wav(paths[0])
+        assert rate == 48000
+        # The odd trailing byte of a half-written sample is dropped
+        np.testing.assert_array_equal(salvaged, samples)
+        assert sorted(os.listdir(tmp_path)) == ['notes.txt', 'pink-voice-0hz-bad.pcm']
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+
+def test_no_spill_dir(recorder):
+    assert recorder.salvage_orphaned_spills() == []
@@ -0,0 +1,152 @@
+"""Relay protocol and RelayTransport against a loopback relay running the stub transcriber."""
+
+import json
+import socket
+import struct
+
+import pytest
+
+from pink_voice.config import config
+from pink_voice.core.transports import RelayTransport, _relay_launch_command
+from pink_voice.core.wsl_relay import MAX_HEADER_BYTES, RelayServer, recv_message, safe_suffix, send_message
+from tests.conftest import stub_command
+
+
+@pytest.fixture
+def relay(serve):
+    """Transport connected to a fresh loopback relay."""
+    port = serve(RelayServer('127.0.0.1', 0, stub_command()))
+    transport = RelayTransport('127.0.0.1', port)
+    yield transport
+    transport.close()
+
+
+def test_message_round_trip():
+    left, right = socket.socketpair()
+    with left, right:
+        send_message(left, {'op': 'transcribe'}, b'audio')
+        header, payload = recv_message(right)
+    assert header == {'op': 'transcribe', 'size': 5}
+    assert payload == b'audio'
+
+
+def _raw(header: bytes, declared_length: int = None) -> socket.socket:
+    left, right = socket.socketpair()
+    left.sendall(struct.pack('>I', len(header) if declared_length is None else declared_length) + header)
+    left.close()
+    return right
+
+
+@pytest.mark.parametrize('raw, length', [
+    (b'', MAX_HEADER_BYTES + 1),
+    (b'[1, 2]', None),
+    (b'"text"', None),
+    (json.dumps({'size': -1}).encode(), None),
+    (json.dumps({'size': 'many'}).encode(), None),
+    (json.dumps({'size': 10 ** 12}).encode(), None),
+])
+def test_malformed_messages_are_refused(raw, length):
+    with _raw(raw, length) as sock, pytest.raises(ValueError):
+        recv_message(sock)
+
+
+def test_payload_limit_is_configurable():
+    left, right = socket.socketpair()
+    with left, right:
+        send_message(left, {}, b'x' * 100)
+        with pytest.raises(ValueError):
+            recv_message(right, max_size=99)
+
+
+@pytest.mark.parametrize('suffix, expected', [
+    ('.wav', '.wav'),
+    ('.flac', '.flac'),
+    ('/../../etc/passwd', '.wav'),
+    ('.wav/..', '.wav'),
+    (None, '.wav'),
+    (3, '.wav'),
+])
+def test_safe_suffix(suffix, expected):
+    assert safe_suffix(suffix) == expected
+
+
+def test_health_and_capabilities(relay):
+    assert relay.health_check(5)
+    assert relay.capabilities(5) == ['text', 'jsonl']
+
+
+def test_transcribe(relay, make_wav):
+    assert relay.transcribe(make_wav()).strip() == 'stub transcription'
+
+
+def test_transcribe_jsonl(relay, make_wav):
+    lines = relay.transcribe(make_wav(), ['--format', 'jsonl']).splitlines()
+    assert [json.loads(line)['text'] for line in lines] == ['stub transcription.']
+
+
+def test_connections_are_reused(relay, make_wav):
+    path = make_wav()
+    relay.transcribe(path)
+    pooled = list(relay._idle)
+    relay.transcribe(path)
+    assert relay._idle == pooled
+
+
+def test_stale_connection_is_retried_on_a_fresh_one(relay, make_wav):
+    path = make_wav()
+    relay.transcribe(path)
+    stale = relay._idle[0]
+    # What a pooled connection looks like after the relay exited on its idle timeout
+    stale.shutdown(socket.SHUT_RDWR)
+
+    assert relay.transcribe(path).strip() == 'stub transcription'
+    assert stale not in relay._idle
+
+
+def test_unreachable_relay_without_fallback(make_wav):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    transport = RelayTransport('127.0.0.1', port)
+
+    assert not transport.health_check(1)
+    with pytest.raises(RuntimeError, match='unavailable'):
+        transport.transcribe(make_wav())
+
+
+@pytest.mark.parametrize('args, expected', [
+    (['--format', 'jsonl'], ['--format', 'jsonl']),
+    (['--model', 'base.en', '--format', 'jsonl'], ['--model', 'base.en', '--format', 'jsonl']),
+    (['--model', 'base.en'], ['--model', 'base.en']),
+    (['--model', 'large-v3', '--format', 'jsonl'], ['--format', 'jsonl']),
+    (['--output', '/etc/passwd'], []),
+    (['--format', 'yaml'], []),
+    (['--model', 3], []),
+    ('--model base.en', []),
+])
+def test_client_args_are_limited_to_profiles(args, expected):
+    server = RelayServer('127.0.0.1', 0, stub_command(), profiles=[['--model', 'base.en']])
+    with server:
+        assert server.client_args(args) == expected
+
+
+def test_unknown_args_never_reach_the_transcriber(serve, make_wav):
+    port = serve(RelayServer('127.0.0.1', 0, stub_command()))
+    transport = RelayTransport('127.0.0.1', port)
+    try:
+        # The stub rejects arguments it doesn't know, so the request would fail if they were passed
+        assert transport.transcribe(make_wav(), ['--bogus', 'value']).strip() == 'stub transcription'
+    finally:
+        transport.close()
+
+
+def test_launch_command_passes_configured_profiles(monkeypatch):
+    monkeypatch.setattr(config, 'routes', [{'name': 'short', 'max_seconds': 5, 'args': ['--model', 'tiny.en']}])
+    monkeypatch.setattr(config, 'refine_args', ['--prompt', "it's late"])
+
+    command = _relay_launch_command(['pink-transcriber'])
+    profiles = [json.loads(command[i + 1]) for i, arg in enumerate(command) if arg == '--profile']
+    assert profiles == [['--model', 'tiny.en'], ['--prompt', "it's late"]]
+
+    shell = _relay_launch_command(['wsl', 'pink-transcriber'])[-1]
+    assert shell.count('--profile') == 2
@@ -0,0 +1,108 @@
+"""pink-voice replay: grouping a trace into utterances and re-driving them against the stub."""
+
+import json
+import os
+
+import pytest
+
+try:
+    import sounddevice  # noqa: F401
+except (ImportError, OSError):
+    pytest.skip("sounddevice/PortAudio not available", allow_module_level=True)
+
+import pink_voice
+from pink_voice.commands import replay
+from pink_voice.config import config
+
+
+def status(t: float, name: str) -> dict:
+    return {"t": t, "event": "status", "status": name}
+
+
+def recording(t: float, seconds: float = 0.5, capture_rate: int = 48000, channels: int = 2) -> dict:
+    """Recording event with 20ms callbacks from t - seconds, one of them late."""
+    block = capture_rate // 50
+    callbacks = [[round(t - seconds + (i + 1) * 0.02, 4), block] for i in range(int(seconds * 50))]
+    callbacks[5][0] += 0.1
+    return {"t": t, "event": "recording", "frames": int(seconds * 16000), "sample_rate": 16000,
+            "capture_rate": capture_rate, "channels": channels, "latency_profile": "balanced",
+            "callbacks": callbacks, "overflows": [1.2], "stop_seconds": 0.03, "input_rms_dbfs": -25.0}
+
+
+SESSION = [
+    {"t": 0.0, "event": "session", "platform": "linux",
+     "settings": {"downmix": "mean", "highpass_hz": 80.0, "warmup": False}},
+    {"t": 0.9, "event": "hotkey", "action": "trigger"},
+    status(1.0, "recording"),
+    status(1.5, "transcribing"),
+    recording(1.52),
+    {"t": 1.6, "event": "transcribe", "seconds": 0.05, "ok": True, "format": "text", "chars": 12},
+    status(1.7, "idle"),
+    # Nothing recorded
+    status(2.0, "recording"),
+    status(2.1, "transcribing"),
+    {"t": 2.11, "event": "recording", "frames": 0, "sample_rate": 16000},
+    status(2.2, "idle"),
+    # Cut off by the end of the trace
+    status(3.0, "recording"),
+]
+
+
+def test_utterances():
+    (utterance,) = replay._utterances(SESSION)
+    assert (utterance["start"], utterance["stop"], utterance["done"]) == (1.0, 1.5, 1.7)
+    assert utterance["recording"]["frames"] == 8000
+    assert [event["seconds"] for event in utterance["transcribe"]] == [0.05]
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / 'session.jsonl'
+    path.write_text("\n".join(json.dumps(event) for event in SESSION) + "\n", encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def replaying(stub_service, monkeypatch):
+    """Replay changes the transcription config: restore it afterwards."""
+    monkeypatch.setattr(config, 'refine_below', config.refine_below)
+    # The stub runs as `python -m`
+    monkeypatch.setenv('PYTHONPATH', os.path.dirname(os.path.dirname(pink_voice.__file__)))
+
+
+def test_replay_report(replaying, trace_file, capsys, tmp_path):
+    profile = tmp_path / 'replay.prof'
+    assert replay.run([trace_file, '--speed', '0', '--json', '--profile', str(profile)]) == 0
+
+    report = json.loads(capsys.readouterr().out)
+    assert report["platform"] == "linux"
+    (entry,) = report["utterances"]
+    assert (entry["utterance"], entry["audio_seconds"], entry["callbacks"]) == (0, 0.5, 25)
+    assert entry["traced"] == {
+        "callback_gap_max": pytest.approx(0.12), "xruns": 1, "stop_seconds": 0.03,
+        "transcribe_seconds": 0.05, "done_seconds": 0.2,
+    }
+    assert entry["replay"]["ok"]
+    assert profile.stat().st_size > 0
+
+
+def test_table_report(replaying, trace_file, capsys):
+    assert replay.run([trace_file, '--speed', '0']) == 0
+    out = capsys.readouterr().out
+    assert 'traced/replay' in out
+    assert 'transcription failed' not in out
+
+
+def test_nothing_to_replay(trace_file, tmp_path, capsys):
+    assert replay.run([trace_file, '--utterance', '3']) == 1
+    assert replay.run([str(tmp_path / 'missing.jsonl')]) == 1
+    err = capsys.readouterr().err
+    assert "No complete utterances" in err
+    assert "Trace not readable" in err
+
+
+def test_synthetic_voice_is_deterministic():
+    first, second = (replay._SyntheticVoice(16000, 2, -20.0, seed=7) for _ in range(2))
+    blocks = [first.block(320) for _ in range(10)]
+    assert blocks[0].shape == (320, 2)
+    assert all((a == b).all() for a, b in zip(blocks, (second.block(320) for _ in range(10))))
@@ -0,0 +1,88 @@
+"""Parsing and rendering structured transcription results."""
+
+import json
+
+import pytest
+
+from pink_voice.core.results import Segment, TranscriptionResult, Word, parse_capabilities, parse_result
+
+JSONL = "\n".join([
+    json.dumps({"start": 0.0, "end": 1.8, "text": " Hello world.", "confidence": 0.94,
+                "words": [{"word": "Hello", "start": 0.0, "end": 0.5, "confidence": 0.97},
+                          {"word": "world.", "start": 0.6, "end": 1.8}]}),
+    "",
+    json.dumps({"start": 2.0, "end": 3.1, "text": "Second one.", "confidence": 0.4}),
+])
+
+
+def test_parse_jsonl_segments():
+    result = parse_result(JSONL)
+
+    assert result.format == "jsonl"
+    assert result.text == "Hello world. Second one."
+    first, second = result.segments
+    assert (first.start, first.end, first.confidence) == (0.0, 1.8, 0.94)
+    assert first.words == [Word("Hello", 0.0, 0.5, 0.97), Word("world.", 0.6, 1.8)]
+    assert second == Segment("Second one.", 2.0, 3.1, 0.4)
+
+
+def test_only_text_is_required():
+    (segment,) = parse_result('{"text": "bare", "start": "soon", "confidence": true, "words": [1, {}]}').segments
+    assert segment == Segment("bare", words=[Word("", 0.0, 0.0)])
+
+
+@pytest.mark.parametrize('output', [
+    "  Just text.\n",
+    # Looks like JSON, but not like segments
+    '{"transcript": "no text field"}',
+    '["a list"]',
+    '{"text": "first"}\nthen plain text',
+    '42',
+])
+def test_anything_else_is_plain_text(output):
+    result = parse_result(output)
+    assert result == TranscriptionResult(text=output.strip())
+
+
+def test_empty_output():
+    assert parse_result("\n \n") == TranscriptionResult(text="")
+
+
+@pytest.mark.parametrize('output, formats', [
+    ('{"formats": ["text", "jsonl"]}', ["text", "jsonl"]),
+    ('{"formats": ["jsonl", "srt"]}', ["text", "jsonl"]),
+    ('{"formats": []}', ["text"]),
+    ('usage: transcriber [-h] audio', ["text"]),
+    ('["jsonl"]', ["text"]),
+    ('', ["text"]),
+])
+def test_parse_capabilities(output, formats):
+    assert parse_capabilities(output) == formats
+
+
+def test_low_confidence_needs_timings():
+    result = parse_result(JSONL)
+    result.segments.append(Segment("untimed", confidence=0.1))
+    result.segments.append(Segment("unscored", 4.0, 5.0))
+
+    assert result.low_confidence(0.5) == [1]
+    assert result.low_confidence(0.95) == [0, 1]
+
+
+def test_replace_segment_rebuilds_the_text():
+    result = parse_result(JSONL)
+    result.replace_segment(0, " Hello, world! ")
+
+    assert result.text == "Hello, world! Second one."
+    assert result.segments[0].words == []
+    assert (result.segments[0].start, result.segments[0].end) == (0.0, 1.8)
+
+
+def test_to_jsonl_round_trips():
+    result = parse_result(JSONL)
+    assert parse_result(result.to_jsonl()) == result
+
+
+def test_plain_text_as_jsonl():
+    assert json.loads(TranscriptionResult("plain").to_jsonl()) == {"text": "plain"}
+    assert TranscriptionResult("").to_jsonl() == ""
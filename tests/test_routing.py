@@ -0,0 +1,84 @@
+"""Routing clips to transcription profiles: config parsing, limits and clip measurement."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from pink_voice.config import config
+from pink_voice.core.routing import ClipStats, Route, clip_stats, configured_routes, select_route
+
+ROUTES = [
+    {'name': 'fast', 'max_seconds': 6, 'args': ['--model', 'base.en']},
+    {'name': 'quiet', 'max_speech_seconds': 20, 'min_rms_dbfs': -40, 'args': '--model medium.en'},
+    {'name': 'accurate', 'args': ['--model', 'large-v3']},
+]
+
+
+@pytest.fixture
+def routes(monkeypatch):
+    monkeypatch.setattr(config, 'routes', ROUTES)
+    return configured_routes()
+
+
+def test_configured_routes(routes):
+    assert routes == [
+        Route('fast', ('--model', 'base.en'), max_seconds=6.0),
+        # Args given as a string are split
+        Route('quiet', ('--model', 'medium.en'), max_speech_seconds=20.0, min_rms_dbfs=-40.0),
+        Route('accurate', ('--model', 'large-v3')),
+    ]
+
+
+def test_invalid_routes_are_skipped(monkeypatch, capsys):
+    monkeypatch.setattr(config, 'routes', [
+        {'args': ['--model', 'tiny']},
+        {'name': 'broken', 'max_seconds': 'soon'},
+        {'name': 'ok'},
+    ])
+    assert configured_routes() == [Route('ok')]
+    out = capsys.readouterr().out
+    assert "ignoring route '?'" in out
+    assert "ignoring route 'broken'" in out
+
+
+@pytest.mark.parametrize('clip, expected', [
+    (ClipStats(duration=3.0), 'fast'),
+    (ClipStats(duration=6.0), 'fast'),
+    # Long clip, little speech
+    (ClipStats(duration=60.0, speech_seconds=12.0), 'quiet'),
+    # Unmeasured speech counts as the whole clip
+    (ClipStats(duration=30.0), 'accurate'),
+    (ClipStats(duration=10.0, speech_seconds=8.0, rms_dbfs=-55.0), 'accurate'),
+    # Unmeasured level passes the level limit
+    (ClipStats(duration=10.0, speech_seconds=8.0, rms_dbfs=None), 'quiet'),
+])
+def test_first_matching_route_wins(routes, clip, expected):
+    assert select_route(clip).name == expected
+
+
+def test_no_routes_means_no_routing(monkeypatch):
+    monkeypatch.setattr(config, 'routes', [])
+    assert select_route(ClipStats(duration=3.0)) is None
+    assert select_route(ClipStats(duration=30.0), [Route('short', max_seconds=5)]) is None
+
+
+def test_clip_stats_from_the_recording(make_wav):
+    path = make_wav(2.0)
+    recording = SimpleNamespace(path=path, sample_rate=16000, frames=48000, speech_seconds=1.5, input_rms_dbfs=-20.0)
+    assert clip_stats(path, recording) == ClipStats(duration=3.0, speech_seconds=1.5, rms_dbfs=-20.0)
+
+    # A recorder that did not measure the level
+    recording.input_rms_dbfs = 0.0
+    assert clip_stats(path, recording).rms_dbfs is None
+
+
+def test_clip_stats_from_the_wav_header(make_wav, tmp_path):
+    path = make_wav(2.5)
+    # A recording of another file is ignored
+    other = SimpleNamespace(path='other.wav', sample_rate=16000, frames=16000, speech_seconds=1.0, input_rms_dbfs=-20.0)
+    assert clip_stats(path, other) == ClipStats(duration=2.5)
+
+    broken = tmp_path / 'broken.wav'
+    broken.write_bytes(b'not a wav')
+    assert clip_stats(str(broken)) == ClipStats(duration=0.0)
+    assert clip_stats(str(tmp_path / 'missing.wav')) == ClipStats(duration=0.0)
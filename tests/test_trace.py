@@ -0,0 +1,79 @@
+"""Session trace recorder and reader."""
+
+import json
+import time
+
+import pytest
+
+from pink_voice.config import config
+from pink_voice.core import trace
+from pink_voice.core.trace import TRACED_SETTINGS, TraceRecorder, read_trace, start_tracing
+
+
+@pytest.fixture
+def recorder():
+    recorder = TraceRecorder()
+    yield recorder
+    recorder.stop()
+
+
+def test_off_until_started(recorder, tmp_path):
+    assert not recorder.enabled
+    recorder.event("hotkey", action="trigger")
+    recorder.stop()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_events_are_timed_from_the_start(recorder, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'hotkey', 'ctrl+q')
+    path = tmp_path / 'traces' / 'session.jsonl'
+    recorder.start(str(path))
+    assert recorder.enabled
+    recorder.event("status", status="recording")
+    mark = time.monotonic()
+    recorder.event("recording", frames=16000, callbacks=[[recorder.relative(mark), 320]])
+    recorder.stop()
+    assert not recorder.enabled
+    recorder.event("ignored")
+
+    session, status, recording = read_trace(str(path))
+    assert session["event"] == "session"
+    assert set(session["settings"]) == set(TRACED_SETTINGS)
+    assert session["settings"]["hotkey"] == 'ctrl+q'
+    assert status == {"t": status["t"], "event": "status", "status": "recording"}
+    assert 0 <= session["t"] <= status["t"] <= recording["callbacks"][0][0] <= recording["t"] < 5
+
+
+def test_events_are_written_as_they_happen(recorder, tmp_path):
+    path = tmp_path / 'session.jsonl'
+    recorder.start(str(path))
+    recorder.event("hotkey", action="prepare")
+
+    # Readable while the session runs, e.g. after a crash
+    assert [event["event"] for event in read_trace(str(path))] == ["session", "hotkey"]
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    path = tmp_path / 'session.jsonl'
+    path.write_text(json.dumps({"t": 0.0, "event": "session"}) + '\n{"t": 1.5, "event": "hot', encoding='utf-8')
+    assert read_trace(str(path)) == [{"t": 0.0, "event": "session"}]
+
+
+def test_start_tracing_from_config(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(trace, 'tracer', TraceRecorder())
+    monkeypatch.setattr(config, 'trace_path', '')
+    start_tracing()
+    assert not trace.tracer.enabled
+
+    # A file where the directory should be
+    (tmp_path / 'blocked').write_text('')
+    monkeypatch.setattr(config, 'trace_path', str(tmp_path / 'blocked' / 'session.jsonl'))
+    start_tracing()
+    assert not trace.tracer.enabled
+    assert "Trace not started" in capsys.readouterr().out
+
+    monkeypatch.setattr(config, 'trace_path', str(tmp_path / 'session.jsonl'))
+    start_tracing()
+    assert trace.tracer.enabled
+    assert "Tracing session to" in capsys.readouterr().out
+    trace.tracer.stop()
@@ -0,0 +1,203 @@
+"""TranscribeService against a fake transport: warm-up, result format and refinement."""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from pink_voice.config import config
+from pink_voice.core import transcribe as transcribe_module
+from pink_voice.core.metrics import MetricsRegistry
+from pink_voice.core.transcribe import TranscribeService
+
+
+class FakeTransport:
+    """Answers health checks (optionally slowly) and transcribes to `text`, or to each of `replies` in turn."""
+
+    def __init__(self, healthy: bool = True, text: str = "hello", health_delay: float = 0.0,
+                 formats=('text',), replies=()) -> None:
+        self.healthy = healthy
+        self.text = text
+        self.health_delay = health_delay
+        self.formats = list(formats)
+        self.replies = list(replies)
+        self.health_checks = 0
+        self.calls = []
+        self.release = threading.Event()
+
+    def health_check(self, timeout: float = 2.0) -> bool:
+        self.health_checks += 1
+        self.release.wait(self.health_delay)
+        return self.healthy
+
+    def capabilities(self, timeout: float = 2.0) -> list:
+        return self.formats
+
+    def transcribe(self, audio_path: str, args=()) -> str:
+        self.calls.append((audio_path, tuple(args)))
+        if self.replies:
+            reply = self.replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+        return self.text
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(transcribe_module, 'metrics', registry)
+    return registry
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Install a fake transport (replace with use(...)); config as for a plain text transcriber."""
+    monkeypatch.setattr(config, 'result_format', 'text')
+    monkeypatch.setattr(config, 'routes', [])
+    monkeypatch.setattr(config, 'refine_below', 0.0)
+
+    def use(fake: FakeTransport) -> FakeTransport:
+        monkeypatch.setattr(transcribe_module, '_transport', fake)
+        return fake
+
+    monkeypatch.setattr(transcribe_module, '_prepared', False)
+    return use
+
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_warm_up_pings_the_transcriber(transport, registry):
+    fake = transport(FakeTransport())
+    TranscribeService.prepare()
+
+    assert wait_until(lambda: 'warmups_total{result="ok"} 1' in registry.render_prometheus())
+    assert fake.health_checks == 1
+
+
+def test_failed_warm_up_is_counted(transport, registry):
+    transport(FakeTransport(healthy=False))
+    TranscribeService.prepare()
+    assert wait_until(lambda: 'warmups_total{result="fail"} 1' in registry.render_prometheus())
+
+
+def test_one_warm_up_at_a_time(transport, registry):
+    fake = transport(FakeTransport(health_delay=5))
+    for _ in range(3):
+        TranscribeService.prepare()
+    assert wait_until(lambda: fake.health_checks)
+    time.sleep(0.1)
+    assert fake.health_checks == 1
+
+    fake.release.set()
+    assert wait_until(lambda: not transcribe_module._warmup_running)
+    TranscribeService.prepare()
+    assert wait_until(lambda: fake.health_checks == 2)
+
+
+def test_latency_is_split_by_warm_up(transport, registry, make_wav):
+    fake = transport(FakeTransport())
+    path = make_wav()
+
+    TranscribeService.prepare()
+    assert TranscribeService.transcribe(path) == "hello"
+    # The warm-up counts for one transcription only
+    TranscribeService.transcribe(path)
+
+    text = registry.render_prometheus()
+    assert 'pink_voice_transcription_warm_seconds_count 1\n' in text
+    assert 'pink_voice_transcription_cold_seconds_count 1\n' in text
+    assert 'pink_voice_transcriptions_total{result="success"} 2\n' in text
+    assert fake.calls == [(path, ()), (path, ())]
+
+
+def test_result_format_is_negotiated_once(transport, monkeypatch):
+    monkeypatch.setattr(config, 'result_format', 'auto')
+    monkeypatch.setattr(transcribe_module, '_result_format', None)
+    fake = transport(FakeTransport(formats=('text', 'jsonl'), text='{"text": "hi", "start": 0, "end": 1}'))
+
+    result = TranscribeService.transcribe_result('clip.wav')
+    TranscribeService.transcribe_result('clip.wav')
+
+    assert (result.format, result.text) == ('jsonl', 'hi')
+    assert fake.calls == [('clip.wav', ('--format', 'jsonl'))] * 2
+    assert fake.health_checks == 0
+
+
+def test_text_only_is_remembered_once_the_transcriber_answers(transport, monkeypatch):
+    monkeypatch.setattr(config, 'result_format', 'auto')
+    monkeypatch.setattr(transcribe_module, '_result_format', None)
+    fake = transport(FakeTransport(healthy=False))
+
+    # Unreachable: asked again next time
+    assert transcribe_module.result_format() == 'text'
+    assert transcribe_module._result_format is None
+
+    fake.healthy = True
+    assert transcribe_module.result_format() == 'text'
+    assert transcribe_module._result_format == 'text'
+
+
+def segments(*items) -> str:
+    return "\n".join(json.dumps(item) for item in items)
+
+
+@pytest.fixture
+def refining(transport, registry, monkeypatch):
+    """Transcribe as jsonl, refining segments below 0.6 with a larger model."""
+    monkeypatch.setattr(config, 'result_format', 'jsonl')
+    monkeypatch.setattr(config, 'refine_below', 0.6)
+    monkeypatch.setattr(config, 'refine_args', ['--model', 'large'])
+    return transport
+
+
+FIRST_PASS = segments(
+    {"text": "Sure thing.", "start": 0.0, "end": 0.8, "confidence": 0.95},
+    {"text": "Meat at noon.", "start": 1.0, "end": 1.8, "confidence": 0.3},
+)
+
+
+def test_uncertain_segment_is_refined(refining, registry, make_wav):
+    path = make_wav(2.0)
+    fake = refining(FakeTransport(replies=[
+        FIRST_PASS,
+        segments({"text": "Meet at noon.", "start": 0.2, "end": 1.0, "confidence": 0.8}),
+    ]))
+
+    result = TranscribeService.transcribe_result(path)
+
+    assert result.text == "Sure thing. Meet at noon."
+    assert result.segments[1].confidence == 0.8
+    (_, first_args), (span_path, refine_args) = fake.calls
+    assert first_args == ('--format', 'jsonl')
+    assert refine_args == ('--model', 'large', '--format', 'jsonl')
+    assert span_path != path and not os.path.exists(span_path)
+    assert 'pink_voice_transcription_refines_total{result="replaced"} 1\n' in registry.render_prometheus()
+
+
+@pytest.mark.parametrize('retry, outcome', [
+    # Even less sure
+    (segments({"text": "Meat a noon.", "confidence": 0.2}), 'kept'),
+    ("", 'kept'),
+    (RuntimeError("busy"), 'failure'),
+])
+def test_original_is_kept_unless_the_retry_is_better(refining, registry, make_wav, retry, outcome):
+    fake = refining(FakeTransport(replies=[FIRST_PASS, retry]))
+
+    result = TranscribeService.transcribe_result(make_wav(2.0))
+
+    assert result.text == "Sure thing. Meat at noon."
+    assert len(fake.calls) == 2
+    assert f'pink_voice_transcription_refines_total{{result="{outcome}"}} 1\n' in registry.render_prometheus()
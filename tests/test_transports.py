@@ -0,0 +1,148 @@
+"""MultiTransport retries, hedging and attempt deadlines with fake endpoints; CommandTransport timeout."""
+
+import threading
+import time
+
+import pytest
+
+from pink_voice.config import config
+from pink_voice.core import transports
+from pink_voice.core.metrics import MetricsRegistry
+from pink_voice.core.transports import CommandTransport, MultiTransport, _Endpoint
+from tests.conftest import stub_command
+
+
+class FakeEndpoint:
+    """Transcribes after `delay`, fails with `error`, or stalls until released."""
+
+    def __init__(self, text: str = "ok", delay: float = 0.0, error: str = "", stall: bool = False) -> None:
+        self.text = text
+        self.delay = delay
+        self.error = error
+        self.stall = stall
+        self.calls = 0
+        self.released = threading.Event()
+
+    def transcribe(self, audio_path: str, args=()) -> str:
+        self.calls += 1
+        if self.stall:
+            self.released.wait(10)
+        time.sleep(self.delay)
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.text
+
+    def health_check(self, timeout: float) -> bool:
+        return not self.error
+
+    def capabilities(self, timeout: float) -> list:
+        return ["text"]
+
+    def close(self) -> None:
+        self.released.set()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(transports, 'metrics', registry)
+    return registry
+
+
+@pytest.fixture
+def multi():
+    """Build a MultiTransport over fake endpoints named a, b, c...; closed after the test."""
+    built = []
+
+    def make(*fakes: FakeEndpoint, **options) -> MultiTransport:
+        endpoints = [_Endpoint(chr(ord('a') + i), fake) for i, fake in enumerate(fakes)]
+        transport = MultiTransport(endpoints, **{'backoff': 0.01, 'hedge_delay': 0.05, **options})
+        built.append(transport)
+        return transport
+
+    yield make
+    for transport in built:
+        transport.close()
+
+
+def test_failure_is_retried_on_another_endpoint(multi, registry):
+    failing, working = FakeEndpoint(error="model crashed"), FakeEndpoint(text="second")
+    transport = multi(failing, working, hedge=False)
+
+    assert transport.transcribe('clip.wav') == "second"
+    assert (failing.calls, working.calls) == (1, 1)
+    assert transport.endpoints[0].failures == 1
+    assert 'pink_voice_transcription_retries_total 1\n' in registry.render_prometheus()
+
+    # The failed endpoint now ranks last
+    assert transport.transcribe('clip.wav') == "second"
+    assert failing.calls == 1
+
+
+def test_backoff_doubles_with_full_jitter(multi, registry, monkeypatch):
+    delays = []
+    monkeypatch.setattr(transports.random, 'uniform', lambda low, high: delays.append((low, high)) or 0)
+    transport = multi(FakeEndpoint(error="down"), FakeEndpoint(error="also down"), retries=3, backoff=0.2,
+                      hedge=False)
+
+    with pytest.raises(RuntimeError, match='all endpoints: also down|all endpoints: down'):
+        transport.transcribe('clip.wav')
+    assert delays == [(0, 0.2), (0, 0.4), (0, 0.8)]
+    assert 'pink_voice_transcription_retries_total 3\n' in registry.render_prometheus()
+
+
+def test_hedge_wins_over_slow_primary(multi, registry):
+    slow, fast = FakeEndpoint(text="primary", delay=0.5), FakeEndpoint(text="hedge")
+    transport = multi(slow, fast)
+
+    started = time.monotonic()
+    assert transport.transcribe('clip.wav') == "hedge"
+    assert time.monotonic() - started < 0.4
+
+    text = registry.render_prometheus()
+    assert 'pink_voice_transcription_hedges_total 1\n' in text
+    assert 'pink_voice_transcription_hedge_wins_total{winner="hedge"} 1\n' in text
+
+
+def test_primary_can_still_win_after_hedging(multi, registry):
+    primary, backup = FakeEndpoint(text="primary", delay=0.15), FakeEndpoint(text="hedge", delay=1.0)
+    transport = multi(primary, backup)
+
+    assert transport.transcribe('clip.wav') == "primary"
+    assert backup.calls == 1
+    assert 'pink_voice_transcription_hedge_wins_total{winner="primary"} 1\n' in registry.render_prometheus()
+
+
+def test_hedge_waits_for_the_primary_after_its_own_failure(multi, registry):
+    primary, backup = FakeEndpoint(text="primary", delay=0.2), FakeEndpoint(error="busy")
+    transport = multi(primary, backup, retries=0)
+    assert transport.transcribe('clip.wav') == "primary"
+
+
+def test_stalled_primary_is_abandoned_at_the_deadline(multi, registry):
+    stalled, failing, working = FakeEndpoint(stall=True), FakeEndpoint(error="busy"), FakeEndpoint(text="third")
+    transport = multi(stalled, failing, working, timeout=0.3)
+
+    started = time.monotonic()
+    assert transport.transcribe('clip.wav') == "third"
+    assert 0.3 <= time.monotonic() - started < 1.5
+    assert transport.endpoints[0].failures == 1
+    assert 'pink_voice_transcription_timeouts_total 1\n' in registry.render_prometheus()
+
+
+def test_single_stalled_endpoint_times_out(multi, registry):
+    transport = multi(FakeEndpoint(stall=True), retries=0, timeout=0.2)
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match='a did not answer within 0.2s'):
+        transport.transcribe('clip.wav')
+    assert time.monotonic() - started < 1
+
+
+def test_command_transcription_times_out(monkeypatch, make_wav):
+    monkeypatch.setattr(config, 'transcribe_timeout', 0.5)
+    transport = CommandTransport(stub_command('--latency', '10'))
+
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match='timed out after 0.5s'):
+        transport.transcribe(make_wav())
+    assert time.monotonic() - started < 5
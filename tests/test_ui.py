@@ -0,0 +1,87 @@
+"""BaseUI start-up: crash recovery and the queue's retry thread, with a fake recorder."""
+
+import pytest
+
+try:
+    from pink_voice.ui import base
+except (ImportError, OSError):
+    # pynput needs a display server, sounddevice needs PortAudio
+    pytest.skip("pynput or sounddevice not available", allow_module_level=True)
+
+from pink_voice.config import config
+from pink_voice.ui.base import BaseUI
+
+
+class FakeRecorder:
+    """Hands back one salvaged spill at start-up."""
+
+    process = None
+    on_stall = None
+
+    def __init__(self, salvaged) -> None:
+        self.salvaged = salvaged
+
+    def salvage_orphaned_spills(self) -> list:
+        return self.salvaged
+
+    def is_recording(self) -> bool:
+        return False
+
+
+class UI(BaseUI):
+    """Records what the subclass hooks are called with."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.statuses = []
+
+    def toggle_recording(self) -> None:
+        pass
+
+    def update_status(self, status: str) -> None:
+        self.statuses.append(status)
+
+    def on_transcription_success(self, text: str) -> None:
+        pass
+
+    def on_transcription_error(self, error: str) -> None:
+        pass
+
+    def run(self) -> None:
+        self._start_queue()
+
+
+@pytest.fixture
+def salvaged(tmp_path, monkeypatch, make_wav):
+    """A recording the previous run left behind; queueing on, retries far apart."""
+    path = make_wav(name='salvaged.wav')
+    monkeypatch.setattr(base, 'AudioRecorder', lambda **settings: FakeRecorder([path]))
+    monkeypatch.setattr(config, 'data_dir', str(tmp_path / 'data'))
+    monkeypatch.setattr(config, 'queue_enabled', True)
+    monkeypatch.setattr(config, 'archive_enabled', False)
+    monkeypatch.setattr(config, 'idle_timeout', 0)
+    monkeypatch.setattr(config, 'queue_retry_interval', 60)
+    monkeypatch.setattr(config, '_listeners', [])
+    return path
+
+
+def test_queue_waits_for_run(salvaged, capsys):
+    ui = UI()
+
+    # Recovered and queued during start-up, but not retried before the UI is ready
+    (job,) = ui.queue.pending()
+    assert job.last_error == "Recovered after a crash"
+    assert ui._queue_monitor is None
+    assert "Recovered a recording from the previous run, it will be transcribed" in capsys.readouterr().out
+
+    ui.run()
+    assert ui._queue_monitor.is_alive()
+
+
+def test_recovered_recording_is_kept_without_a_queue(salvaged, monkeypatch, capsys):
+    monkeypatch.setattr(config, 'queue_enabled', False)
+    ui = UI()
+    ui.run()
+
+    assert ui.queue is None
+    assert f"Recovered a recording from the previous run: {salvaged}" in capsys.readouterr().out
@@ -0,0 +1,77 @@
+"""Streaming WAV writer and cutting clips out of WAV files."""
+
+import wave
+
+import numpy as np
+import pytest
+
+from pink_voice.core.wav import HEADER_BYTES, WavWriter, cut
+
+
+def read(path: str):
+    with wave.open(path, 'rb') as wav:
+        params = (wav.getframerate(), wav.getnchannels(), wav.getsampwidth())
+        return params, np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+
+
+def test_blocks_are_joined_with_the_sizes_patched(tmp_path):
+    path = str(tmp_path / 'out.wav')
+    blocks = [np.arange(i * 100, (i + 1) * 100, dtype=np.int16) for i in range(5)]
+    with WavWriter(path, 16000) as writer:
+        for block in blocks:
+            writer.write(block)
+        assert writer.frames == 500
+
+    params, samples = read(path)
+    assert params == (16000, 1, 2)
+    np.testing.assert_array_equal(samples, np.concatenate(blocks))
+    assert (tmp_path / 'out.wav').stat().st_size == HEADER_BYTES + 1000
+
+
+def test_stereo_and_raw_bytes(tmp_path):
+    path = str(tmp_path / 'stereo.wav')
+    interleaved = np.array([1, -1, 2, -2, 3, -3], dtype=np.int16)
+    with WavWriter(path, 48000, channels=2) as writer:
+        writer.write(interleaved[:2].tobytes())
+        writer.write(interleaved[2:])
+        assert writer.frames == 3
+
+    params, samples = read(path)
+    assert params == (48000, 2, 2)
+    np.testing.assert_array_equal(samples, interleaved)
+
+
+def test_odd_data_is_padded(tmp_path):
+    path = tmp_path / 'odd.wav'
+    with WavWriter(str(path), 8000, sample_width=1) as writer:
+        writer.write(b'\x80\x81\x82')
+
+    assert path.stat().st_size == HEADER_BYTES + 4
+    with wave.open(str(path), 'rb') as wav:
+        assert wav.getnframes() == 3
+
+
+def test_close_twice(tmp_path):
+    writer = WavWriter(str(tmp_path / 'out.wav'), 16000)
+    writer.close()
+    writer.close()
+
+
+@pytest.mark.parametrize('start, end, expected', [
+    (0.25, 0.75, 0.5),
+    # Clamped to the file
+    (-1.0, 0.5, 0.5),
+    (0.5, 5.0, 0.5),
+    (0.75, 0.25, 0.0),
+])
+def test_cut(make_wav, tmp_path, start, end, expected):
+    source = make_wav(1.0)
+    path = str(tmp_path / 'cut.wav')
+    assert cut(source, start, end, path) == pytest.approx(expected)
+
+    _, whole = read(source)
+    params, samples = read(path)
+    assert params == (16000, 1, 2)
+    first = int(max(start, 0) * 16000)
+    np.testing.assert_array_equal(samples, whole[first:first + len(samples)])
+    assert len(samples) == int(expected * 16000)